@@ -4,37 +4,256 @@ These routes are exposed through the Flask app and provide the main API for
 the client application.
 """
 
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request, jsonify, Response, stream_with_context
 import pandas as pd
 from datetime import datetime
-from io import StringIO
 import traceback
+import queue
+from collections import deque
+import hashlib
 
 # Import our services
-from backend.services.database import Database
-from backend.services.cv_processing import process_cv_data
+from backend.services.admission import Overloaded, ResourceGovernor, admitted
+from backend.services.cv_processing import position_score_weights
+from backend.services.database import CANDIDATE_STATUSES, SCORE_BUCKETS
+from backend.services.ingest import import_upload, InvalidUploadError, UploadInProgressError, UploadInterruptedError
+from backend.services.notifications import broker, format_sse
+from backend.services.parsers import get_parser, supported_extensions, UnsupportedFormatError
+from backend.services.replicas import end_request
+from backend.services.reweighting import MAX_WHAT_IF_RESULTS, parse_weights, what_if
+from backend.services.request_timing import server_timing_header, start_request
+from backend.services.sharding import open_database
+from backend.services.serialization import JSON_TYPE, choose_encoding, compress, encode_records, negotiate
+from backend.services.upload_metrics import UploadMetrics
 
 # Create API Blueprint
 api = Blueprint('api', __name__)
 
-# Initialize database
-db = Database()
+# Initialize database, sharded when DATABASE_SHARD_URLS is set
+db = open_database()
+
+# Caps concurrent uploads and exports, so they cannot starve the read endpoints
+heavy_work = ResourceGovernor('upload/export')
+
+# Largest number of candidates accepted by one bulk update
+MAX_BULK_UPDATES = 1000
+
+# Largest number of candidates returned by one batch lookup
+MAX_BATCH_CANDIDATES = 200
+
+# Largest number of neighbors returned by a similar-candidates lookup
+MAX_SIMILAR_CANDIDATES = 100
+
+# Seconds between keep-alive comments on idle notification streams
+SSE_HEARTBEAT_SECONDS = 15
+
+# Notifications read per query when a stream replays what a client missed
+SSE_REPLAY_PAGE_SIZE = 100
+
+# Notification IDs a stream remembers sending. IDs can commit, and so be
+# published, out of order, so a live notification below the highest ID sent
+# is only skipped if it was sent itself.
+SSE_RECENT_IDS = 1000
+
+# Seconds a client is asked to wait before sending an interrupted upload again
+UPLOAD_RESUME_SECONDS = 5
+
+# Helpers shared with the ASGI app (backend/asgi.py)
+def upload_request_error(filename, position):
+    """Return the validation error for an upload request, or None if it can be processed"""
+    if not position:
+        return "Position is required"
+    
+    if filename == '':
+        return "No selected file"
+    
+    if get_parser(filename) is None:
+        return f"Unsupported file type. Allowed: {', '.join(supported_extensions())}"
+    
+    return None
+
+def upload_response(total_records, successful_records, failed_records):
+    """Build the response body for a processed upload"""
+    return {
+        "success": True,
+        "message": f"Processed {successful_records} candidates successfully. {failed_records} failed.",
+        "totalRecords": total_records,
+        "successfulRecords": successful_records,
+        "failedRecords": failed_records
+    }
+
+def duplicate_upload_response(filename, position, previous_upload):
+    """Build the response body for a file that was already imported"""
+    return {
+        "success": True,
+        "duplicate": True,
+        "message": f"{filename} was already processed for {position}. No changes were made.",
+        "totalRecords": previous_upload.get('total_records'),
+        "successfulRecords": 0,
+        "failedRecords": 0
+    }
+
+def interrupted_upload_body(error):
+    """Build the response body for an upload that stopped part way; sending the file again resumes it"""
+    return {"error": str(error), "resumable": True, "retryAfter": UPLOAD_RESUME_SECONDS}
+
+def build_stats(candidates, uploads, positions):
+    """Build the dashboard statistics from candidates, uploads and active positions"""
+    # Calculate statistics
+    shortlisted = [c for c in candidates if c.get('status') == 'shortlisted']
+    
+    # Calculate time saved (rough estimate: 15 minutes per CV)
+    time_saved = len(candidates) * 15
+    hours_saved = time_saved // 60
+    
+    # Build statistics response
+    return {
+        "totalCVs": len(candidates),
+        "shortlistedCandidates": len(shortlisted),
+        "activePositions": len(positions),
+        "timeSaved": f"{hours_saved} hrs",
+        "lastUpload": uploads[-1].get('processed_at') if uploads else None
+    }
+
+def build_reports(position_stats):
+    """Build per-position status breakdowns and score distributions from position_stats rows"""
+    reports = []
+    for row in position_stats:
+        scored = row.get('scored_count') or 0
+        reports.append({
+            "position": row['position'],
+            "totalCandidates": row['total_candidates'],
+            "statusCounts": {status: row[f"{status}_count"] for status in CANDIDATE_STATUSES},
+            "averageScore": round(row['score_total'] / scored, 1) if scored else None,
+            "scoreDistribution": [
+                {
+                    "range": f"{i * 10}-{i * 10 + 9 if i < SCORE_BUCKETS - 1 else 100}",
+                    "count": row[f"score_bucket_{i}"]
+                }
+                for i in range(SCORE_BUCKETS)
+            ]
+        })
+    return reports
+
+def list_response(records):
+    """Return a list in the format negotiated by the Accept header or ?format= parameter"""
+    media_type = negotiate(request.headers.get('Accept'), request.args.get('format'))
+    if media_type == JSON_TYPE:
+        return jsonify(records)
+    response = Response(encode_records(records, media_type), mimetype=media_type)
+    response.vary.add('Accept')
+    return response
+
+@api.after_request
+def compress_response(response):
+    """Compress API responses with brotli or gzip when the client accepts it"""
+    if (response.direct_passthrough or response.is_streamed or 'Content-Encoding' in response.headers
+            or not 200 <= response.status_code < 300):
+        return response
+    
+    response.vary.add('Accept-Encoding')
+    body, encoding = compress(response.get_data(), choose_encoding(request.headers.get('Accept-Encoding')))
+    if encoding:
+        response.set_data(body)
+        response.headers['Content-Encoding'] = encoding
+    return response
+
+def overloaded_body(error):
+    """Build the response body for a request turned away by admission control"""
+    return {"error": str(error), "retryAfter": error.retry_after}
+
+@api.errorhandler(Overloaded)
+def overloaded(error):
+    response = jsonify(overloaded_body(error))
+    response.status_code = error.status
+    response.headers['Retry-After'] = str(error.retry_after)
+    return response
+
+# Read-your-writes stickiness lasts for one request
+@api.before_app_request
+def reset_replica_routing():
+    end_request()
+
+@api.before_app_request
+def start_request_timing():
+    start_request()
+
+@api.after_app_request
+def add_server_timing(response):
+    """Report the request's database and handler time in a Server-Timing header"""
+    timing = server_timing_header()
+    if timing:
+        response.headers['Server-Timing'] = timing
+    return response
+
+@api.teardown_app_request
+def release_primary(exception=None):
+    end_request()
 
 # API Routes
 @api.route('/candidates', methods=['GET'])
 def get_candidates():
-    """Get all candidates"""
-    candidates = db.get_all_candidates()
-    return jsonify(candidates)
+    """
+    Get all candidates, optionally filtered by minimum years of experience or required skills
+    
+    With ?view=summary only the summary columns (no skills, experience or
+    notes) are returned; /candidates/batch loads the full rows on demand.
+    Archived candidates are listed too with ?include_archived=true; the
+    skills and min_years filters search current candidates only.
+    """
+    summary = request.args.get('view') == 'summary'
+    skills = request.args.get('skills')
+    if skills:
+        return list_response(db.get_candidates_by_skills(skills.split(','), summary))
+    
+    min_years = request.args.get('min_years', type=float)
+    if min_years is not None:
+        return list_response(db.get_candidates_by_min_years(min_years, summary))
+    
+    include_archived = request.args.get('include_archived') in ('1', 'true')
+    candidates = db.get_all_candidates(summary, include_archived)
+    return list_response(candidates)
+
+@api.route('/candidates/archive', methods=['GET'])
+def get_archived_candidates():
+    """
+    Get archived candidates, optionally for one ?position= and created in a
+    [?from=, ?to=) date range; only the archive partitions in range are read
+    """
+    return list_response(db.get_archived_candidates(
+        request.args.get('position'), request.args.get('from'), request.args.get('to'),
+        request.args.get('view') == 'summary'))
+
+@api.route('/candidates/batch', methods=['GET'])
+def get_candidates_batch():
+    """Get the full rows of several candidates, given as ?ids=1,2,3, in one round trip"""
+    try:
+        ids = [int(id) for id in request.args.get('ids', '').split(',') if id.strip()]
+    except ValueError:
+        return jsonify({"error": "ids must be a comma-separated list of candidate IDs"}), 400
+    if not ids:
+        return jsonify({"error": "ids is required"}), 400
+    if len(ids) > MAX_BATCH_CANDIDATES:
+        return jsonify({"error": f"At most {MAX_BATCH_CANDIDATES} candidates can be fetched at once"}), 400
+    return list_response(db.get_candidates_by_ids(ids))
 
 @api.route('/candidates/<int:id>', methods=['GET'])
 def get_candidate(id):
-    """Get a specific candidate by ID"""
-    candidate = db.get_candidate_by_id(id)
+    """Get a specific candidate by ID, looking in the archive too with ?include_archived=true"""
+    candidate = db.get_candidate_by_id(id, request.args.get('include_archived') in ('1', 'true'))
     if not candidate:
         return jsonify({"error": "Candidate not found"}), 404
     return jsonify(candidate)
 
+@api.route('/candidates/<int:id>/similar', methods=['GET'])
+def get_similar_candidates(id):
+    """Get the candidates with the most similar skill sets to a candidate"""
+    if not db.get_candidate_by_id(id):
+        return jsonify({"error": "Candidate not found"}), 404
+    
+    limit = max(1, min(request.args.get('limit', 10, type=int), MAX_SIMILAR_CANDIDATES))
+    return list_response(db.get_similar_candidates(id, limit))
+
 @api.route('/candidates/<int:id>/status', methods=['POST'])
 def update_candidate_status(id):
     """Update a candidate's status"""
@@ -45,7 +264,7 @@ def update_candidate_status(id):
         return jsonify({"error": "Status is required"}), 400
     
     # Validate status
-    if status not in ['pending', 'shortlisted', 'review', 'rejected']:
+    if status not in CANDIDATE_STATUSES:
         return jsonify({"error": "Invalid status value"}), 400
     
     result = db.update_candidate_status(id, status)
@@ -66,107 +285,175 @@ def update_candidate_notes(id):
     
     return jsonify(result)
 
+@api.route('/candidates/bulk', methods=['POST'])
+def bulk_update_candidates():
+    """Update the status and/or notes of many candidates in one request"""
+    data = request.get_json(silent=True)
+    updates = data.get('updates') if isinstance(data, dict) else None
+    
+    if not isinstance(updates, list) or not updates:
+        return jsonify({"error": "updates must be a non-empty list"}), 400
+    
+    if len(updates) > MAX_BULK_UPDATES:
+        return jsonify({"error": f"At most {MAX_BULK_UPDATES} updates are allowed per request"}), 400
+    
+    for update in updates:
+        if (not isinstance(update, dict) or isinstance(update.get('id'), bool)
+                or not isinstance(update.get('id'), int)):
+            return jsonify({"error": "Each update requires an integer id"}), 400
+        if 'status' not in update and 'notes' not in update:
+            return jsonify({"error": f"Update for candidate {update['id']} has no status or notes"}), 400
+        if 'status' in update and update['status'] not in CANDIDATE_STATUSES:
+            return jsonify({"error": f"Invalid status value for candidate {update['id']}"}), 400
+        if 'notes' in update and not isinstance(update['notes'], str):
+            return jsonify({"error": f"Notes for candidate {update['id']} must be a string"}), 400
+    
+    result = db.bulk_update_candidates(updates)
+    if result is None:
+        return jsonify({"error": "Failed to update candidates"}), 500
+    
+    updated_ids = {candidate['id'] for candidate in result}
+    return jsonify({
+        "updated": result,
+        "notFound": sorted({update['id'] for update in updates} - updated_ids)
+    })
+
+@api.route('/duplicates', methods=['GET'])
+def get_duplicates():
+    """Get groups of candidates that are probably the same person"""
+    return jsonify(db.get_duplicate_groups())
+
+@api.route('/duplicates/merge', methods=['POST'])
+def merge_duplicates():
+    """Merge duplicate candidates into the one to keep"""
+    data = request.get_json(silent=True)
+    if not isinstance(data, dict):
+        return jsonify({"error": "Request body must be a JSON object"}), 400
+    keep = data.get('keep')
+    merge = data.get('merge')
+    
+    if isinstance(keep, bool) or not isinstance(keep, int):
+        return jsonify({"error": "keep must be a candidate id"}), 400
+    
+    if (not isinstance(merge, list) or not merge
+            or not all(isinstance(id, int) and not isinstance(id, bool) for id in merge)):
+        return jsonify({"error": "merge must be a non-empty list of candidate ids"}), 400
+    
+    candidate = db.merge_candidates(keep, merge)
+    if not candidate:
+        return jsonify({"error": "Candidates not found or not for the same position"}), 400
+    
+    return jsonify(candidate)
+
 @api.route('/positions', methods=['GET'])
 def get_positions():
     """Get all positions"""
     positions = db.get_all_positions()
-    return jsonify(positions)
+    return list_response(positions)
 
 @api.route('/active-positions', methods=['GET'])
 def get_active_positions():
     """Get all active positions"""
     positions = db.get_active_positions()
-    return jsonify(positions)
+    return list_response(positions)
+
+@api.route('/positions/what-if', methods=['POST'])
+def what_if_ranking():
+    """
+    Re-rank a position's candidates under other score weights, from their
+    stored component scores
+    
+    Takes {"position": title, "weights": {"skill_score": 0.5, ...}, "limit": 20,
+    "commit": false}. Components left out of weights keep the position's
+    weights. With commit the new scores are written and the weights are kept
+    for the position's later uploads.
+    """
+    data = request.get_json(silent=True)
+    if not isinstance(data, dict):
+        return jsonify({"error": "Request body must be a JSON object"}), 400
+    position = data.get('position')
+    if not isinstance(position, str) or not position:
+        return jsonify({"error": "position is required"}), 400
+    
+    limit = data.get('limit', 20)
+    if isinstance(limit, bool) or not isinstance(limit, int) or not 1 <= limit <= MAX_WHAT_IF_RESULTS:
+        return jsonify({"error": f"limit must be an integer from 1 to {MAX_WHAT_IF_RESULTS}"}), 400
+    
+    position_data = db.get_position_by_title(position)
+    if not position_data:
+        return jsonify({"error": "Position not found"}), 404
+    
+    try:
+        weights = parse_weights(data.get('weights'), position_score_weights(position_data))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    
+    result = what_if(db, position_data, weights, limit, commit=bool(data.get('commit')))
+    if result is None:
+        return jsonify({"error": "Failed to commit the new scores"}), 500
+    return jsonify(result)
 
 @api.route('/upload', methods=['POST'])
+@admitted(heavy_work)
 def upload_csv():
-    """Upload and process a CSV file of candidates"""
+    """Upload and process a file of candidates (CSV, compressed CSV, Parquet or JSON Lines)"""
     if 'file' not in request.files:
         return jsonify({"error": "No file part"}), 400
     
     file = request.files['file']
     position = request.form.get('position')
     
-    if not position:
-        return jsonify({"error": "Position is required"}), 400
-    
-    if file.filename == '':
-        return jsonify({"error": "No selected file"}), 400
-    
-    if not file.filename.endswith('.csv'):
-        return jsonify({"error": "Only CSV files are allowed"}), 400
+    error = upload_request_error(file.filename, position)
+    if error:
+        return jsonify({"error": error}), 400
     
     try:
-        # Read CSV content
-        csv_content = file.read().decode('utf-8')
+        metrics = UploadMetrics()
         
-        # Create a DataFrame for processing
-        df = pd.read_csv(StringIO(csv_content))
+        # Read CSV content
+        raw_content = file.read()
         
-        # Check required headers
-        required_headers = ['name', 'email', 'skills']
-        missing_headers = [h for h in required_headers if h not in df.columns]
-        if missing_headers:
-            return jsonify({
-                "error": f"CSV is missing required headers: {', '.join(missing_headers)}"
-            }), 400
+        # Identical files for the same position have already been imported
+        content_hash = hashlib.sha256(raw_content).hexdigest()
+        previous_upload = db.get_upload_by_hash(content_hash, position)
+        if previous_upload:
+            return jsonify(duplicate_upload_response(file.filename, position, previous_upload))
         
         # Get the position data for scoring
         position_data = db.get_position_by_title(position)
         if not position_data:
             return jsonify({"error": f"Position '{position}' not found"}), 400
         
-        # Process the CSV data
-        processed_candidates = process_cv_data(df, position_data)
-        
-        # Track processing results
-        successful_records = 0
-        failed_records = 0
-        
-        # Save candidates to database
-        for candidate in processed_candidates:
-            try:
-                db.create_candidate(candidate)
-                successful_records += 1
-            except Exception as e:
-                print(f"Error saving candidate: {e}")
-                failed_records += 1
+        # Parse the file, then score and save it in checkpointed chunks; a
+        # retry of an interrupted upload resumes after its last committed chunk
+        try:
+            total_records, successful_records, failed_records = import_upload(
+                db, file.filename, raw_content, position_data, content_hash, metrics)
+        except (UnsupportedFormatError, InvalidUploadError) as e:
+            return jsonify({"error": str(e)}), 400
+        except UploadInProgressError as e:
+            return jsonify({"error": str(e)}), 409
+        except UploadInterruptedError as e:
+            response = jsonify(interrupted_upload_body(e))
+            response.status_code = 503
+            response.headers['Retry-After'] = str(UPLOAD_RESUME_SECONDS)
+            return response
         
-        # Record the upload
-        upload_data = {
-            "filename": file.filename,
-            "position": position,
-            "processed_at": datetime.now().isoformat(),
-            "total_records": len(processed_candidates),
-            "successful_records": successful_records,
-            "failed_records": failed_records
-        }
-        
-        db.create_upload(upload_data)
-        
-        # Create a notification
-        if successful_records > 0:
-            db.create_notification({
-                "message": f"Processed {successful_records} candidates from {file.filename}",
-                "type": "info",
-                "read": False,
-                "created_at": datetime.now().isoformat()
-            })
-        
-        return jsonify({
-            "success": True,
-            "message": f"Processed {successful_records} candidates successfully. {failed_records} failed.",
-            "totalRecords": len(processed_candidates),
-            "successfulRecords": successful_records,
-            "failedRecords": failed_records
-        })
+        return jsonify(upload_response(total_records, successful_records, failed_records))
         
     except Exception as e:
         print(f"Error processing CSV: {e}")
         traceback.print_exc()
         return jsonify({"error": str(e)}), 500
 
+@api.route('/uploads', methods=['GET'])
+def get_uploads():
+    """Get upload history, newest first, with each run's timings and peak memory"""
+    limit = request.args.get('limit', type=int)
+    return list_response(db.get_all_uploads(limit))
+
 @api.route('/exports', methods=['GET'])
+@admitted(heavy_work)
 def export_data():
     """Export candidates data as CSV"""
     # Get filter parameters
@@ -221,34 +508,105 @@ def export_data():
     
     return response
 
+@api.route('/admission', methods=['GET'])
+def get_admission_status():
+    """Get running and queued heavy operations and how many were turned away"""
+    return jsonify(heavy_work.status())
+
+@api.route('/write-behind', methods=['GET'])
+def get_write_behind_status():
+    """Get the depth and throughput of the write-behind insert queue"""
+    if not db.write_behind:
+        return jsonify({"enabled": False})
+    return jsonify({"enabled": True, **db.write_behind.status()})
+
+@api.route('/replicas', methods=['GET'])
+def get_replicas():
+    """Get the health of the read replicas"""
+    return jsonify(db.replicas.status() if db.replicas else [])
+
 @api.route('/stats', methods=['GET'])
 def get_stats():
     """Get application statistics"""
     # Get data for statistics
-    candidates = db.get_all_candidates()
+    candidates = db.get_all_candidates(summary=True)
     uploads = db.get_all_uploads()
     positions = db.get_active_positions()
     
-    # Calculate statistics
-    shortlisted = [c for c in candidates if c.get('status') == 'shortlisted']
-    
-    # Calculate time saved (rough estimate: 15 minutes per CV)
-    time_saved = len(candidates) * 15
-    hours_saved = time_saved // 60
-    
-    # Build statistics response
-    stats = {
-        "totalCVs": len(candidates),
-        "shortlistedCandidates": len(shortlisted),
-        "activePositions": len(positions),
-        "timeSaved": f"{hours_saved} hrs",
-        "lastUpload": uploads[-1].get('processed_at') if uploads else None
-    }
-    
-    return jsonify(stats)
+    return jsonify(build_stats(candidates, uploads, positions))
+
+@api.route('/reports', methods=['GET'])
+def get_reports():
+    """Get status breakdowns and score distributions per position"""
+    return jsonify(build_reports(db.get_position_stats()))
 
 @api.route('/notifications', methods=['GET'])
 def get_notifications():
-    """Get all notifications"""
-    notifications = db.get_all_notifications()
-    return jsonify(notifications)
\ No newline at end of file
+    """Get notifications, either all of them or only those after a `since` ID cursor"""
+    limit = request.args.get('limit', type=int)
+    since = request.args.get('since', type=int)
+    
+    if since is not None:
+        notifications = db.get_notifications_since(since, limit or 100)
+    else:
+        notifications = db.get_all_notifications(limit)
+    return list_response(notifications)
+
+@api.route('/notifications/unread-count', methods=['GET'])
+def get_unread_notification_count():
+    """Get the number of unread notifications"""
+    return jsonify({"unreadCount": db.get_unread_notification_count()})
+
+@api.route('/notifications/stream', methods=['GET'])
+def stream_notifications():
+    """Push new notifications to the client as Server-Sent Events"""
+    # Browsers resend the last event ID when they reconnect
+    last_id = request.headers.get('Last-Event-ID', type=int)
+    if last_id is None:
+        last_id = request.args.get('since', type=int)
+    
+    def generate():
+        # Subscribe before replaying so nothing created in between is missed
+        subscriber = broker.subscribe()
+        # The event ID is the highest notification ID sent, where a reconnect resumes
+        sent_id = last_id or 0
+        recent = deque()
+        recent_ids = set()
+        
+        def send(notification):
+            nonlocal sent_id
+            if len(recent) == SSE_RECENT_IDS:
+                recent_ids.discard(recent.popleft())
+            recent.append(notification['id'])
+            recent_ids.add(notification['id'])
+            sent_id = max(sent_id, notification['id'])
+            return format_sse(notification, event="notification", event_id=sent_id)
+        
+        try:
+            # Page through the whole gap; live events it already covered are skipped
+            replay_id = sent_id
+            while last_id is not None:
+                page = db.get_notifications_since(replay_id, SSE_REPLAY_PAGE_SIZE)
+                for notification in page:
+                    replay_id = notification['id']
+                    yield send(notification)
+                if len(page) < SSE_REPLAY_PAGE_SIZE:
+                    break
+            
+            while True:
+                try:
+                    notification = subscriber.get(timeout=SSE_HEARTBEAT_SECONDS)
+                except queue.Empty:
+                    yield ": keep-alive\n\n"
+                    continue
+                
+                if notification['id'] in recent_ids:
+                    continue
+                yield send(notification)
+        finally:
+            broker.unsubscribe(subscriber)
+    
+    return Response(stream_with_context(generate()), mimetype='text/event-stream', headers={
+        "Cache-Control": "no-cache",
+        "X-Accel-Buffering": "no"
+    })
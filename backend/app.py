@@ -2,16 +2,12 @@ from flask import Flask
 from flask_cors import CORS
 import os
 from datetime import datetime
-from backend.services.database import Database
-from backend.api_routes import api  # Import our API blueprint
+from backend.api_routes import api, db  # Import our API blueprint and its database
 from dotenv import load_dotenv
 
 # Load environment variables
 load_dotenv()
 
-# Initialize database
-db = Database()
-
 # Initialize the database tables
 def init_db():
     """Initialize the database with tables and default data"""
@@ -0,0 +1,232 @@
+"""
+ASGI entry point for the CV Smart Hire backend.
+
+The read-heavy API routes are served natively on asyncio from an async
+connection pool, and uploads score their chunks in a process pool.
+Every other route falls through to the Flask app, so both serving modes
+expose the same API.
+
+Usage:
+    uvicorn backend.asgi:app --host 0.0.0.0 --port 5001
+    python run.py --asgi
+"""
+
+import asyncio
+import hashlib
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from contextlib import asynccontextmanager
+
+from starlette.applications import Starlette
+from starlette.responses import Response
+from starlette.routing import Mount, Route
+
+try:
+    from a2wsgi import WSGIMiddleware
+except ImportError:
+    from starlette.middleware.wsgi import WSGIMiddleware
+
+from backend import api_routes
+from backend.app import app as flask_app
+from backend.services.admission import Overloaded, admitted
+from backend.services.async_database import AsyncDatabase
+from backend.services.ingest import (import_upload, score_chunk, InvalidUploadError, UploadInProgressError,
+                                     UploadInterruptedError)
+from backend.services.parsers import UnsupportedFormatError
+from backend.services.serialization import JSON_TYPE, choose_encoding, compress, encode_records, negotiate
+from backend.services.upload_metrics import UploadMetrics
+from backend.services.write_behind import close_all as close_write_behind
+
+# Worker processes for scoring upload chunks; 0 scores them in the upload thread
+CPU_WORKERS = int(os.getenv('CPU_WORKERS', os.cpu_count() or 1))
+
+adb = AsyncDatabase(api_routes.db)
+cpu_executor = None
+
+# Threads for running and queued uploads, apart from the default pool the reads use
+heavy_executor = ThreadPoolExecutor(
+    api_routes.heavy_work.max_concurrent + api_routes.heavy_work.max_queued, thread_name_prefix='heavy')
+
+def encoded_response(request, body, media_type, status_code=200):
+    """Build a response, compressed when the client accepts it (as the Flask blueprint does)"""
+    headers = {"Vary": "Accept-Encoding"}
+    if 200 <= status_code < 300:
+        body, encoding = compress(body, choose_encoding(request.headers.get('accept-encoding')))
+        if encoding:
+            headers["Content-Encoding"] = encoding
+    return Response(body, status_code=status_code, media_type=media_type, headers=headers)
+
+def json_response(request, content, status_code=200):
+    """Serialize like Flask's jsonify, so both serving modes return identical bodies"""
+    return encoded_response(request, flask_app.json.dumps(content).encode('utf-8'), JSON_TYPE, status_code)
+
+def list_response(request, records):
+    """Return a list in the format negotiated by the Accept header or ?format= parameter"""
+    media_type = negotiate(request.headers.get('accept'), request.query_params.get('format'))
+    if media_type == JSON_TYPE:
+        return json_response(request, records)
+    response = encoded_response(request, encode_records(records, media_type), media_type)
+    response.headers["Vary"] = "Accept, Accept-Encoding"
+    return response
+
+def query_param(request, name, type):
+    """Read a query parameter, ignoring values that do not convert (like Flask's args.get)"""
+    try:
+        value = request.query_params.get(name)
+        return type(value) if value is not None else None
+    except ValueError:
+        return None
+
+async def get_candidates(request):
+    summary = request.query_params.get('view') == 'summary'
+    skills = request.query_params.get('skills')
+    if skills:
+        return list_response(request, await adb.get_candidates_by_skills(skills.split(','), summary))
+    
+    min_years = query_param(request, 'min_years', float)
+    if min_years is not None:
+        return list_response(request, await adb.get_candidates_by_min_years(min_years, summary))
+    include_archived = request.query_params.get('include_archived') in ('1', 'true')
+    return list_response(request, await adb.get_all_candidates(summary, include_archived))
+
+async def get_candidate(request):
+    include_archived = request.query_params.get('include_archived') in ('1', 'true')
+    candidate = await adb.get_candidate_by_id(request.path_params['id'], include_archived)
+    if not candidate:
+        return json_response(request, {"error": "Candidate not found"}, 404)
+    return json_response(request, candidate)
+
+async def get_positions(request):
+    return list_response(request, await adb.get_all_positions())
+
+async def get_active_positions(request):
+    return list_response(request, await adb.get_active_positions())
+
+async def get_stats(request):
+    if adb.backend == 'thread':
+        # The thread fallback goes through one synchronous connection; don't overlap reads
+        candidates = await adb.get_all_candidates(summary=True)
+        uploads = await adb.get_all_uploads()
+        positions = await adb.get_active_positions()
+    else:
+        candidates, uploads, positions = await asyncio.gather(
+            adb.get_all_candidates(summary=True), adb.get_all_uploads(), adb.get_active_positions())
+    return json_response(request, api_routes.build_stats(candidates, uploads, positions))
+
+async def get_reports(request):
+    return json_response(request, api_routes.build_reports(await adb.get_position_stats()))
+
+async def get_notifications(request):
+    limit = query_param(request, 'limit', int)
+    since = query_param(request, 'since', int)
+    if since is not None:
+        return list_response(request, await adb.get_notifications_since(since, limit or 100))
+    return list_response(request, await adb.get_all_notifications(limit))
+
+async def get_unread_notification_count(request):
+    return json_response(request, {"unreadCount": await adb.get_unread_notification_count()})
+
+def overloaded_response(request, error):
+    response = json_response(request, api_routes.overloaded_body(error), error.status)
+    response.headers['Retry-After'] = str(error.retry_after)
+    return response
+
+def score_in_pool(chunk, position_data):
+    """Score an upload chunk in the process pool, blocking the calling thread"""
+    if cpu_executor is None:
+        return score_chunk(chunk, position_data)
+    return cpu_executor.submit(score_chunk, chunk, position_data).result()
+
+async def upload(request):
+    # Turn the upload away before reading its body if it could not even queue
+    try:
+        api_routes.heavy_work.check()
+    except Overloaded as e:
+        return overloaded_response(request, e)
+
+    form = await request.form()
+    file = form.get('file')
+    position = form.get('position')
+
+    if file is None or not hasattr(file, 'filename'):
+        return json_response(request, {"error": "No file part"}, 400)
+
+    error = api_routes.upload_request_error(file.filename, position)
+    if error:
+        return json_response(request, {"error": error}, 400)
+
+    try:
+        raw_content = await file.read()
+
+        # Identical files for the same position have already been imported
+        content_hash = hashlib.sha256(raw_content).hexdigest()
+        previous_upload = await adb.get_upload_by_hash(content_hash, position)
+        if previous_upload:
+            return json_response(request, api_routes.duplicate_upload_response(
+                file.filename, position, previous_upload))
+
+        position_data = await adb.get_position_by_title(position)
+        if not position_data:
+            return json_response(request, {"error": f"Position '{position}' not found"}, 400)
+
+        # The import waits for an upload/export slot and runs on the heavy
+        # threads, with each chunk scored in the process pool
+        @admitted(api_routes.heavy_work)
+        def run_import():
+            return import_upload(api_routes.db, file.filename, raw_content, position_data, content_hash,
+                                 UploadMetrics(), score_in_pool)
+
+        loop = asyncio.get_running_loop()
+        try:
+            total_records, successful_records, failed_records = await loop.run_in_executor(
+                heavy_executor, run_import)
+        except (UnsupportedFormatError, InvalidUploadError) as e:
+            return json_response(request, {"error": str(e)}, 400)
+        except UploadInProgressError as e:
+            return json_response(request, {"error": str(e)}, 409)
+        except UploadInterruptedError as e:
+            response = json_response(request, api_routes.interrupted_upload_body(e), 503)
+            response.headers['Retry-After'] = str(api_routes.UPLOAD_RESUME_SECONDS)
+            return response
+        except Overloaded as e:
+            return overloaded_response(request, e)
+
+        return json_response(request, api_routes.upload_response(
+            total_records, successful_records, failed_records))
+    except Exception as e:
+        print(f"Error processing upload: {e}")
+        return json_response(request, {"error": str(e)}, 500)
+
+@asynccontextmanager
+async def lifespan(app):
+    global cpu_executor
+    await adb.connect()
+    if CPU_WORKERS > 0:
+        # Spawned workers only import the scoring code, not the app and its connections
+        cpu_executor = ProcessPoolExecutor(CPU_WORKERS, mp_context=multiprocessing.get_context('spawn'))
+    try:
+        yield
+    finally:
+        if cpu_executor is not None:
+            cpu_executor.shutdown(wait=False, cancel_futures=True)
+        # Commit queued notifications before the process exits
+        await asyncio.to_thread(close_write_behind)
+        await adb.close()
+
+app = Starlette(
+    routes=[
+        Route('/api/candidates', get_candidates, methods=['GET']),
+        Route('/api/candidates/{id:int}', get_candidate, methods=['GET']),
+        Route('/api/positions', get_positions, methods=['GET']),
+        Route('/api/active-positions', get_active_positions, methods=['GET']),
+        Route('/api/stats', get_stats, methods=['GET']),
+        Route('/api/reports', get_reports, methods=['GET']),
+        Route('/api/notifications', get_notifications, methods=['GET']),
+        Route('/api/notifications/unread-count', get_unread_notification_count, methods=['GET']),
+        Route('/api/upload', upload, methods=['POST']),
+        # Everything else is served by the Flask blueprint
+        Mount('/', app=WSGIMiddleware(flask_app)),
+    ],
+    lifespan=lifespan,
+)
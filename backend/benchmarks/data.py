@@ -0,0 +1,49 @@
+"""
+Synthetic candidate data shared by the benchmark scripts.
+"""
+
+import random
+from typing import Dict, List
+
+import pandas as pd
+
+SKILL_POOL = [
+    "Python", "SQL", "Flask", "Django", "JavaScript", "TypeScript", "React", "Vue",
+    "HTML", "CSS", "Node.js", "Java", "Kotlin", "Go", "Rust", "C++", "Docker",
+    "Kubernetes", "AWS", "GCP", "Azure", "Machine Learning", "Statistics", "Pandas",
+    "NumPy", "Spark", "Airflow", "PostgreSQL", "MySQL", "Redis", "GraphQL", "REST",
+]
+
+COMPANIES = ["TechCorp", "DataCo", "StartupX", "WebWorks", "CloudNine", "InfoSys", "ByteShop"]
+ROLES = ["Developer", "Senior Developer", "Engineer", "Analyst", "Lead", "Intern"]
+
+def generate_candidate_rows(count: int, seed: int = 42) -> List[Dict[str, str]]:
+    """
+    Generate upload rows in the CSV column layout (name, email, skills, experience)
+    
+    Args:
+        count: Number of rows
+        seed: Random seed, so runs are comparable
+        
+    Returns:
+        List of row dictionaries
+    """
+    rng = random.Random(seed)
+    rows = []
+    for i in range(count):
+        skills = rng.sample(SKILL_POOL, rng.randint(2, 8))
+        experience = ";".join(
+            f"{rng.choice(COMPANIES)}|{rng.choice(ROLES)}|{rng.randint(1, 6)}"
+            for _ in range(rng.randint(0, 3))
+        )
+        rows.append({
+            "name": f"Candidate {i}",
+            "email": f"candidate{i}@example.com",
+            "skills": ",".join(skills),
+            "experience": experience,
+        })
+    return rows
+
+def generate_candidate_frame(count: int, seed: int = 42) -> pd.DataFrame:
+    """Generate upload rows as a DataFrame."""
+    return pd.DataFrame(generate_candidate_rows(count, seed))
@@ -0,0 +1,360 @@
+"""
+Load-test the API with a concurrent mix of readers, uploaders and triage writers.
+
+Starts the Flask app (or the ASGI app with --server asgi) in a subprocess
+against a fresh SQLite file, seeds it with one upload, and then runs the
+workers for a fixed duration:
+- readers poll /api/candidates, /api/stats and /api/notifications
+- uploaders post generated CSV files to /api/upload
+- writers change candidate statuses and notes
+
+Workers are threads with blocking connections, or coroutines on one event
+loop with --client asyncio (requires httpx). The report has throughput,
+latency percentiles and error rates per operation, and the database time
+each response reports in its Server-Timing header. On a shared connection
+database time includes waiting for the connection and for locks. Routes the
+ASGI app serves natively do not report database time. Database methods log
+and swallow their errors, so failures that still return 200 only show up in
+the server log.
+
+--database :memory: runs the server on the in-memory SQLite connection that
+all request threads share, and --database env uses DATABASE_URL or the MySQL
+settings from the environment. --url targets a server that is already
+running. --json writes the results, to compare runs release over release.
+
+Usage:
+    python -m backend.benchmarks.load_test [--readers N] [--uploaders N] [--writers N]
+        [--duration S] [--client thread|asyncio] [--server flask|asgi]
+        [--database PATH|:memory:|env] [--url URL] [--json PATH]
+"""
+
+import argparse
+import asyncio
+import http.client
+import itertools
+import json
+import os
+import random
+import re
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from collections import Counter, defaultdict
+from urllib.parse import urlparse
+from urllib.request import urlopen
+
+from backend.benchmarks.data import generate_candidate_rows
+from backend.services.database import CANDIDATE_STATUSES
+
+ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+POSITION = "Backend Developer"
+
+# Requests a reader picks from, with their relative weights
+READER_MIX = [
+    ("list_candidates", "/api/candidates", 4),
+    ("stats", "/api/stats", 2),
+    ("notifications", "/api/notifications?limit=20", 2),
+    ("unread_count", "/api/notifications/unread-count", 1),
+]
+
+_SERVER_TIMING_DB = re.compile(r"db;dur=([\d.]+)")
+
+def csv_upload(rows, seed):
+    """Build a multipart upload body whose candidates and content hash are new."""
+    prefix = uuid.uuid4().hex[:8]
+    lines = ["name,email,skills,experience"]
+    for row in generate_candidate_rows(rows, seed):
+        lines.append(f'{row["name"]},{prefix}.{row["email"]},"{row["skills"]}",{row["experience"]}')
+    boundary = uuid.uuid4().hex
+    body = (
+        f'--{boundary}\r\nContent-Disposition: form-data; name="position"\r\n\r\n{POSITION}\r\n'
+        f'--{boundary}\r\nContent-Disposition: form-data; name="file"; filename="load-{prefix}.csv"\r\n'
+        f'Content-Type: text/csv\r\n\r\n' + "\n".join(lines) + f'\r\n--{boundary}--\r\n'
+    ).encode("utf-8")
+    return body, f"multipart/form-data; boundary={boundary}"
+
+class Workload:
+    """Picks the next request of each worker role."""
+
+    def __init__(self, upload_rows, candidate_ids):
+        self.upload_rows = upload_rows
+        self.candidate_ids = candidate_ids
+        self._uploads = itertools.count(1)
+        self._reader_ops = [op for op in READER_MIX for _ in range(op[2])]
+
+    def next_request(self, role, rng):
+        """
+        Returns:
+            Tuple of (operation, method, path, body, content type)
+        """
+        if role == "reader":
+            operation, path, _ = rng.choice(self._reader_ops)
+            return operation, "GET", path, None, None
+        if role == "uploader":
+            body, content_type = csv_upload(self.upload_rows, seed=next(self._uploads))
+            return "upload", "POST", "/api/upload", body, content_type
+        candidate_id = rng.choice(self.candidate_ids)
+        if rng.random() < 0.7:
+            payload = {"status": rng.choice(CANDIDATE_STATUSES)}
+            operation, path = "update_status", f"/api/candidates/{candidate_id}/status"
+        else:
+            payload = {"notes": f"Reviewed at {time.time():.0f}"}
+            operation, path = "update_notes", f"/api/candidates/{candidate_id}/notes"
+        return operation, "POST", path, json.dumps(payload).encode("utf-8"), "application/json"
+
+class Results:
+    """Latencies, database times and errors per operation."""
+
+    def __init__(self):
+        self.latencies = defaultdict(list)
+        self.db_times = defaultdict(list)
+        self.errors = defaultdict(Counter)
+        self._lock = threading.Lock()
+
+    def record(self, operation, seconds, status, server_timing=None, error=None):
+        with self._lock:
+            self.latencies[operation].append(seconds)
+            match = _SERVER_TIMING_DB.search(server_timing or "")
+            if match:
+                self.db_times[operation].append(float(match.group(1)) / 1000)
+            if error or not 200 <= status < 300:
+                self.errors[operation][error or f"HTTP {status}"] += 1
+
+    def summary(self, duration):
+        """Per-operation rows, plus a "total" row over every request."""
+        rows = []
+        operations = sorted(self.latencies) + ["total"]
+        for operation in operations:
+            if operation == "total":
+                latencies = sorted(itertools.chain.from_iterable(self.latencies.values()))
+                db_times = list(itertools.chain.from_iterable(self.db_times.values()))
+                errors = sum(sum(counter.values()) for counter in self.errors.values())
+            else:
+                latencies = sorted(self.latencies[operation])
+                db_times = self.db_times[operation]
+                errors = sum(self.errors[operation].values())
+            if not latencies:
+                continue
+            rows.append({
+                "operation": operation,
+                "requests": len(latencies),
+                "throughput": len(latencies) / duration,
+                "error_rate": errors / len(latencies),
+                "p50_ms": percentile(latencies, 50) * 1000,
+                "p95_ms": percentile(latencies, 95) * 1000,
+                "p99_ms": percentile(latencies, 99) * 1000,
+                "max_ms": latencies[-1] * 1000,
+                "db_ms": statistics.mean(db_times) * 1000 if db_times else None,
+                "db_share": sum(db_times) / sum(latencies) if db_times else None,
+            })
+        return rows
+
+def percentile(sorted_values, pct):
+    index = min(len(sorted_values) - 1, max(0, int(round(pct / 100 * len(sorted_values))) - 1))
+    return sorted_values[index]
+
+def run_thread_worker(base_url, role, workload, results, stop, think, seed):
+    rng = random.Random(seed)
+    url = urlparse(base_url)
+    conn = http.client.HTTPConnection(url.hostname, url.port, timeout=120)
+    while not stop.is_set():
+        operation, method, path, body, content_type = workload.next_request(role, rng)
+        headers = {"Content-Type": content_type} if content_type else {}
+        start = time.perf_counter()
+        try:
+            conn.request(method, path, body=body, headers=headers)
+            response = conn.getresponse()
+            response.read()
+            results.record(operation, time.perf_counter() - start, response.status,
+                           response.getheader("Server-Timing"))
+        except (OSError, http.client.HTTPException) as e:
+            results.record(operation, time.perf_counter() - start, 0, error=type(e).__name__)
+            conn.close()
+        if think:
+            time.sleep(think)
+    conn.close()
+
+def run_threads(base_url, roles, workload, results, stop, think):
+    threads = [threading.Thread(target=run_thread_worker,
+                                args=(base_url, role, workload, results, stop, think, i))
+               for i, role in enumerate(roles)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+async def run_async_worker(client, role, workload, results, stop, think, seed):
+    import httpx
+    rng = random.Random(seed)
+    while not stop.is_set():
+        operation, method, path, body, content_type = workload.next_request(role, rng)
+        headers = {"Content-Type": content_type} if content_type else {}
+        start = time.perf_counter()
+        try:
+            response = await client.request(method, path, content=body, headers=headers)
+            results.record(operation, time.perf_counter() - start, response.status_code,
+                           response.headers.get("server-timing"))
+        except httpx.HTTPError as e:
+            results.record(operation, time.perf_counter() - start, 0, error=type(e).__name__)
+        if think:
+            await asyncio.sleep(think)
+
+async def run_asyncio(base_url, roles, workload, results, stop, think):
+    try:
+        import httpx
+    except ImportError:
+        sys.exit("--client asyncio requires httpx (pip install httpx)")
+    limits = httpx.Limits(max_connections=len(roles))
+    async with httpx.AsyncClient(base_url=base_url, timeout=120, limits=limits) as client:
+        await asyncio.gather(*(run_async_worker(client, role, workload, results, stop, think, i)
+                               for i, role in enumerate(roles)))
+
+def watch(process, stop, duration):
+    """Stop the workers after duration seconds, or as soon as the server exits."""
+    deadline = time.monotonic() + duration
+    while time.monotonic() < deadline and not stop.is_set():
+        if process is not None and process.poll() is not None:
+            break
+        time.sleep(0.1)
+    stop.set()
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+def start_server(server, database, log):
+    """
+    Start the app in a subprocess and wait until it answers
+
+    Returns:
+        Tuple of (process, base URL)
+    """
+    port = free_port()
+    env = dict(os.environ)
+    if database != "env":
+        # Point the app at SQLite instead of any configured server database
+        env.pop("DATABASE_URL", None)
+        env.pop("DATABASE_REPLICA_URLS", None)
+        env["SQLITE_PATH"] = database
+    if server == "asgi":
+        command = [sys.executable, "-m", "uvicorn", "backend.asgi:app", "--host", "127.0.0.1",
+                   "--port", str(port), "--log-level", "warning"]
+    else:
+        command = [sys.executable, "-c",
+                   f"from backend.app import app; app.run(host='127.0.0.1', port={port}, threaded=True)"]
+    process = subprocess.Popen(command, cwd=ROOT, env=env, stdout=log, stderr=subprocess.STDOUT)
+    base_url = f"http://127.0.0.1:{port}"
+    deadline = time.monotonic() + 60
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            sys.exit(f"Server exited with code {process.returncode}; see {log.name}")
+        try:
+            with urlopen(f"{base_url}/api/positions", timeout=2):
+                return process, base_url
+        except OSError:
+            time.sleep(0.2)
+    process.terminate()
+    sys.exit(f"Server did not start within 60s; see {log.name}")
+
+def seed(base_url, rows):
+    """Upload an initial batch and return the candidate IDs writers can update."""
+    url = urlparse(base_url)
+    conn = http.client.HTTPConnection(url.hostname, url.port, timeout=600)
+    body, content_type = csv_upload(rows, seed=0)
+    conn.request("POST", "/api/upload", body=body, headers={"Content-Type": content_type})
+    response = conn.getresponse()
+    response.read()
+    if response.status != 200:
+        sys.exit(f"Seed upload failed with HTTP {response.status}")
+    conn.request("GET", "/api/candidates")
+    candidates = json.loads(conn.getresponse().read())
+    conn.close()
+    return [candidate["id"] for candidate in candidates] or [1]
+
+def print_report(rows, results):
+    print(f"{'operation':<18}{'requests':>10}{'req/s':>9}{'errors':>8}{'p50 ms':>9}{'p95 ms':>9}"
+          f"{'p99 ms':>9}{'max ms':>9}{'db ms':>8}{'db %':>7}")
+    for row in rows:
+        db_ms = f"{row['db_ms']:>8.1f}" if row["db_ms"] is not None else f"{'-':>8}"
+        db_share = f"{row['db_share'] * 100:>6.0f}%" if row["db_share"] is not None else f"{'-':>7}"
+        print(f"{row['operation']:<18}{row['requests']:>10,}{row['throughput']:>9.1f}"
+              f"{row['error_rate'] * 100:>7.1f}%{row['p50_ms']:>9.1f}{row['p95_ms']:>9.1f}"
+              f"{row['p99_ms']:>9.1f}{row['max_ms']:>9.0f}{db_ms}{db_share}")
+    errors = Counter()
+    for counter in results.errors.values():
+        errors.update(counter)
+    if errors:
+        print("\nErrors:")
+        for error, count in errors.most_common(10):
+            print(f"  {count:>6,}  {error}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Load-test the API with concurrent readers, uploaders and writers")
+    parser.add_argument("--readers", type=int, default=8)
+    parser.add_argument("--uploaders", type=int, default=1)
+    parser.add_argument("--writers", type=int, default=2)
+    parser.add_argument("--duration", type=float, default=30, help="Seconds to run the mix")
+    parser.add_argument("--think", type=float, default=0, help="Seconds each worker waits between requests")
+    parser.add_argument("--client", choices=("thread", "asyncio"), default="thread")
+    parser.add_argument("--server", choices=("flask", "asgi"), default="flask")
+    parser.add_argument("--database", help="SQLite file, :memory: or env (default: a temporary file)")
+    parser.add_argument("--url", help="Test a running server instead of starting one")
+    parser.add_argument("--seed-rows", type=int, default=2000, help="Candidates uploaded before the run")
+    parser.add_argument("--upload-rows", type=int, default=500, help="Candidates per upload")
+    parser.add_argument("--json", help="Write the results to this file")
+    args = parser.parse_args()
+
+    process = None
+    with tempfile.TemporaryDirectory() as workdir, open(os.path.join(workdir, "server.log"), "w+") as log:
+        if args.url:
+            base_url = args.url.rstrip("/")
+        else:
+            database = args.database or os.path.join(workdir, "load.db")
+            process, base_url = start_server(args.server, database, log)
+            print(f"Started {args.server} server at {base_url} on {database}")
+        try:
+            candidate_ids = seed(base_url, args.seed_rows)
+            print(f"Seeded {len(candidate_ids):,} candidates; running {args.readers} readers, "
+                  f"{args.uploaders} uploaders and {args.writers} writers for {args.duration:.0f}s "
+                  f"({args.client} clients)\n")
+
+            workload = Workload(args.upload_rows, candidate_ids)
+            roles = ["reader"] * args.readers + ["uploader"] * args.uploaders + ["writer"] * args.writers
+            results = Results()
+            stop = threading.Event()
+            watcher = threading.Thread(target=watch, args=(process, stop, args.duration))
+            start = time.perf_counter()
+            watcher.start()
+            if args.client == "asyncio":
+                asyncio.run(run_asyncio(base_url, roles, workload, results, stop, args.think))
+            else:
+                run_threads(base_url, roles, workload, results, stop, args.think)
+            watcher.join()
+            rows = results.summary(time.perf_counter() - start)
+            print_report(rows, results)
+
+            if process is not None and process.poll() is not None:
+                # The server crashing under load is itself a result
+                log.seek(0)
+                tail = log.read().splitlines()[-20:]
+                print(f"\nServer exited with code {process.returncode} during the run. Last log lines:")
+                print("\n".join(f"  {line}" for line in tail))
+        finally:
+            if process is not None:
+                process.terminate()
+                process.wait(timeout=30)
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"config": vars(args), "results": rows}, f, indent=2)
+        print(f"\nWrote {args.json}")
+
+if __name__ == "__main__":
+    main()
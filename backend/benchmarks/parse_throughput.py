@@ -0,0 +1,66 @@
+"""
+Benchmark upload parse throughput per input format and engine.
+
+Usage:
+    python -m backend.benchmarks.parse_throughput [--rows N] [--repeat N]
+"""
+
+import argparse
+import gzip
+import io
+import time
+import zipfile
+
+from backend.benchmarks.data import generate_candidate_frame
+from backend.services.parsers import HAS_PYARROW, parse_upload
+
+def encode_formats(df):
+    """Encode a DataFrame in every supported upload format, keyed by file name."""
+    csv_bytes = df.to_csv(index=False).encode('utf-8')
+    encoded = {
+        "candidates.csv": csv_bytes,
+        "candidates.csv.gz": gzip.compress(csv_bytes),
+        "candidates.jsonl": df.to_json(orient='records', lines=True).encode('utf-8'),
+    }
+    
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, 'w', zipfile.ZIP_DEFLATED) as archive:
+        archive.writestr("candidates.csv", csv_bytes)
+    encoded["candidates.zip"] = buffer.getvalue()
+    
+    if HAS_PYARROW:
+        buffer = io.BytesIO()
+        df.to_parquet(buffer, index=False)
+        encoded["candidates.parquet"] = buffer.getvalue()
+    
+    return encoded
+
+def run(rows, repeat):
+    df = generate_candidate_frame(rows)
+    engines = ["pandas", "pyarrow"] if HAS_PYARROW else ["pandas"]
+    if not HAS_PYARROW:
+        print("pyarrow is not installed: only the pandas engine is measured, Parquet is skipped.\n")
+    
+    print(f"{'format':<22}{'engine':<10}{'size (KB)':>12}{'best (ms)':>12}{'rows/sec':>14}{'MB/sec':>10}")
+    for filename, data in encode_formats(df).items():
+        for engine in engines:
+            timings = []
+            for _ in range(repeat):
+                start = time.perf_counter()
+                parsed = parse_upload(filename, data, engine=engine)
+                timings.append(time.perf_counter() - start)
+            assert len(parsed) == rows, f"{filename} parsed {len(parsed)} rows, expected {rows}"
+            
+            best = min(timings)
+            print(f"{filename:<22}{engine:<10}{len(data) / 1024:>12.1f}{best * 1000:>12.1f}"
+                  f"{rows / best:>14,.0f}{len(data) / best / 1e6:>10.1f}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure upload parse throughput")
+    parser.add_argument("--rows", type=int, default=100000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+    run(args.rows, args.repeat)
+
+if __name__ == "__main__":
+    main()
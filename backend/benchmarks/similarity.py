@@ -0,0 +1,97 @@
+"""
+Benchmark similar-candidate lookups: MinHash/LSH against an exact all-pairs scan.
+
+Recall is measured two ways: the share of true neighbors at or above the
+Jaccard threshold that LSH returns, and the overlap of the LSH top-k with
+the exact top-k.
+
+Usage:
+    python -m backend.benchmarks.similarity [--candidates N] [--queries N] [--k N] [--threshold J]
+"""
+
+import argparse
+import random
+import statistics
+import time
+from collections import defaultdict
+
+from backend.benchmarks.data import generate_candidate_rows
+from backend.services.similarity import estimate_similarity, lsh_buckets, minhash_signature
+from backend.services.skills import normalize_skills
+
+def jaccard(a, b):
+    return len(a & b) / len(a | b) if a or b else 0.0
+
+def build_index(skill_sets):
+    """Compute signatures and an in-memory LSH index, as the database stores them."""
+    signatures = [minhash_signature(skills) for skills in skill_sets]
+    index = defaultdict(list)
+    for candidate_id, signature in enumerate(signatures):
+        if not signature:
+            continue
+        for bucket in lsh_buckets(signature):
+            index[bucket].append(candidate_id)
+    return signatures, index
+
+def lsh_query(candidate_id, signatures, index, k):
+    signature = signatures[candidate_id]
+    neighbors = {other for bucket in lsh_buckets(signature) for other in index[bucket]}
+    neighbors.discard(candidate_id)
+    scores = {other: estimate_similarity(signature, signatures[other]) for other in neighbors}
+    return sorted(scores, key=lambda other: -scores[other])[:k], neighbors
+
+def exact_query(candidate_id, skill_sets, k):
+    query = skill_sets[candidate_id]
+    scores = {other: jaccard(query, skills) for other, skills in enumerate(skill_sets) if other != candidate_id}
+    return sorted(scores, key=lambda other: -scores[other])[:k], scores
+
+def run(count, queries, k, threshold):
+    skill_sets = [set(normalize_skills(row["skills"].split(","))) for row in generate_candidate_rows(count)]
+
+    start = time.perf_counter()
+    signatures, index = build_index(skill_sets)
+    build_seconds = time.perf_counter() - start
+    print(f"Indexed {count:,} candidates in {build_seconds:.2f}s "
+          f"({count / build_seconds:,.0f}/sec, {len(index):,} buckets)\n")
+
+    rng = random.Random(7)
+    lsh_times, exact_times, topk_recall, compared = [], [], [], []
+    found = relevant = 0
+    for candidate_id in rng.sample(range(count), queries):
+        start = time.perf_counter()
+        approximate, neighbors = lsh_query(candidate_id, signatures, index, k)
+        lsh_times.append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        exact, scores = exact_query(candidate_id, skill_sets, k)
+        exact_times.append(time.perf_counter() - start)
+
+        # Ties at the k-th score make any of the tied candidates a correct answer
+        cutoff = scores[exact[-1]] if exact else 1.0
+        topk_recall.append(sum(1 for other in approximate if scores[other] >= cutoff) / max(len(exact), 1))
+        true_neighbors = {other for other, score in scores.items() if score >= threshold}
+        relevant += len(true_neighbors)
+        found += len(true_neighbors & neighbors)
+        compared.append(len(neighbors))
+
+    print(f"{'method':<10}{'p50 (ms)':>10}{'p95 (ms)':>10}{'compared':>12}")
+    for name, timings, sizes in (("lsh", lsh_times, compared), ("exact", exact_times, [count - 1] * queries)):
+        timings = sorted(timings)
+        print(f"{name:<10}{statistics.median(timings) * 1000:>10.2f}"
+              f"{timings[int(len(timings) * 0.95) - 1] * 1000:>10.2f}{statistics.mean(sizes):>12,.0f}")
+
+    print(f"\nRecall of neighbors with Jaccard >= {threshold}: "
+          f"{found / relevant if relevant else 1.0:.3f} ({relevant:,} pairs)")
+    print(f"Top-{k} recall against the exact scan: {statistics.mean(topk_recall):.3f}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure similar-candidate recall and latency")
+    parser.add_argument("--candidates", type=int, default=50000)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--threshold", type=float, default=0.5)
+    args = parser.parse_args()
+    run(args.candidates, args.queries, args.k, args.threshold)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+"""
+Benchmark list response formats: payload size, encode time and client decode time.
+
+Rows are shaped like /api/candidates output. Decoding includes rebuilding
+row objects from the columnar layouts, which is what a client table needs.
+
+Usage:
+    python -m backend.benchmarks.wire_format [--rows N] [--repeat N]
+"""
+
+import argparse
+import gzip
+import io
+import json
+import time
+
+from backend.benchmarks.data import generate_candidate_rows
+from backend.services.cv_processing import derive_candidate_fields, extract_skills, parse_experience
+from backend.services.serialization import (ARROW_TYPE, COLUMNAR_JSON_TYPE, HAS_BROTLI, HAS_MSGPACK,
+                                            HAS_PYARROW, JSON_TYPE, MSGPACK_TYPE, encode_records)
+
+def candidate_records(count):
+    """Build rows with the columns the candidates table returns."""
+    records = []
+    for i, row in enumerate(generate_candidate_rows(count), start=1):
+        candidate = {
+            "id": i,
+            "name": row["name"],
+            "email": row["email"],
+            "position": "Backend Developer",
+            "skills": extract_skills(row["skills"]),
+            "experience": parse_experience(row["experience"]) if row["experience"] else [],
+            "score": 50 + i % 50,
+            "status": "pending",
+            "notes": "",
+            "read": False,
+            "created_at": "2024-06-01 12:00:00",
+        }
+        candidate.update(derive_candidate_fields(candidate))
+        records.append(candidate)
+    return records
+
+def decode(media_type, body):
+    """Decode a body back into a list of row objects."""
+    if media_type == JSON_TYPE:
+        return json.loads(body)
+    if media_type == COLUMNAR_JSON_TYPE:
+        payload = json.loads(body)
+    elif media_type == MSGPACK_TYPE:
+        import msgpack
+        payload = msgpack.unpackb(body)
+    else:
+        import pyarrow as pa
+        table = pa.ipc.open_stream(io.BytesIO(body)).read_all()
+        return table.to_pylist()
+    fields, columns = payload["fields"], payload["columns"]
+    return [dict(zip(fields, values)) for values in zip(*(columns[field] for field in fields))]
+
+def best_of(repeat, fn):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        timings.append(time.perf_counter() - start)
+    return min(timings), result
+
+def run(rows, repeat):
+    records = candidate_records(rows)
+    media_types = [JSON_TYPE, COLUMNAR_JSON_TYPE]
+    if HAS_MSGPACK:
+        media_types.append(MSGPACK_TYPE)
+    if HAS_PYARROW:
+        media_types.append(ARROW_TYPE)
+    skipped = [name for name, available in (("msgpack", HAS_MSGPACK), ("pyarrow", HAS_PYARROW),
+                                            ("brotli", HAS_BROTLI)) if not available]
+    if skipped:
+        print(f"Not installed, skipped: {', '.join(skipped)}\n")
+
+    print(f"{'format':<44}{'raw (MB)':>10}{'gzip (MB)':>11}{'br (MB)':>9}{'encode (ms)':>13}"
+          f"{'decode (ms)':>13}{'gzip vs json':>14}")
+    baseline = None
+    for media_type in media_types:
+        encode_time, body = best_of(repeat, lambda: encode_records(records, media_type))
+        decode_time, decoded = best_of(repeat, lambda: decode(media_type, body))
+        assert len(decoded) == rows
+        gzipped = len(gzip.compress(body, compresslevel=5))
+        if HAS_BROTLI:
+            import brotli
+            brotli_size = f"{len(brotli.compress(body, quality=4)) / 1e6:>9.2f}"
+        else:
+            brotli_size = f"{'-':>9}"
+        if baseline is None:
+            baseline = (len(body), gzipped)
+        print(f"{media_type:<44}{len(body) / 1e6:>10.2f}{gzipped / 1e6:>11.2f}{brotli_size}"
+              f"{encode_time * 1000:>13.0f}{decode_time * 1000:>13.0f}{baseline[1] / gzipped:>13.1f}x")
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure list response sizes and encode/decode times")
+    parser.add_argument("--rows", type=int, default=100000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+    run(args.rows, args.repeat)
+
+if __name__ == "__main__":
+    main()
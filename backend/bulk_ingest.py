@@ -0,0 +1,219 @@
+"""
+Bulk import of candidate files without going through the HTTP API.
+
+Files are parsed and scored in parallel worker processes. A single writer
+thread saves the results in checkpointed chunks and records each file in
+the uploads table. A bounded queue between the two
+stages keeps memory flat when the workers outpace the database. Files
+already imported for their position are skipped, as /api/upload does, and
+a file whose import was interrupted resumes after its last committed chunk.
+
+Each file's position is taken from --position, or from the first --map
+pattern that matches its path. --map takes PATTERN=TITLE, where PATTERN is
+a glob matched against the path and the file name, e.g.
+--map "backend/*=Backend Developer".
+
+Usage:
+    python backend/bulk_ingest.py PATH_OR_GLOB [...] (--position TITLE | --map PATTERN=TITLE [...])
+        [--workers N] [--queue-size N] [--batch-size N] [--force]
+"""
+
+import argparse
+import fnmatch
+import glob
+import hashlib
+import multiprocessing
+import os
+import queue
+import sys
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from datetime import datetime
+
+# Add the parent directory to sys.path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from backend.services import ingest as ingest_service
+from backend.services.ingest import measured_parse_and_score, save_candidates
+from backend.services.parsers import get_parser
+from backend.services.sharding import open_database
+
+# Marks the end of the work queue
+_DONE = object()
+
+def find_files(patterns):
+    """Expand directories and globs into supported files, in a stable order."""
+    files = []
+    for pattern in patterns:
+        if os.path.isdir(pattern):
+            matches = [os.path.join(root, name) for root, _, names in os.walk(pattern) for name in names]
+        else:
+            matches = glob.glob(pattern, recursive=True)
+        files.extend(path for path in matches if os.path.isfile(path) and get_parser(path))
+    return sorted(set(files))
+
+def position_for(path, default, mappings):
+    """Return the position title of a file, or None if nothing maps it."""
+    for pattern, title in mappings:
+        if fnmatch.fnmatch(path, pattern) or fnmatch.fnmatch(os.path.basename(path), pattern):
+            return title
+    return default
+
+def file_hash(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def parse_file(path, position_data):
+    """Read, parse and score one file; runs in a worker process."""
+    with open(path, 'rb') as f:
+        data = f.read()
+    return measured_parse_and_score(os.path.basename(path), data, position_data)
+
+def plan(db, files, default_position, mappings, force):
+    """
+    Resolve each file's position and drop files that cannot or need not be imported
+
+    Returns:
+        List of (path, position data, content hash)
+    """
+    positions = {}
+    jobs = []
+    for path in files:
+        title = position_for(path, default_position, mappings)
+        if not title:
+            print(f"  - Skipping {path}: no position mapped")
+            continue
+        if title not in positions:
+            positions[title] = db.get_position_by_title(title)
+        if not positions[title]:
+            print(f"  - Skipping {path}: position '{title}' not found")
+            continue
+        content_hash = file_hash(path)
+        if not force and db.get_upload_by_hash(content_hash, title):
+            print(f"  - Skipping {path}: already imported for '{title}'")
+            continue
+        jobs.append((path, positions[title], content_hash))
+    return jobs
+
+class Writer(threading.Thread):
+    """Save parsed files from the queue and report progress."""
+
+    def __init__(self, db, work, total_files):
+        super().__init__(name='bulk-ingest-writer')
+        self.db = db
+        self.work = work
+        self.total_files = total_files
+        self.files = self.rows = self.successful = self.failed = 0
+        self.started = time.perf_counter()
+
+    def run(self):
+        while True:
+            item = self.work.get()
+            if item is _DONE:
+                return
+            path, position_data, content_hash, candidates, metrics = item
+            try:
+                successful, failed = save_candidates(
+                    self.db, candidates, os.path.basename(path), position_data['title'], content_hash,
+                    metrics, notify=False)
+            except Exception as e:
+                print(f"  - Failed to save {path}: {e}")
+                successful, failed = 0, len(candidates)
+            self.files += 1
+            self.rows += len(candidates)
+            self.successful += successful
+            self.failed += failed
+            elapsed = time.perf_counter() - self.started
+            print(f"[{self.files}/{self.total_files}] {path}: {successful} saved, {failed} failed "
+                  f"({self.rows:,} rows, {self.rows / elapsed:,.0f} rows/sec)")
+
+def ingest(db, jobs, workers, queue_size):
+    """
+    Parse jobs in worker processes and feed them to the writer thread
+
+    Returns:
+        The finished Writer, with its totals
+    """
+    work = queue.Queue(maxsize=queue_size)
+    writer = Writer(db, work, len(jobs))
+    writer.start()
+
+    # Spawned workers only import the scoring code, not a database connection
+    context = multiprocessing.get_context('spawn')
+    pending = {}
+    remaining = list(reversed(jobs))
+    with ProcessPoolExecutor(workers, mp_context=context) as pool:
+        while remaining or pending:
+            # Parse at most one file per worker ahead of the queue
+            while remaining and len(pending) < workers:
+                job = remaining.pop()
+                pending[pool.submit(parse_file, job[0], job[1])] = job
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                path, position_data, content_hash = pending.pop(future)
+                try:
+                    candidates, metrics = future.result()
+                except Exception as e:
+                    print(f"  - Failed to parse {path}: {e}")
+                    continue
+                # Blocks while the writer is queue_size files behind
+                work.put((path, position_data, content_hash, candidates, metrics))
+
+    work.put(_DONE)
+    writer.join()
+    return writer
+
+def main():
+    parser = argparse.ArgumentParser(description="Import candidate files in parallel without the HTTP API")
+    parser.add_argument("paths", nargs="+", help="Files, directories or glob patterns")
+    parser.add_argument("--position", help="Position title for files not matched by --map")
+    parser.add_argument("--map", action="append", default=[], metavar="PATTERN=TITLE",
+                        help="Position title for files matching a glob pattern; repeatable")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1,
+                        help="Worker processes parsing and scoring files")
+    parser.add_argument("--queue-size", type=int, default=4,
+                        help="Parsed files waiting for the writer before workers pause")
+    parser.add_argument("--batch-size", type=int, default=ingest_service.UPLOAD_CHUNK_ROWS,
+                        help="Rows committed per checkpointed transaction")
+    parser.add_argument("--force", action="store_true", help="Import files that were imported before")
+    args = parser.parse_args()
+
+    mappings = []
+    for mapping in args.map:
+        pattern, separator, title = mapping.partition('=')
+        if not separator or not pattern or not title:
+            parser.error(f"--map expects PATTERN=TITLE, got {mapping!r}")
+        mappings.append((pattern, title))
+    if not args.position and not mappings:
+        parser.error("one of --position or --map is required")
+
+    db = open_database()
+    db.create_tables()
+    ingest_service.UPLOAD_CHUNK_ROWS = max(1, args.batch_size)
+
+    files = find_files(args.paths)
+    print(f"Found {len(files)} files")
+    jobs = plan(db, files, args.position, mappings, args.force)
+    if not jobs:
+        print("Nothing to import.")
+        return
+
+    print(f"Importing {len(jobs)} files with {args.workers} workers...")
+    writer = ingest(db, jobs, max(1, args.workers), max(1, args.queue_size))
+
+    elapsed = time.perf_counter() - writer.started
+    print(f"\nImported {writer.successful:,} candidates from {writer.files} files "
+          f"({writer.failed:,} failed) in {elapsed:.1f}s, {writer.rows / elapsed:,.0f} rows/sec")
+    if writer.successful:
+        db.create_notification({
+            "message": f"Imported {writer.successful} candidates from {writer.files} files",
+            "type": "info",
+            "read": False,
+            "created_at": datetime.now().isoformat()
+        })
+
+if __name__ == "__main__":
+    main()
@@ -7,13 +7,13 @@ import os
 
 # Add the parent directory to sys.path
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
-from backend.services.database import Database
+from backend.services.sharding import open_database
 
 def main():
     print("Initializing CV Smart Hire database...")
     
     # Create database instance
-    db = Database()
+    db = open_database()
     
     # Create tables
     print("Creating database tables...")
@@ -0,0 +1,292 @@
+"""
+Maintenance jobs for the CV Smart Hire database.
+
+Usage:
+    python backend/maintenance.py backfill-derived [--batch-size N]
+    python backend/maintenance.py rebuild-position-stats
+    python backend/maintenance.py prune-notifications [--days N] [--batch-size N]
+    python backend/maintenance.py dedupe-candidates [--batch-size N]
+    python backend/maintenance.py sync-sqlite-replicas
+    python backend/maintenance.py backfill-skills [--batch-size N]
+    python backend/maintenance.py backfill-minhash [--batch-size N]
+    python backend/maintenance.py find-duplicates
+    python backend/maintenance.py snapshot PATH [--format sqlite|pgcopy|parquet]
+    python backend/maintenance.py restore PATH --yes
+    python backend/maintenance.py archive-candidates [--batch-size N]
+    python backend/maintenance.py prune-archive [--keep-years N]
+    python backend/maintenance.py backfill-score-components [--batch-size N]
+"""
+
+import argparse
+import sqlite3
+import sys
+import os
+from datetime import datetime, timedelta
+
+# Add the parent directory to sys.path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from backend.services.cv_processing import calculate_score_components, derive_candidate_fields
+from backend.services.replicas import connection_kwargs, replica_urls_from_env
+from backend.services.sharding import ShardedDatabase, open_database
+from backend.services.snapshots import SNAPSHOT_FORMATS, SnapshotError, create_snapshot, restore_snapshot
+
+def backfill_derived(db, batch_size):
+    """Fill in total_years, skill_count and normalized_skills for existing candidates."""
+    total = 0
+    while True:
+        batch = db.get_candidates_missing_derived(batch_size)
+        if not batch:
+            break
+        
+        rows = []
+        for candidate in batch:
+            fields = derive_candidate_fields(candidate)
+            fields['id'] = candidate['id']
+            rows.append(fields)
+        
+        updated = db.update_derived_columns(rows)
+        if not updated:
+            print("Backfill stopped: a batch could not be written")
+            break
+        total += updated
+        print(f"  - Backfilled {total} candidates")
+    
+    print(f"Backfill complete: {total} candidates updated.")
+    return total
+
+def backfill_score_components(db, batch_size):
+    """Store the component scores of candidates scored before they were kept."""
+    positions = {}
+    total = 0
+    while True:
+        batch = db.get_candidates_missing_components(batch_size)
+        if not batch:
+            break
+        
+        rows = []
+        for candidate in batch:
+            title = candidate['position']
+            if title not in positions:
+                # Candidates of a deleted position are matched against no required skills
+                positions[title] = db.get_position_by_title(title) or {}
+            components = calculate_score_components(candidate, positions[title])
+            components['id'] = candidate['id']
+            rows.append(components)
+        
+        updated = db.update_score_components(rows)
+        if not updated:
+            print("Backfill stopped: a batch could not be written")
+            break
+        total += updated
+        print(f"  - Backfilled {total} candidates")
+    
+    print(f"Backfill complete: {total} candidates updated.")
+    return total
+
+def rebuild_position_stats(db):
+    """Rebuild the position_stats aggregates from scratch."""
+    if db.rebuild_position_stats():
+        print(f"Rebuilt statistics for {len(db.get_position_stats())} positions.")
+        return True
+    print("Failed to rebuild position statistics!")
+    return False
+
+def prune_notifications(db, days, batch_size):
+    """Delete notifications older than the retention period."""
+    cutoff = datetime.now() - timedelta(days=days)
+    deleted = db.prune_notifications(cutoff.isoformat(), batch_size)
+    print(f"Pruned {deleted} notifications older than {days} days.")
+    return deleted
+
+def dedupe_candidates(db, batch_size):
+    """Key candidates that predate deduplication and remove older duplicate rows."""
+    assigned, deleted = db.backfill_dedup_keys(batch_size)
+    print(f"Assigned {assigned} dedup keys, removed {deleted} duplicate candidates.")
+    if deleted:
+        rebuild_position_stats(db)
+    return assigned, deleted
+
+def sync_sqlite_replicas(db):
+    """Copy a file-backed SQLite primary to its replica files, for local replica testing."""
+    if db.dialect.name != 'sqlite' or not db.sqlite_path:
+        print("Replica sync needs a file-backed SQLite primary (SQLITE_PATH)")
+        return 0
+    
+    synced = 0
+    for url in replica_urls_from_env():
+        path = connection_kwargs(url).get('sqlite_path')
+        if not path:
+            print(f"  - Skipping non-SQLite replica {url}")
+            continue
+        replica = sqlite3.connect(path)
+        try:
+            db.conn.backup(replica)
+        finally:
+            replica.close()
+        synced += 1
+        print(f"  - Synced {path}")
+    
+    print(f"Synced {synced} SQLite replicas.")
+    return synced
+
+def backfill_skills(db, batch_size):
+    """Fill in skill IDs and candidate_skills rows for existing candidates and positions."""
+    candidates, positions = db.backfill_skill_ids(batch_size)
+    print(f"Assigned skill IDs to {candidates} candidates and {positions} positions.")
+    return candidates, positions
+
+def backfill_minhash(db, batch_size):
+    """Index existing candidates for similar-candidate lookups."""
+    total = db.backfill_minhash(batch_size)
+    print(f"Indexed {total} candidates for similarity search.")
+    return total
+
+def find_duplicates(db):
+    """Rebuild blocking keys and detect fuzzy duplicates across all candidates."""
+    scanned, pairs = db.rebuild_duplicates()
+    groups = db.get_duplicate_groups()
+    print(f"Scanned {scanned} candidates: {pairs} duplicate pairs in {len(groups)} groups.")
+    return groups
+
+def snapshot(db, path, format):
+    """Dump the application tables to a snapshot file or directory."""
+    try:
+        manifest = create_snapshot(db, path, format)
+    except (SnapshotError, OSError) as e:
+        print(f"Snapshot failed: {e}")
+        return None
+    rows = sum(table['rows'] for table in manifest['tables'].values())
+    print(f"Wrote {manifest['format']} snapshot of {rows:,} rows to {path}.")
+    return manifest
+
+def restore(db, path):
+    """Replace the application tables with a snapshot."""
+    try:
+        manifest = restore_snapshot(db, path)
+    except (SnapshotError, OSError) as e:
+        print(f"Restore failed: {e}")
+        return None
+    rows = sum(table['rows'] for table in manifest['tables'].values())
+    print(f"Restored {manifest['format']} snapshot of {rows:,} rows from {path}.")
+    return manifest
+
+def archive_candidates(db, batch_size):
+    """Move candidates of positions that are no longer active to the archive."""
+    active = [position['title'] for position in db.get_active_positions()]
+    if not active:
+        # Also what a failed position lookup returns; never archive everything on it
+        print("No active positions found; nothing archived.")
+        return 0
+    archived = db.archive_candidates(active, batch_size)
+    print(f"Archived {archived} candidates of inactive positions.")
+    return archived
+
+def prune_archive(db, keep_years):
+    """Drop archive partitions older than the retention period."""
+    before_year = datetime.now().year - keep_years + 1
+    dropped = db.drop_archive_partitions(before_year)
+    print(f"Dropped {len(dropped)} archive partitions from before {before_year}"
+          + (f": {', '.join(dropped)}." if dropped else "."))
+    return dropped
+
+def main():
+    parser = argparse.ArgumentParser(description="CV Smart Hire maintenance jobs")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    
+    backfill = subparsers.add_parser("backfill-derived",
+                                     help="Compute derived candidate columns for existing rows")
+    backfill.add_argument("--batch-size", type=int, default=500)
+    
+    subparsers.add_parser("rebuild-position-stats",
+                          help="Recompute per-position aggregates from the candidates table")
+    
+    prune = subparsers.add_parser("prune-notifications",
+                                  help="Delete notifications past the retention period")
+    prune.add_argument("--days", type=int,
+                       default=int(os.getenv('NOTIFICATION_RETENTION_DAYS', 30)))
+    prune.add_argument("--batch-size", type=int, default=1000)
+    
+    dedupe = subparsers.add_parser("dedupe-candidates",
+                                   help="Assign dedup keys to existing candidates and drop duplicates")
+    dedupe.add_argument("--batch-size", type=int, default=500)
+    
+    subparsers.add_parser("sync-sqlite-replicas",
+                          help="Copy the SQLite primary to the DATABASE_REPLICA_URLS files")
+    
+    skills = subparsers.add_parser("backfill-skills",
+                                   help="Build skill IDs and the candidate_skills table for existing rows")
+    skills.add_argument("--batch-size", type=int, default=500)
+    
+    minhash = subparsers.add_parser("backfill-minhash",
+                                    help="Compute MinHash signatures and LSH buckets for existing candidates")
+    minhash.add_argument("--batch-size", type=int, default=500)
+    
+    subparsers.add_parser("find-duplicates",
+                          help="Full pass of fuzzy duplicate detection over all candidates")
+    
+    snapshot_parser = subparsers.add_parser("snapshot",
+                                            help="Dump the application tables for a later restore")
+    snapshot_parser.add_argument("path", help="File for the sqlite format, directory for the others")
+    snapshot_parser.add_argument("--format", choices=SNAPSHOT_FORMATS,
+                                 help="Defaults to sqlite on SQLite, pgcopy on PostgreSQL, else parquet")
+    
+    restore_parser = subparsers.add_parser("restore",
+                                           help="Replace the application tables with a snapshot")
+    restore_parser.add_argument("path", help="Snapshot file or directory")
+    restore_parser.add_argument("--yes", action="store_true",
+                                help="Confirm that the current contents may be overwritten")
+    
+    archive = subparsers.add_parser("archive-candidates",
+                                    help="Move candidates of inactive positions to the yearly archive partitions")
+    archive.add_argument("--batch-size", type=int, default=500)
+    
+    prune_archive_parser = subparsers.add_parser("prune-archive",
+                                                 help="Drop archive partitions past the retention period")
+    prune_archive_parser.add_argument("--keep-years", type=int,
+                                      default=int(os.getenv('ARCHIVE_RETENTION_YEARS', 5)),
+                                      help="Years kept, the current one included")
+    
+    components = subparsers.add_parser("backfill-score-components",
+                                       help="Store the skill and experience scores of existing candidates")
+    components.add_argument("--batch-size", type=int, default=500)
+    
+    args = parser.parse_args()
+    if args.command == "restore" and not args.yes:
+        parser.error("restore overwrites the database; pass --yes to confirm")
+    
+    db = open_database()
+    if isinstance(db, ShardedDatabase) and args.command in ("sync-sqlite-replicas", "snapshot", "restore"):
+        parser.error(f"{args.command} works on one database at a time; unset DATABASE_SHARD_URLS and point "
+                     "DATABASE_URL or SQLITE_PATH at each shard in turn")
+    # Makes sure the derived columns exist before they are filled in
+    db.create_tables()
+    
+    if args.command == "backfill-derived":
+        backfill_derived(db, args.batch_size)
+    elif args.command == "rebuild-position-stats":
+        rebuild_position_stats(db)
+    elif args.command == "prune-notifications":
+        prune_notifications(db, args.days, args.batch_size)
+    elif args.command == "dedupe-candidates":
+        dedupe_candidates(db, args.batch_size)
+    elif args.command == "sync-sqlite-replicas":
+        sync_sqlite_replicas(db)
+    elif args.command == "backfill-skills":
+        backfill_skills(db, args.batch_size)
+    elif args.command == "backfill-minhash":
+        backfill_minhash(db, args.batch_size)
+    elif args.command == "find-duplicates":
+        find_duplicates(db)
+    elif args.command == "snapshot":
+        snapshot(db, args.path, args.format)
+    elif args.command == "restore":
+        restore(db, args.path)
+    elif args.command == "archive-candidates":
+        archive_candidates(db, args.batch_size)
+    elif args.command == "prune-archive":
+        prune_archive(db, max(1, args.keep_years))
+    elif args.command == "backfill-score-components":
+        backfill_score_components(db, args.batch_size)
+
+if __name__ == "__main__":
+    main()
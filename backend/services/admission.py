@@ -0,0 +1,154 @@
+"""
+Admission Control Service
+
+This module caps how many heavy operations (uploads, exports) run at once,
+so a burst of them cannot exhaust memory or starve the cheap read endpoints.
+Up to HEAVY_MAX_CONCURRENT operations run; up to HEAVY_MAX_QUEUED more wait
+for a slot, in arrival order, for at most HEAVY_QUEUE_TIMEOUT seconds.
+Beyond that, requests are turned away with an Overloaded error carrying a
+Retry-After estimate:
+- 429 when the wait queue is full
+- 503 when a queued request timed out waiting
+
+Waiting requests hold a server thread. With a fixed-size thread pool (e.g.
+gunicorn --threads N), keep HEAVY_MAX_CONCURRENT + HEAVY_MAX_QUEUED below N
+so the remaining threads stay free for reads.
+"""
+
+import functools
+import math
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Any, Dict, Optional
+
+HEAVY_MAX_CONCURRENT = int(os.getenv('HEAVY_MAX_CONCURRENT', 2))
+HEAVY_MAX_QUEUED = int(os.getenv('HEAVY_MAX_QUEUED', 4))
+HEAVY_QUEUE_TIMEOUT = float(os.getenv('HEAVY_QUEUE_TIMEOUT', 30))
+
+# Weight of the latest run in the moving average of operation time
+_DURATION_SMOOTHING = 0.2
+
+class Overloaded(Exception):
+    """Raised when a heavy operation is not admitted."""
+
+    def __init__(self, message: str, status: int, retry_after: int):
+        super().__init__(message)
+        self.status = status
+        self.retry_after = retry_after
+
+class ResourceGovernor:
+    """Limit concurrent operations of one kind, with a bounded FIFO wait queue."""
+
+    def __init__(self, name: str, max_concurrent: int = HEAVY_MAX_CONCURRENT,
+                 max_queued: int = HEAVY_MAX_QUEUED, queue_timeout: float = HEAVY_QUEUE_TIMEOUT):
+        self.name = name
+        self.max_concurrent = max(1, max_concurrent)
+        self.max_queued = max(0, max_queued)
+        self.queue_timeout = queue_timeout
+        self.running = 0
+        self._waiters = deque()
+        self._lock = threading.Lock()
+        self._average_seconds: Optional[float] = None
+        self._counts = {"admitted": 0, "rejected": 0, "timedOut": 0}
+
+    def check(self) -> None:
+        """
+        Turn a request away early if it would not even be queued
+
+        Raises:
+            Overloaded: The queue is full (429)
+        """
+        with self._lock:
+            if self.running >= self.max_concurrent and len(self._waiters) >= self.max_queued:
+                self._counts["rejected"] += 1
+                raise Overloaded(f"Too many {self.name} operations in progress", 429, self._retry_after())
+
+    def acquire(self) -> float:
+        """
+        Wait for a slot
+
+        Returns:
+            Start time to pass to release
+
+        Raises:
+            Overloaded: The queue is full (429) or the wait timed out (503)
+        """
+        with self._lock:
+            if self.running < self.max_concurrent and not self._waiters:
+                self.running += 1
+                return self._admitted()
+            if len(self._waiters) >= self.max_queued:
+                self._counts["rejected"] += 1
+                raise Overloaded(f"Too many {self.name} operations in progress", 429, self._retry_after())
+            waiter = threading.Event()
+            self._waiters.append(waiter)
+
+        # release counts the slot as running before it wakes a waiter
+        if waiter.wait(self.queue_timeout):
+            with self._lock:
+                return self._admitted()
+        with self._lock:
+            if waiter.is_set():
+                # The slot was handed over just as the wait timed out
+                return self._admitted()
+            self._waiters.remove(waiter)
+            self._counts["timedOut"] += 1
+            raise Overloaded(f"Timed out waiting for a {self.name} slot", 503, self._retry_after())
+
+    def release(self, started: float) -> None:
+        """Free a slot taken by acquire and hand it to the longest-waiting request."""
+        seconds = time.monotonic() - started
+        with self._lock:
+            self.running -= 1
+            if self._average_seconds is None:
+                self._average_seconds = seconds
+            else:
+                self._average_seconds += _DURATION_SMOOTHING * (seconds - self._average_seconds)
+            if self._waiters:
+                # Count the slot as taken now, so a new arrival cannot claim it first
+                self.running += 1
+                self._waiters.popleft().set()
+
+    @contextmanager
+    def admit(self):
+        """Run the enclosed block in a slot."""
+        started = self.acquire()
+        try:
+            yield
+        finally:
+            self.release(started)
+
+    def _admitted(self) -> float:
+        self._counts["admitted"] += 1
+        return time.monotonic()
+
+    def _retry_after(self) -> int:
+        """Seconds until a slot is likely free, from the average operation time."""
+        average = self._average_seconds if self._average_seconds is not None else self.queue_timeout
+        backlog = (self.running + len(self._waiters)) / self.max_concurrent
+        return max(1, min(int(math.ceil(average * backlog)), 300))
+
+    def status(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "name": self.name,
+                "running": self.running,
+                "queued": len(self._waiters),
+                "maxConcurrent": self.max_concurrent,
+                "maxQueued": self.max_queued,
+                "averageSeconds": round(self._average_seconds, 3) if self._average_seconds is not None else None,
+                **self._counts,
+            }
+
+def admitted(governor: ResourceGovernor):
+    """Decorator running each call of a function in a slot of governor."""
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with governor.admit():
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorator
@@ -0,0 +1,215 @@
+"""
+Async Database Service
+
+This module provides the read path used by the ASGI app (backend/asgi.py).
+PostgreSQL is read through an asyncpg connection pool, which also caches
+prepared statements per connection, and file-backed SQLite through a small
+pool of aiosqlite connections. Other backends (MySQL, in-memory SQLite,
+sharded databases) run the synchronous Database methods in a thread pool
+instead.
+"""
+
+import asyncio
+import os
+from contextlib import asynccontextmanager
+from typing import Any, Dict, List, Optional
+
+from backend.services.database import Database
+from backend.services.dialects import SQLITE, number_placeholders
+from backend.services.sharding import ShardedDatabase
+from backend.services.skills import normalize_skills
+
+# Connections per async pool
+ASYNC_POOL_SIZE = int(os.getenv('ASYNC_DB_POOL_SIZE', 10))
+
+class AiosqlitePool:
+    """Fixed-size pool of aiosqlite connections to one database file."""
+
+    def __init__(self, path: str, size: int, pragmas=()):
+        self.path = path
+        self.size = size
+        self.pragmas = pragmas
+        self._connections: asyncio.Queue = asyncio.Queue()
+
+    async def open(self) -> None:
+        import aiosqlite
+        for _ in range(self.size):
+            conn = await aiosqlite.connect(self.path)
+            conn.row_factory = aiosqlite.Row
+            for name, value in self.pragmas:
+                await conn.execute(f"PRAGMA {name} = {value}")
+            self._connections.put_nowait(conn)
+
+    @asynccontextmanager
+    async def acquire(self):
+        conn = await self._connections.get()
+        try:
+            yield conn
+        finally:
+            self._connections.put_nowait(conn)
+
+    async def close(self) -> None:
+        while not self._connections.empty():
+            conn = self._connections.get_nowait()
+            await conn.close()
+
+class AsyncDatabase:
+    """
+    Async counterpart of the Database read methods
+
+    Args:
+        sync_db: The Database used by the Flask routes; its configuration
+                 selects the async driver, and it serves the thread fallback
+    """
+
+    def __init__(self, sync_db: Database):
+        self.sync_db = sync_db
+        self.backend = None
+        self._pool = None
+
+    async def connect(self) -> None:
+        """Open the connection pool for the configured backend."""
+        if isinstance(self.sync_db, ShardedDatabase):
+            # Scatter-gather reads need the sharded methods
+            self.backend = 'thread'
+        elif self.sync_db.dialect.name == 'postgres':
+            import asyncpg
+            self._pool = await asyncpg.create_pool(self.sync_db.db_url, min_size=1, max_size=ASYNC_POOL_SIZE)
+            self.backend = 'asyncpg'
+        elif self.sync_db.dialect.name == 'sqlite' and self.sync_db.sqlite_path:
+            self._pool = AiosqlitePool(self.sync_db.sqlite_path, ASYNC_POOL_SIZE, Database.SQLITE_PRAGMAS)
+            await self._pool.open()
+            self.backend = 'aiosqlite'
+        else:
+            self.backend = 'thread'
+        print(f"Async database using {self.backend}")
+
+    async def close(self) -> None:
+        if self._pool is not None:
+            await self._pool.close()
+            self._pool = None
+
+    async def fetch_all(self, sql: str, params: tuple = (), convert: bool = True) -> List[Dict[str, Any]]:
+        """Run a query written with %s placeholders and return rows, with JSON fields parsed if convert is set."""
+        if self.backend == 'asyncpg':
+            async with self._pool.acquire() as conn:
+                rows = await conn.fetch(number_placeholders(sql), *params)
+        else:
+            async with self._pool.acquire() as conn:
+                async with conn.execute(SQLITE.compile(sql), params) as cursor:
+                    rows = await cursor.fetchall()
+        if not convert:
+            return [dict(row) for row in rows]
+        return [Database._convert_from_db_row(row) for row in rows]
+
+    async def fetch_one(self, sql: str, params: tuple = ()) -> Optional[Dict[str, Any]]:
+        rows = await self.fetch_all(sql, params)
+        return rows[0] if rows else None
+
+    async def fetch_candidates(self, sql: str, params: tuple = (), summary: bool = False) -> List[Dict[str, Any]]:
+        """Run a candidate query; full rows are converted like Database's, without its internal columns."""
+        rows = await self.fetch_all(sql, params, convert=False)
+        if summary:
+            return rows
+        return [Database._convert_candidate_row(row) for row in rows]
+
+    @staticmethod
+    def _candidate_columns(summary: bool) -> str:
+        return ", ".join(Database.CANDIDATE_SUMMARY_COLUMNS) if summary else "*"
+
+    async def _call_sync(self, method: str, *args):
+        """Run a synchronous Database method in the default thread pool."""
+        return await asyncio.to_thread(getattr(self.sync_db, method), *args)
+
+    # Candidate operations
+    async def get_all_candidates(self, summary=False, include_archived=False):
+        # The archive's partitions are looked up and merged by the synchronous code
+        if self.backend == 'thread' or include_archived:
+            return await self._call_sync('get_all_candidates', summary, include_archived)
+        return await self.fetch_candidates(
+            f"SELECT {self._candidate_columns(summary)} FROM candidates ORDER BY {Database.SCORE_ORDER}",
+            summary=summary)
+
+    async def get_candidate_by_id(self, id, include_archived=False):
+        if self.backend == 'thread' or include_archived:
+            return await self._call_sync('get_candidate_by_id', id, include_archived)
+        rows = await self.fetch_candidates("SELECT * FROM candidates WHERE id = %s", (id,))
+        return rows[0] if rows else None
+
+    async def get_archived_candidates(self, position=None, created_from=None, created_to=None, summary=False):
+        return await self._call_sync('get_archived_candidates', position, created_from, created_to, summary)
+
+    async def get_candidates_by_min_years(self, min_years, summary=False):
+        if self.backend == 'thread':
+            return await self._call_sync('get_candidates_by_min_years', min_years, summary)
+        return await self.fetch_candidates(
+            f"SELECT {self._candidate_columns(summary)} FROM candidates WHERE total_years >= %s "
+            f"ORDER BY {Database.SCORE_ORDER}", (min_years,), summary)
+
+    async def get_candidates_by_skills(self, skills, summary=False):
+        if self.backend == 'thread':
+            return await self._call_sync('get_candidates_by_skills', skills, summary)
+        names = sorted(set(normalize_skills(skills)))
+        if not names:
+            return await self.get_all_candidates(summary)
+        placeholders = ", ".join(["%s"] * len(names))
+        return await self.fetch_candidates(
+            f"SELECT {self._candidate_columns(summary)} FROM candidates WHERE id IN ("
+            "SELECT cs.candidate_id FROM candidate_skills cs JOIN skills s ON s.id = cs.skill_id "
+            f"WHERE s.name IN ({placeholders}) GROUP BY cs.candidate_id HAVING COUNT(*) = %s"
+            f") ORDER BY {Database.SCORE_ORDER}", (*names, len(names)), summary)
+
+    # Position operations
+    async def get_all_positions(self):
+        if self.backend == 'thread':
+            return await self._call_sync('get_all_positions')
+        return await self.fetch_all("SELECT * FROM positions")
+
+    async def get_active_positions(self):
+        if self.backend == 'thread':
+            return await self._call_sync('get_active_positions')
+        return await self.fetch_all("SELECT * FROM positions WHERE status = 'active'")
+
+    async def get_position_by_title(self, title):
+        if self.backend == 'thread':
+            return await self._call_sync('get_position_by_title', title)
+        return await self.fetch_one("SELECT * FROM positions WHERE title = %s", (title,))
+
+    async def get_position_stats(self):
+        if self.backend == 'thread':
+            return await self._call_sync('get_position_stats')
+        return await self.fetch_all("SELECT * FROM position_stats ORDER BY position")
+
+    # Upload operations
+    async def get_all_uploads(self):
+        if self.backend == 'thread':
+            return await self._call_sync('get_all_uploads')
+        return await self.fetch_all("SELECT * FROM uploads ORDER BY processed_at DESC")
+
+    async def get_upload_by_hash(self, content_hash, position):
+        if self.backend == 'thread':
+            return await self._call_sync('get_upload_by_hash', content_hash, position)
+        return await self.fetch_one(
+            "SELECT * FROM uploads WHERE content_hash = %s AND position = %s "
+            "AND (status IS NULL OR status = 'completed') ORDER BY id DESC LIMIT 1",
+            (content_hash, position))
+
+    # Notification operations
+    async def get_all_notifications(self, limit=None):
+        if self.backend == 'thread':
+            return await self._call_sync('get_all_notifications', limit)
+        if limit:
+            return await self.fetch_all("SELECT * FROM notifications ORDER BY created_at DESC LIMIT %s", (limit,))
+        return await self.fetch_all("SELECT * FROM notifications ORDER BY created_at DESC")
+
+    async def get_notifications_since(self, since_id, limit=100):
+        if self.backend == 'thread':
+            return await self._call_sync('get_notifications_since', since_id, limit)
+        return await self.fetch_all(
+            "SELECT * FROM notifications WHERE id > %s ORDER BY id LIMIT %s", (since_id, limit))
+
+    async def get_unread_notification_count(self):
+        if self.backend == 'thread':
+            return await self._call_sync('get_unread_notification_count')
+        row = await self.fetch_one("SELECT COUNT(*) AS count FROM notifications WHERE read = %s", (False,))
+        return row['count']
@@ -10,6 +10,11 @@ import pandas as pd
 import re
 import json
 from typing import Dict, List, Any, Optional, Union
+from backend.services.skills import SkillDictionary, normalize_skills
+from backend.services.similarity import minhash_signature
+
+# Process-local skill IDs used for matching; persisted IDs live in the skills table
+SKILL_DICTIONARY = SkillDictionary()
 
 def extract_skills(text: str) -> Dict[str, float]:
     """
@@ -62,30 +67,67 @@ def parse_experience(experience_text: str) -> List[Dict[str, str]]:
     
     return experience_list
 
-def calculate_experience_score(experience: List[Dict[str, str]]) -> int:
+# Matches the first number in a free-text duration such as "3", "3.5 years" or "5+ yrs"
+YEARS_PATTERN = re.compile(r'\d+(?:\.\d+)?')
+
+def parse_years(years_text: Any) -> float:
     """
-    Calculate a score based on the candidate's experience
+    Parse a free-text experience duration into a number of years
+    
+    Args:
+        years_text: Duration text, e.g. "3", "3.5 years" or "5+ years"
+        
+    Returns:
+        Number of years, or 0.0 if no number could be found
+    """
+    if years_text is None:
+        return 0.0
+    
+    match = YEARS_PATTERN.search(str(years_text))
+    return float(match.group()) if match else 0.0
+
+def calculate_total_years(experience: List[Dict[str, str]]) -> float:
+    """
+    Sum the years across all experience entries
     
     Args:
         experience: List of experience entries
         
     Returns:
-        Score from 0-100
+        Total years of experience
     """
     if not experience:
-        return 70  # Default score for no experience
+        return 0.0
     
-    # Basic calculation based on years of experience
-    total_years = 0
-    for exp in experience:
-        try:
-            # Try to parse years as a number (handles formats like "3" or "3.5")
-            years_text = exp.get('years', '').replace('years', '').replace('year', '').strip()
-            total_years += float(years_text)
-        except (ValueError, TypeError):
-            # If we can't parse it, just skip
-            pass
+    return sum(parse_years(exp.get('years')) for exp in experience)
+
+def derive_candidate_fields(candidate: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Compute the derived columns persisted alongside a candidate
     
+    Args:
+        candidate: A candidate dict with skills and experience
+        
+    Returns:
+        Dictionary with total_years, skill_count and normalized_skills
+    """
+    normalized = normalize_skills(candidate.get('skills'))
+    return {
+        'total_years': round(calculate_total_years(candidate.get('experience')), 2),
+        'skill_count': len(normalized),
+        'normalized_skills': normalized
+    }
+
+def score_total_years(total_years: float) -> int:
+    """
+    Convert a total number of years of experience into a score
+    
+    Args:
+        total_years: Total years of experience
+        
+    Returns:
+        Score from 70-100
+    """
     # Score based on total years, capped at 100
     # 0-2 years: 70-80, 2-5 years: 80-90, 5+ years: 90-100
     if total_years < 2:
@@ -95,6 +137,27 @@ def calculate_experience_score(experience: List[Dict[str, str]]) -> int:
     else:
         return min(90 + int((total_years - 5) * 2), 100)
 
+def calculate_experience_score(experience: List[Dict[str, str]],
+                               total_years: Optional[float] = None) -> int:
+    """
+    Calculate a score based on the candidate's experience
+    
+    Args:
+        experience: List of experience entries
+        total_years: Precomputed total years (e.g. the stored total_years column),
+                     used instead of re-parsing the entries when given
+        
+    Returns:
+        Score from 0-100
+    """
+    if not experience:
+        return 70  # Default score for no experience
+    
+    if total_years is None:
+        total_years = calculate_total_years(experience)
+    
+    return score_total_years(total_years)
+
 def calculate_skill_match(candidate_skills: Dict[str, float], 
                          required_skills: List[str]) -> int:
     """
@@ -113,17 +176,12 @@ def calculate_skill_match(candidate_skills: Dict[str, float],
     if not candidate_skills:
         return 50  # No skills, poor match
     
-    # Count matches and calculate average score of matching skills
-    matches = 0
-    total_score = 0
-    
-    for skill in required_skills:
-        skill_lower = skill.lower()
-        for candidate_skill, score in candidate_skills.items():
-            if skill_lower in candidate_skill.lower():
-                matches += 1
-                total_score += score
-                break
+    # Count matches and sum the scores of matching skills. A required skill
+    # matches any candidate skill containing it; with skill names mapped to
+    # bitsets this is a bitwise AND and popcount rather than string scans.
+    candidate_ids = SKILL_DICTIONARY.ids(candidate_skills)
+    profile = SKILL_DICTIONARY.profile(required_skills)
+    matches, total_score = SKILL_DICTIONARY.match(candidate_ids, list(candidate_skills.values()), profile)
     
     # Calculate percentage of required skills matched
     match_percentage = matches / len(required_skills) * 100
@@ -137,32 +195,75 @@ def calculate_skill_match(candidate_skills: Dict[str, float],
     # Ensure score is in the range 0-100
     return max(0, min(100, final_score))
 
-def calculate_match_score(candidate: Dict[str, Any], 
-                         position: Dict[str, Any]) -> int:
+# Component scores stored with each candidate, and their default weights in
+# the match score. Positions may override the weights (score_weights).
+SCORE_COMPONENTS = ('skill_score', 'experience_score')
+SCORE_WEIGHTS = {'skill_score': 0.7, 'experience_score': 0.3}
+
+def calculate_score_components(candidate: Dict[str, Any],
+                               position: Dict[str, Any]) -> Dict[str, int]:
     """
-    Calculate an overall match score between a candidate and a position
+    Calculate the component scores a match score is combined from
     
     Args:
         candidate: A candidate dict with skills and experience
         position: A position dict with title and required_skills
         
     Returns:
-        A score from 0-100
+        Dictionary with skill_score and experience_score, each from 0-100
     """
     # Get the required skills
     required_skills = position.get('required_skills', [])
     
-    # Calculate skill match score
-    skill_score = calculate_skill_match(candidate.get('skills', {}), required_skills)
-    
-    # Calculate experience score
-    exp_score = calculate_experience_score(candidate.get('experience', []))
+    return {
+        'skill_score': calculate_skill_match(candidate.get('skills', {}), required_skills),
+        # Reuse the derived total when it is available
+        'experience_score': calculate_experience_score(candidate.get('experience', []),
+                                                       candidate.get('total_years'))
+    }
+
+def position_score_weights(position: Dict[str, Any]) -> Dict[str, float]:
+    """Weights of the score components for a position, falling back to SCORE_WEIGHTS."""
+    weights = position.get('score_weights') or {}
+    return {component: float(weights.get(component, SCORE_WEIGHTS[component])) for component in SCORE_COMPONENTS}
+
+def combine_score_components(components: Dict[str, int],
+                             weights: Optional[Dict[str, float]] = None) -> int:
+    """
+    Combine component scores into a match score
     
-    # Weighted combination: 70% skills, 30% experience
-    final_score = int(0.7 * skill_score + 0.3 * exp_score)
+    Args:
+        components: Output of calculate_score_components
+        weights: Weight per component, defaults to SCORE_WEIGHTS
+        
+    Returns:
+        A score from 0-100
+    """
+    weights = weights or SCORE_WEIGHTS
+    # Summed in SCORE_COMPONENTS order, so vectorized re-weighting rounds the same way
+    final_score = 0.0
+    for component in SCORE_COMPONENTS:
+        final_score += weights[component] * components[component]
     
     # Ensure score is in the range 0-100
-    return max(0, min(100, final_score))
+    return max(0, min(100, int(final_score)))
+
+def calculate_match_score(candidate: Dict[str, Any], 
+                         position: Dict[str, Any]) -> int:
+    """
+    Calculate an overall match score between a candidate and a position
+    
+    Args:
+        candidate: A candidate dict with skills and experience
+        position: A position dict with title and required_skills
+        
+    Returns:
+        A score from 0-100
+    """
+    components = calculate_score_components(candidate, position)
+    
+    # Weighted combination, 70% skills and 30% experience by default
+    return combine_score_components(components, position_score_weights(position))
 
 def determine_status(score: int) -> str:
     """
@@ -195,6 +296,7 @@ def process_cv_data(csv_data: pd.DataFrame, position_data: Dict[str, Any]) -> Li
         List of processed candidate dictionaries with scores and status
     """
     candidates = []
+    weights = position_score_weights(position_data)
     
     for _, row in csv_data.iterrows():
         try:
@@ -216,8 +318,16 @@ def process_cv_data(csv_data: pd.DataFrame, position_data: Dict[str, Any]) -> Li
                 'notes': ''
             }
             
-            # Calculate match score
-            score = calculate_match_score(candidate, position_data)
+            # Materialize derived columns so they are computed once at ingest
+            candidate.update(derive_candidate_fields(candidate))
+            
+            # Signature for similar-candidate lookups
+            candidate['minhash'] = minhash_signature(candidate['normalized_skills'])
+            
+            # Calculate match score, keeping its components for re-weighting
+            components = calculate_score_components(candidate, position_data)
+            candidate.update(components)
+            score = combine_score_components(components, weights)
             candidate['score'] = score
             
             # Determine status based on score
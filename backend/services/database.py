@@ -1,22 +1,245 @@
+import heapq
 import json
 import os
+import sqlite3
+import threading
+import time
 from datetime import datetime
 from dotenv import load_dotenv
+from backend.services.dialects import POSTGRES, MYSQL, SQLITE
+from backend.services.notifications import broker
+from backend.services.skills import SkillDictionary, normalize_skills
+from backend.services.similarity import estimate_similarity, lsh_buckets, minhash_signature
+from backend.services.dedup import blocking_keys, cluster_pairs, find_duplicate_pairs, MAX_BLOCK_SIZE
+from backend.services.request_timing import timed_db_call
+from backend.services.write_behind import WRITE_BEHIND_ENABLED, WriteBehindBuffer, WriteBehindUnavailable
+from backend.services.replicas import (ReplicaSet, connection_kwargs, pin_primary, replica_error,
+                                       read_only, replica_urls_from_env)
 
 # Load environment variables
 load_dotenv()
 
+# Candidate statuses tracked individually in position_stats
+CANDIDATE_STATUSES = ('pending', 'shortlisted', 'review', 'rejected')
+
+def candidate_dedup_key(email, position):
+    """Build the normalized (email, position) key that identifies a candidate application."""
+    email = str(email or '').strip().lower()
+    position = ' '.join(str(position or '').lower().split())
+    return f"{email}|{position}"
+
+# Number of equal-width score histogram buckets in position_stats (0-9, 10-19, ..., 90-100)
+SCORE_BUCKETS = 10
+
+class _SharedConnection:
+    """
+    A SQLite connection shared by every thread, as the in-memory fallback is.
+    
+    Each thread works through a cursor of its own. A thread holds the
+    connection from the statement that opens its transaction until it
+    commits or rolls back, so threads never end or see each other's
+    transactions; other statements and fetches hold it while they run. A
+    statement that fails rolls its transaction back and lets go.
+    """
+    
+    def __init__(self, conn):
+        self._conn = conn
+        self._lock = threading.RLock()
+        self._local = threading.local()
+    
+    def _run(self, fn, *args):
+        self._lock.acquire()
+        try:
+            result = fn(*args)
+        except Exception:
+            # A failed statement ends the thread's transaction, so a caller
+            # that does not roll back cannot hold the other threads off
+            try:
+                if self._conn.in_transaction:
+                    self._conn.rollback()
+            finally:
+                self._release_hold()
+                self._lock.release()
+            raise
+        if self._conn.in_transaction and not getattr(self._local, 'holding', False):
+            # Keep this acquisition until the transaction ends
+            self._local.holding = True
+        else:
+            self._lock.release()
+        return result
+    
+    def _release_hold(self):
+        if getattr(self._local, 'holding', False):
+            self._local.holding = False
+            self._lock.release()
+    
+    def _end(self, fn):
+        self._lock.acquire()
+        try:
+            fn()
+        finally:
+            self._lock.release()
+            if not self._conn.in_transaction:
+                self._release_hold()
+    
+    def commit(self):
+        self._end(self._conn.commit)
+    
+    def rollback(self):
+        self._end(self._conn.rollback)
+    
+    def cursor(self):
+        return _SharedCursor(self._conn.cursor(), self)
+    
+    def __getattr__(self, name):
+        # in_transaction, backup
+        return getattr(self._conn, name)
+
+class _SharedCursor:
+    """A thread's cursor on a _SharedConnection."""
+    
+    def __init__(self, cursor, connection):
+        self._cursor = cursor
+        self._connection = connection
+    
+    def execute(self, sql, params=()):
+        self._connection._run(self._cursor.execute, sql, params)
+        return self
+    
+    def executemany(self, sql, seq_of_params):
+        self._connection._run(self._cursor.executemany, sql, seq_of_params)
+        return self
+    
+    def fetchone(self):
+        return self._connection._run(self._cursor.fetchone)
+    
+    def fetchmany(self, size=None):
+        if size is None:
+            return self._connection._run(self._cursor.fetchmany)
+        return self._connection._run(self._cursor.fetchmany, size)
+    
+    def fetchall(self):
+        return self._connection._run(self._cursor.fetchall)
+    
+    def __getattr__(self, name):
+        # description, rowcount, lastrowid
+        return getattr(self._cursor, name)
+
 class Database:
-    def __init__(self):
+    # Statements kept by the SQLite driver's per-connection cache
+    STATEMENT_CACHE_SIZE = 256
+    
+    # Pragmas applied to every file-backed SQLite connection. WAL lets readers
+    # run alongside the single writer, and synchronous=NORMAL is still
+    # crash-safe in WAL mode while skipping an fsync per commit.
+    SQLITE_PRAGMAS = (
+        ('journal_mode', 'WAL'),
+        ('synchronous', 'NORMAL'),
+        ('mmap_size', int(os.getenv('SQLITE_MMAP_SIZE', 256 * 1024 * 1024))),
+        ('cache_size', -int(os.getenv('SQLITE_CACHE_KB', 64 * 1024))),
+        ('temp_store', 'MEMORY'),
+        ('busy_timeout', int(os.getenv('SQLITE_BUSY_TIMEOUT_MS', 5000))),
+    )
+    
+    # Rows written per transaction by the batched write methods
+    WRITE_BATCH_SIZE = int(os.getenv('DB_WRITE_BATCH_SIZE', 500))
+    
+    # Columns added after the initial schema, with their type per dialect.
+    # create_tables adds any that are missing from existing tables.
+    ADDED_COLUMNS = {
+        'candidates': [
+            ('total_years', {'postgres': 'REAL', 'mysql': 'FLOAT', 'sqlite': 'REAL'}),
+            ('skill_count', {'postgres': 'INTEGER', 'mysql': 'INT', 'sqlite': 'INTEGER'}),
+            ('normalized_skills', {'postgres': 'JSONB', 'mysql': 'JSON', 'sqlite': 'TEXT'}),
+            ('dedup_key', {'postgres': 'VARCHAR(512)', 'mysql': 'VARCHAR(512)', 'sqlite': 'TEXT'}),
+            ('skill_ids', {'postgres': 'JSONB', 'mysql': 'JSON', 'sqlite': 'TEXT'}),
+            ('skill_score', {'postgres': 'INTEGER', 'mysql': 'INT', 'sqlite': 'INTEGER'}),
+            ('experience_score', {'postgres': 'INTEGER', 'mysql': 'INT', 'sqlite': 'INTEGER'}),
+        ],
+        'positions': [
+            ('required_skill_ids', {'postgres': 'JSONB', 'mysql': 'JSON', 'sqlite': 'TEXT'}),
+            ('score_weights', {'postgres': 'JSONB', 'mysql': 'JSON', 'sqlite': 'TEXT'}),
+        ],
+        'uploads': [
+            ('content_hash', {'postgres': 'CHAR(64)', 'mysql': 'CHAR(64)', 'sqlite': 'TEXT'}),
+            ('wall_seconds', {'postgres': 'REAL', 'mysql': 'FLOAT', 'sqlite': 'REAL'}),
+            ('parse_seconds', {'postgres': 'REAL', 'mysql': 'FLOAT', 'sqlite': 'REAL'}),
+            ('score_seconds', {'postgres': 'REAL', 'mysql': 'FLOAT', 'sqlite': 'REAL'}),
+            ('persist_seconds', {'postgres': 'REAL', 'mysql': 'FLOAT', 'sqlite': 'REAL'}),
+            ('rows_per_second', {'postgres': 'REAL', 'mysql': 'FLOAT', 'sqlite': 'REAL'}),
+            ('peak_memory_bytes', {'postgres': 'BIGINT', 'mysql': 'BIGINT', 'sqlite': 'INTEGER'}),
+            ('status', {'postgres': 'VARCHAR(20)', 'mysql': 'VARCHAR(20)', 'sqlite': 'TEXT'}),
+            ('committed_rows', {'postgres': 'INTEGER', 'mysql': 'INT', 'sqlite': 'INTEGER'}),
+            ('chunks_committed', {'postgres': 'INTEGER', 'mysql': 'INT', 'sqlite': 'INTEGER'}),
+            ('claimed_at', {'postgres': 'DOUBLE PRECISION', 'mysql': 'DOUBLE', 'sqlite': 'REAL'}),
+        ],
+    }
+    
+    # Seconds an upload's claim outlives its last committed chunk; a claim
+    # this old is taken to belong to a request that died and can be taken over
+    UPLOAD_CLAIM_SECONDS = float(os.getenv('UPLOAD_CLAIM_SECONDS', 300))
+    
+    # Most LSH bucket-mates compared by one similar-candidates lookup
+    MAX_SIMILARITY_CANDIDATES = int(os.getenv('MAX_SIMILARITY_CANDIDATES', 2000))
+    
+    # Secondary indexes as (name, table, columns, unique)
+    INDEXES = [
+        ('idx_candidates_dedup_key', 'candidates', ('dedup_key',), True),
+        ('idx_uploads_content_hash', 'uploads', ('content_hash', 'position'), False),
+        ('idx_candidates_total_years', 'candidates', ('total_years',), False),
+        ('idx_candidates_skill_count', 'candidates', ('skill_count',), False),
+        # Covers get_score_components, so what-if rankings skip the wide candidate rows
+        ('idx_candidates_score_components', 'candidates',
+         ('position', 'score', 'skill_score', 'experience_score', 'id'), False),
+        ('idx_notifications_read', 'notifications', ('read',), False),
+        ('idx_notifications_created_at', 'notifications', ('created_at',), False),
+        ('idx_candidate_skills_skill_id', 'candidate_skills', ('skill_id',), False),
+        ('idx_candidate_lsh_candidate_id', 'candidate_lsh', ('candidate_id',), False),
+        ('idx_candidate_blocks_candidate_id', 'candidate_blocks', ('candidate_id',), False),
+        ('idx_duplicate_pairs_duplicate_id', 'duplicate_pairs', ('duplicate_id',), False),
+    ]
+    
+    def __init__(self, db_url=None, sqlite_path=None, mysql_config=None, replica_urls=None, write_behind=None,
+                 memory_fallback=True):
+        """
+        Connect to the primary database and any read replicas.
+        
+        Without arguments the backend is configured from the environment.
+        
+        Args:
+            db_url: PostgreSQL DSN
+            sqlite_path: SQLite database file
+            mysql_config: MySQL connector arguments
+            replica_urls: Read replica URLs; defaults to DATABASE_REPLICA_URLS.
+                          Pass () for a database that is itself a replica.
+            write_behind: Queue notifications and upload records for batched
+                          commits; defaults to WRITE_BEHIND
+            memory_fallback: Fall back to in-memory SQLite when the database
+                             cannot be reached; without it conn is left None
+        """
+        explicit = db_url or sqlite_path or mysql_config
+        # Replicas have no replicas of their own and never fall back to in-memory SQLite
+        self.is_replica = replica_urls == ()
+        self.memory_fallback = memory_fallback and not self.is_replica
         # Handle the case where we have a DATABASE_URL (like on Replit)
-        db_url = os.getenv('DATABASE_URL')
+        if not explicit:
+            db_url = os.getenv('DATABASE_URL')
+        # File-backed SQLite, used instead of MySQL when set
+        self.sqlite_path = sqlite_path if explicit else os.getenv('SQLITE_PATH')
+        # File-backed SQLite opens one connection per thread
+        self._local = threading.local()
+        self._per_thread = False
+        # In-memory SQLite shares one connection between the threads
+        self._shared = False
         if db_url:
             # For PostgreSQL in Replit
             self.use_postgres = True
             self.db_url = db_url
+        elif self.sqlite_path:
+            self.use_postgres = False
         else:
             # MySQL configuration if no PostgreSQL URL is available
-            self.config = {
+            self.config = mysql_config or {
                 'host': os.getenv('DB_HOST', 'localhost'),
                 'user': os.getenv('DB_USER', 'root'),
                 'password': os.getenv('DB_PASSWORD', ''),
@@ -24,17 +247,59 @@ class Database:
             }
             self.use_postgres = False
         
+        # Persisted skill IDs already read from the skills table
+        self.skill_dictionary = SkillDictionary()
+        
         # Create connection
+        self.replicas = None
         self.create_connection()
+        
+        # Read replicas serve the read_only methods
+        if replica_urls is None:
+            replica_urls = replica_urls_from_env()
+        if replica_urls:
+            self.replicas = ReplicaSet([Database(replica_urls=(), **connection_kwargs(url))
+                                        for url in replica_urls])
+            print(f"Routing reads to {len(self.replicas)} replica(s)")
+        
+        # The writer needs a connection of its own, which an in-memory database cannot have
+        if write_behind is None:
+            write_behind = WRITE_BEHIND_ENABLED
+        self.write_behind = None
+        if write_behind and not self.is_replica and self._connection_kwargs():
+            self.write_behind = WriteBehindBuffer(self._open_writer)
+    
+    def _connection_kwargs(self):
+        """Constructor arguments for another connection to this database, or None if it is in memory."""
+        if self.use_postgres:
+            return {'db_url': self.db_url}
+        if self.sqlite_path:
+            return {'sqlite_path': self.sqlite_path}
+        if self.dialect is MYSQL:
+            return {'mysql_config': self.config}
+        return None
+    
+    def _open_writer(self):
+        """Open the write-behind buffer's connection, raising if the database cannot be reached."""
+        writer = Database(replica_urls=[], write_behind=False, memory_fallback=False, **self._connection_kwargs())
+        if writer.conn is None:
+            raise ConnectionError("Could not connect the write-behind writer")
+        return writer
     
     def create_connection(self):
         """Create a database connection."""
+        # Server-side prepared statements belong to the connection
+        self._prepared = set()
         try:
             if self.use_postgres:
                 import psycopg2
                 import psycopg2.extras
                 self.conn = psycopg2.connect(self.db_url)
                 self.cursor = self.conn.cursor(cursor_factory=psycopg2.extras.RealDictCursor)
+                self.dialect = POSTGRES
+                return True
+            elif self.sqlite_path:
+                self._connect_sqlite(self.sqlite_path)
                 return True
             else:
                 # MySQL connection - only used if PostgreSQL is not available
@@ -42,28 +307,163 @@ class Database:
                     import mysql.connector
                     self.conn = mysql.connector.connect(**self.config)
                     self.cursor = self.conn.cursor(dictionary=True)
+                    self.dialect = MYSQL
                     return True
                 except ImportError:
                     print("MySQL connector not available, falling back to SQLite")
                     raise Exception("MySQL connector not available")
         except Exception as e:
             print(f"Error connecting to database: {e}")
+            if not self.memory_fallback:
+                # An empty in-memory database would serve wrong results (or, for
+                # a write-behind writer, swallow the rows); ping reports the
+                # database as down and retries the connection
+                self.conn = self.cursor = None
+                self.dialect = None
+                return False
             # If all else fails, create an in-memory SQLite database as fallback
-            import sqlite3
-            self.conn = sqlite3.connect(':memory:')
-            self.conn.row_factory = sqlite3.Row
-            self.cursor = self.conn.cursor()
+            self.sqlite_path = None
+            self._connect_sqlite(':memory:')
             self.use_postgres = False
-            self.use_sqlite = True
             print("Using SQLite in-memory database as fallback")
             return False
     
+    def _connect_sqlite(self, path):
+        """Open a SQLite connection for the request threads."""
+        self._per_thread = False
+        self._shared = False
+        self.conn = self._open_sqlite(path, check_same_thread=False)
+        self.cursor = self.conn.cursor()
+        self.dialect = SQLITE
+        self._local = threading.local()
+        if path != ':memory:':
+            # Each thread gets its own connection to the file, opened on first use
+            self._per_thread = True
+            self._local.conn, self._local.cursor = self.conn, self.cursor
+        else:
+            # An in-memory database exists on this one connection only, so the
+            # threads take turns on it, each through a cursor of its own
+            self._shared = True
+            self.conn = _SharedConnection(self.conn)
+            self.cursor = self._local.cursor = self.conn.cursor()
+    
+    def _open_sqlite(self, path, check_same_thread=True):
+        """Connect to a SQLite database, tuned with SQLITE_PRAGMAS when file-backed."""
+        if self.is_replica:
+            # Replicas are read-only and must already exist
+            conn = sqlite3.connect(f"file:{path}?mode=ro", uri=True, cached_statements=self.STATEMENT_CACHE_SIZE,
+                                   check_same_thread=check_same_thread)
+        else:
+            conn = sqlite3.connect(path, cached_statements=self.STATEMENT_CACHE_SIZE,
+                                   check_same_thread=check_same_thread)
+        conn.row_factory = sqlite3.Row
+        if path != ':memory:':
+            for name, value in self.SQLITE_PRAGMAS:
+                if self.is_replica and name == 'journal_mode':
+                    # Changing the journal mode needs write access; the primary sets it
+                    continue
+                conn.execute(f"PRAGMA {name} = {value}")
+        return conn
+    
+    def _thread_connection(self):
+        """Return the calling thread's SQLite connection and cursor, opening them if needed."""
+        if getattr(self._local, 'conn', None) is None:
+            conn = self._open_sqlite(self.sqlite_path)
+            self._local.conn, self._local.cursor = conn, conn.cursor()
+        return self._local.conn, self._local.cursor
+    
+    @property
+    def conn(self):
+        if self._per_thread:
+            return self._thread_connection()[0]
+        return self._conn
+    
+    @conn.setter
+    def conn(self, value):
+        self._conn = value
+    
+    @property
+    def cursor(self):
+        if self._per_thread:
+            return self._thread_connection()[1]
+        if self._shared:
+            if getattr(self._local, 'cursor', None) is None:
+                self._local.cursor = self._conn.cursor()
+            return self._local.cursor
+        return self._cursor
+    
+    @cursor.setter
+    def cursor(self, value):
+        self._cursor = value
+    
+    def _execute(self, sql, params=(), prepare=False):
+        """
+        Run a query written with %s placeholders on the active backend.
+        
+        Args:
+            sql: Query text
+            params: Query parameters
+            prepare: Run hot queries as server-side prepared statements where the
+                     driver supports it, so repeated calls skip parse and plan
+        """
+        if self.replicas and not sql.lstrip()[:6].upper() == 'SELECT':
+            # Keep this context's reads on the primary so it sees its own write
+            pin_primary()
+        with timed_db_call():
+            try:
+                if prepare and self.dialect.supports_prepared_statements:
+                    name, prepare_sql, count = self.dialect.prepare(sql)
+                    if name not in self._prepared:
+                        self.cursor.execute(prepare_sql)
+                        self._prepared.add(name)
+                    self.cursor.execute(self.dialect.execute_prepared(name, count), tuple(params))
+                else:
+                    self.cursor.execute(self.dialect.compile(sql), tuple(params))
+            except Exception as e:
+                if self.is_replica:
+                    # Lets read_only retry on the primary after the method handles the error
+                    replica_error.set(e)
+                raise
+        return self.cursor
+    
+    def _executemany(self, sql, seq_of_params):
+        """Run a query written with %s placeholders once per parameter tuple."""
+        if self.replicas:
+            pin_primary()
+        with timed_db_call():
+            self.cursor.executemany(self.dialect.compile(sql), seq_of_params)
+        return self.cursor
+    
+    def ping(self):
+        """Check that the connection answers queries, reconnecting first if it was lost."""
+        try:
+            if self.conn is None and not self.create_connection():
+                return False
+            self._execute("SELECT 1")
+            self.cursor.fetchall()
+            return True
+        except Exception as e:
+            print(f"Database health check failed: {e}")
+            try:
+                self.create_connection()
+            except Exception:
+                pass
+            return False
+    
+    def _insert(self, table, data, prepare=False):
+        """Insert a row on the current transaction and return its ID."""
+        query = self.dialect.insert(table, tuple(data.keys()), returning='id')
+        self._execute(query, tuple(data.values()), prepare=prepare)
+        if self.dialect.supports_returning:
+            return self.cursor.fetchone()['id']
+        return self.cursor.lastrowid
+    
     def create_tables(self):
         """Create the necessary tables if they don't exist."""
         try:
             # Create candidates table
-            if self.use_postgres:
-                self.cursor.execute("""
+            if self.dialect.name == 'postgres':
+                self._execute("""
                     CREATE TABLE IF NOT EXISTS candidates (
                         id SERIAL PRIMARY KEY,
                         name VARCHAR(255) NOT NULL,
@@ -74,12 +474,16 @@ class Database:
                         score INTEGER,
                         status VARCHAR(50) DEFAULT 'pending',
                         notes TEXT,
+                        total_years REAL,
+                        skill_count INTEGER,
+                        normalized_skills JSONB,
+                        dedup_key VARCHAR(512),
                         created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
                     )
                 """)
                 
                 # Create positions table
-                self.cursor.execute("""
+                self._execute("""
                     CREATE TABLE IF NOT EXISTS positions (
                         id SERIAL PRIMARY KEY,
                         title VARCHAR(255) NOT NULL,
@@ -91,7 +495,7 @@ class Database:
                 """)
                 
                 # Create uploads table
-                self.cursor.execute("""
+                self._execute("""
                     CREATE TABLE IF NOT EXISTS uploads (
                         id SERIAL PRIMARY KEY,
                         filename VARCHAR(255) NOT NULL,
@@ -99,12 +503,13 @@ class Database:
                         processed_at TIMESTAMP,
                         total_records INTEGER,
                         successful_records INTEGER,
-                        failed_records INTEGER
+                        failed_records INTEGER,
+                        content_hash CHAR(64)
                     )
                 """)
                 
                 # Create notifications table
-                self.cursor.execute("""
+                self._execute("""
                     CREATE TABLE IF NOT EXISTS notifications (
                         id SERIAL PRIMARY KEY,
                         message TEXT NOT NULL,
@@ -113,9 +518,84 @@ class Database:
                         created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
                     )
                 """)
-            elif hasattr(self, 'use_sqlite') and self.use_sqlite:
+                
+                # Create per-position aggregates, maintained alongside candidate writes
+                self._execute("""
+                    CREATE TABLE IF NOT EXISTS position_stats (
+                        position VARCHAR(255) PRIMARY KEY,
+                        total_candidates INTEGER NOT NULL DEFAULT 0,
+                        pending_count INTEGER NOT NULL DEFAULT 0,
+                        shortlisted_count INTEGER NOT NULL DEFAULT 0,
+                        review_count INTEGER NOT NULL DEFAULT 0,
+                        rejected_count INTEGER NOT NULL DEFAULT 0,
+                        score_total BIGINT NOT NULL DEFAULT 0,
+                        scored_count INTEGER NOT NULL DEFAULT 0,
+                        score_bucket_0 INTEGER NOT NULL DEFAULT 0,
+                        score_bucket_1 INTEGER NOT NULL DEFAULT 0,
+                        score_bucket_2 INTEGER NOT NULL DEFAULT 0,
+                        score_bucket_3 INTEGER NOT NULL DEFAULT 0,
+                        score_bucket_4 INTEGER NOT NULL DEFAULT 0,
+                        score_bucket_5 INTEGER NOT NULL DEFAULT 0,
+                        score_bucket_6 INTEGER NOT NULL DEFAULT 0,
+                        score_bucket_7 INTEGER NOT NULL DEFAULT 0,
+                        score_bucket_8 INTEGER NOT NULL DEFAULT 0,
+                        score_bucket_9 INTEGER NOT NULL DEFAULT 0
+                    )
+                """)
+
+                # Create the global skill dictionary and the candidate/skill join table
+                self._execute("""
+                    CREATE TABLE IF NOT EXISTS skills (
+                        id SERIAL PRIMARY KEY,
+                        name VARCHAR(255) NOT NULL UNIQUE
+                    )
+                """)
+                
+                self._execute("""
+                    CREATE TABLE IF NOT EXISTS candidate_skills (
+                        candidate_id INTEGER NOT NULL,
+                        skill_id INTEGER NOT NULL,
+                        PRIMARY KEY (candidate_id, skill_id)
+                    )
+                """)
+
+                # Create MinHash signatures and the LSH band index for similar-candidate lookups
+                self._execute("""
+                    CREATE TABLE IF NOT EXISTS candidate_minhash (
+                        candidate_id INTEGER PRIMARY KEY,
+                        signature JSONB NOT NULL
+                    )
+                """)
+                
+                self._execute("""
+                    CREATE TABLE IF NOT EXISTS candidate_lsh (
+                        band SMALLINT NOT NULL,
+                        bucket BIGINT NOT NULL,
+                        candidate_id INTEGER NOT NULL,
+                        PRIMARY KEY (band, bucket, candidate_id)
+                    )
+                """)
+
+                # Create blocking keys and detected pairs for fuzzy duplicate detection
+                self._execute("""
+                    CREATE TABLE IF NOT EXISTS candidate_blocks (
+                        block_key VARCHAR(255) NOT NULL,
+                        candidate_id INTEGER NOT NULL,
+                        PRIMARY KEY (block_key, candidate_id)
+                    )
+                """)
+                
+                self._execute("""
+                    CREATE TABLE IF NOT EXISTS duplicate_pairs (
+                        candidate_id INTEGER NOT NULL,
+                        duplicate_id INTEGER NOT NULL,
+                        score REAL NOT NULL,
+                        PRIMARY KEY (candidate_id, duplicate_id)
+                    )
+                """)
+            elif self.dialect.name == 'sqlite':
                 # SQLite version
-                self.cursor.execute("""
+                self._execute("""
                     CREATE TABLE IF NOT EXISTS candidates (
                         id INTEGER PRIMARY KEY AUTOINCREMENT,
                         name TEXT NOT NULL,
@@ -126,11 +606,15 @@ class Database:
                         score INTEGER,
                         status TEXT DEFAULT 'pending',
                         notes TEXT,
+                        total_years REAL,
+                        skill_count INTEGER,
+                        normalized_skills TEXT,
+                        dedup_key TEXT,
                         created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
                     )
                 """)
                 
-                self.cursor.execute("""
+                self._execute("""
                     CREATE TABLE IF NOT EXISTS positions (
                         id INTEGER PRIMARY KEY AUTOINCREMENT,
                         title TEXT NOT NULL,
@@ -141,7 +625,7 @@ class Database:
                     )
                 """)
                 
-                self.cursor.execute("""
+                self._execute("""
                     CREATE TABLE IF NOT EXISTS uploads (
                         id INTEGER PRIMARY KEY AUTOINCREMENT,
                         filename TEXT NOT NULL,
@@ -149,11 +633,12 @@ class Database:
                         processed_at TIMESTAMP,
                         total_records INTEGER,
                         successful_records INTEGER,
-                        failed_records INTEGER
+                        failed_records INTEGER,
+                        content_hash TEXT
                     )
                 """)
                 
-                self.cursor.execute("""
+                self._execute("""
                     CREATE TABLE IF NOT EXISTS notifications (
                         id INTEGER PRIMARY KEY AUTOINCREMENT,
                         message TEXT NOT NULL,
@@ -162,9 +647,80 @@ class Database:
                         created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
                     )
                 """)
+                
+                self._execute("""
+                    CREATE TABLE IF NOT EXISTS position_stats (
+                        position TEXT PRIMARY KEY,
+                        total_candidates INTEGER NOT NULL DEFAULT 0,
+                        pending_count INTEGER NOT NULL DEFAULT 0,
+                        shortlisted_count INTEGER NOT NULL DEFAULT 0,
+                        review_count INTEGER NOT NULL DEFAULT 0,
+                        rejected_count INTEGER NOT NULL DEFAULT 0,
+                        score_total INTEGER NOT NULL DEFAULT 0,
+                        scored_count INTEGER NOT NULL DEFAULT 0,
+                        score_bucket_0 INTEGER NOT NULL DEFAULT 0,
+                        score_bucket_1 INTEGER NOT NULL DEFAULT 0,
+                        score_bucket_2 INTEGER NOT NULL DEFAULT 0,
+                        score_bucket_3 INTEGER NOT NULL DEFAULT 0,
+                        score_bucket_4 INTEGER NOT NULL DEFAULT 0,
+                        score_bucket_5 INTEGER NOT NULL DEFAULT 0,
+                        score_bucket_6 INTEGER NOT NULL DEFAULT 0,
+                        score_bucket_7 INTEGER NOT NULL DEFAULT 0,
+                        score_bucket_8 INTEGER NOT NULL DEFAULT 0,
+                        score_bucket_9 INTEGER NOT NULL DEFAULT 0
+                    )
+                """)
+
+                self._execute("""
+                    CREATE TABLE IF NOT EXISTS skills (
+                        id INTEGER PRIMARY KEY AUTOINCREMENT,
+                        name TEXT NOT NULL UNIQUE
+                    )
+                """)
+                
+                self._execute("""
+                    CREATE TABLE IF NOT EXISTS candidate_skills (
+                        candidate_id INTEGER NOT NULL,
+                        skill_id INTEGER NOT NULL,
+                        PRIMARY KEY (candidate_id, skill_id)
+                    )
+                """)
+
+                self._execute("""
+                    CREATE TABLE IF NOT EXISTS candidate_minhash (
+                        candidate_id INTEGER PRIMARY KEY,
+                        signature TEXT NOT NULL
+                    )
+                """)
+                
+                self._execute("""
+                    CREATE TABLE IF NOT EXISTS candidate_lsh (
+                        band INTEGER NOT NULL,
+                        bucket INTEGER NOT NULL,
+                        candidate_id INTEGER NOT NULL,
+                        PRIMARY KEY (band, bucket, candidate_id)
+                    )
+                """)
+
+                self._execute("""
+                    CREATE TABLE IF NOT EXISTS candidate_blocks (
+                        block_key TEXT NOT NULL,
+                        candidate_id INTEGER NOT NULL,
+                        PRIMARY KEY (block_key, candidate_id)
+                    )
+                """)
+                
+                self._execute("""
+                    CREATE TABLE IF NOT EXISTS duplicate_pairs (
+                        candidate_id INTEGER NOT NULL,
+                        duplicate_id INTEGER NOT NULL,
+                        score REAL NOT NULL,
+                        PRIMARY KEY (candidate_id, duplicate_id)
+                    )
+                """)
             else:
                 # MySQL version
-                self.cursor.execute("""
+                self._execute("""
                     CREATE TABLE IF NOT EXISTS candidates (
                         id INT AUTO_INCREMENT PRIMARY KEY,
                         name VARCHAR(255) NOT NULL,
@@ -175,11 +731,15 @@ class Database:
                         score INT,
                         status VARCHAR(50) DEFAULT 'pending',
                         notes TEXT,
+                        total_years FLOAT,
+                        skill_count INT,
+                        normalized_skills JSON,
+                        dedup_key VARCHAR(512),
                         created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
                     )
                 """)
                 
-                self.cursor.execute("""
+                self._execute("""
                     CREATE TABLE IF NOT EXISTS positions (
                         id INT AUTO_INCREMENT PRIMARY KEY,
                         title VARCHAR(255) NOT NULL,
@@ -190,7 +750,7 @@ class Database:
                     )
                 """)
                 
-                self.cursor.execute("""
+                self._execute("""
                     CREATE TABLE IF NOT EXISTS uploads (
                         id INT AUTO_INCREMENT PRIMARY KEY,
                         filename VARCHAR(255) NOT NULL,
@@ -198,11 +758,12 @@ class Database:
                         processed_at TIMESTAMP,
                         total_records INT,
                         successful_records INT,
-                        failed_records INT
+                        failed_records INT,
+                        content_hash CHAR(64)
                     )
                 """)
                 
-                self.cursor.execute("""
+                self._execute("""
                     CREATE TABLE IF NOT EXISTS notifications (
                         id INT AUTO_INCREMENT PRIMARY KEY,
                         message TEXT NOT NULL,
@@ -211,20 +772,140 @@ class Database:
                         created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
                     )
                 """)
+                
+                self._execute("""
+                    CREATE TABLE IF NOT EXISTS position_stats (
+                        position VARCHAR(255) PRIMARY KEY,
+                        total_candidates INT NOT NULL DEFAULT 0,
+                        pending_count INT NOT NULL DEFAULT 0,
+                        shortlisted_count INT NOT NULL DEFAULT 0,
+                        review_count INT NOT NULL DEFAULT 0,
+                        rejected_count INT NOT NULL DEFAULT 0,
+                        score_total BIGINT NOT NULL DEFAULT 0,
+                        scored_count INT NOT NULL DEFAULT 0,
+                        score_bucket_0 INT NOT NULL DEFAULT 0,
+                        score_bucket_1 INT NOT NULL DEFAULT 0,
+                        score_bucket_2 INT NOT NULL DEFAULT 0,
+                        score_bucket_3 INT NOT NULL DEFAULT 0,
+                        score_bucket_4 INT NOT NULL DEFAULT 0,
+                        score_bucket_5 INT NOT NULL DEFAULT 0,
+                        score_bucket_6 INT NOT NULL DEFAULT 0,
+                        score_bucket_7 INT NOT NULL DEFAULT 0,
+                        score_bucket_8 INT NOT NULL DEFAULT 0,
+                        score_bucket_9 INT NOT NULL DEFAULT 0
+                    )
+                """)
+
+                self._execute("""
+                    CREATE TABLE IF NOT EXISTS skills (
+                        id INT AUTO_INCREMENT PRIMARY KEY,
+                        name VARCHAR(255) NOT NULL UNIQUE
+                    )
+                """)
+                
+                self._execute("""
+                    CREATE TABLE IF NOT EXISTS candidate_skills (
+                        candidate_id INT NOT NULL,
+                        skill_id INT NOT NULL,
+                        PRIMARY KEY (candidate_id, skill_id)
+                    )
+                """)
+
+                self._execute("""
+                    CREATE TABLE IF NOT EXISTS candidate_minhash (
+                        candidate_id INT PRIMARY KEY,
+                        signature JSON NOT NULL
+                    )
+                """)
+                
+                self._execute("""
+                    CREATE TABLE IF NOT EXISTS candidate_lsh (
+                        band SMALLINT NOT NULL,
+                        bucket BIGINT NOT NULL,
+                        candidate_id INT NOT NULL,
+                        PRIMARY KEY (band, bucket, candidate_id)
+                    )
+                """)
+
+                self._execute("""
+                    CREATE TABLE IF NOT EXISTS candidate_blocks (
+                        block_key VARCHAR(255) NOT NULL,
+                        candidate_id INT NOT NULL,
+                        PRIMARY KEY (block_key, candidate_id)
+                    )
+                """)
+                
+                self._execute("""
+                    CREATE TABLE IF NOT EXISTS duplicate_pairs (
+                        candidate_id INT NOT NULL,
+                        duplicate_id INT NOT NULL,
+                        score FLOAT NOT NULL,
+                        PRIMARY KEY (candidate_id, duplicate_id)
+                    )
+                """)
+            
+            # Bring tables created by older versions up to date, then index them
+            self._upgrade_tables()
+            self.create_indexes()
             
             self.conn.commit()
+            
+            # Populate aggregates for candidates that predate position_stats
+            if not self._execute("SELECT COUNT(*) AS count FROM position_stats").fetchone()['count']:
+                self.rebuild_position_stats()
             return True
         except Exception as e:
             print(f"Error creating tables: {e}")
+            self.conn.rollback()
             return False
     
+    def _get_table_columns(self, table):
+        """Return the set of column names currently defined on a table."""
+        sql, params = self.dialect.table_columns_query(table)
+        return {row['column_name'] for row in self._execute(sql, params).fetchall()}
+    
+    def _upgrade_tables(self):
+        """Add columns introduced after a table was first created."""
+        for table, columns in self.ADDED_COLUMNS.items():
+            existing = self._get_table_columns(table)
+            for column, types in columns:
+                if column not in existing:
+                    self._execute(f"ALTER TABLE {table} ADD COLUMN {column} {types[self.dialect.name]}")
+        self._upgrade_archive_tables(self._archive_partitions())
+    
+    def create_indexes(self):
+        """Create the secondary indexes in INDEXES that are missing, on the current transaction."""
+        for name, table, columns, unique in self.INDEXES:
+            self._create_index(name, table, columns, unique)
+    
+    def drop_indexes(self):
+        """Drop the secondary indexes in INDEXES, e.g. before a bulk load; create_indexes rebuilds them."""
+        for name, table, _, _ in self.INDEXES:
+            exists_query = self.dialect.index_exists_query(table, name)
+            if exists_query and not self._execute(*exists_query).fetchone()['count']:
+                continue
+            self._execute(self.dialect.drop_index(table, name))
+    
+    def _create_index(self, name, table, columns, unique=False):
+        """Create an index if it does not already exist."""
+        kind = "UNIQUE INDEX" if unique else "INDEX"
+        columns = ", ".join(self.dialect.quote(column) for column in columns)
+        exists_query = self.dialect.index_exists_query(table, name)
+        if exists_query:
+            if self._execute(*exists_query).fetchone()['count']:
+                return
+            self._execute(f"CREATE {kind} {name} ON {table} ({columns})")
+        else:
+            self._execute(f"CREATE {kind} IF NOT EXISTS {name} ON {table} ({columns})")
+    
     # Helper function to handle JSON fields
     def _handle_json_fields(self, data, is_insert=True):
         """Convert dictionary fields to JSON strings for database storage."""
         result = data.copy()
         
         # Fields that need JSON conversion
-        json_fields = ['skills', 'experience', 'required_skills']
+        json_fields = ['skills', 'experience', 'required_skills', 'normalized_skills', 'skill_ids',
+                       'required_skill_ids', 'score_weights']
         
         for field in json_fields:
             if field in result and result[field] is not None:
@@ -233,8 +914,14 @@ class Database:
         
         return result
     
+    @staticmethod
+    def _load_json(value):
+        """Parse a JSON column; drivers with native JSON types return it already parsed."""
+        return json.loads(value) if isinstance(value, (str, bytes)) else value
+    
     # Helper function to convert database rows back to Python objects
-    def _convert_from_db_row(self, row):
+    @staticmethod
+    def _convert_from_db_row(row):
         """Convert row from database to Python object with parsed JSON fields."""
         if not row:
             return None
@@ -242,7 +929,8 @@ class Database:
         result = dict(row)
         
         # Fields that need JSON parsing
-        json_fields = ['skills', 'experience', 'required_skills']
+        json_fields = ['skills', 'experience', 'required_skills', 'normalized_skills', 'skill_ids',
+                       'required_skill_ids', 'score_weights']
         
         for field in json_fields:
             if field in result and result[field]:
@@ -254,118 +942,1030 @@ class Database:
         
         return result
     
+    # Candidate columns returned by list views with summary=True. The skills
+    # and experience JSON and the notes are left for the detail view.
+    CANDIDATE_SUMMARY_COLUMNS = ('id', 'name', 'email', 'position', 'score', 'status', 'created_at')
+    
+    # Order of candidate lists. NULL scores sort as 0 on every backend, as
+    # in the merges of hot and archived rows and of shards; PostgreSQL would
+    # otherwise put them first.
+    SCORE_ORDER = "COALESCE(score, 0) DESC"
+    
+    # IDs per IN (...) list of a batch lookup
+    ID_BATCH_SIZE = 500
+    
+    def _candidate_columns(self, summary):
+        return ", ".join(self.CANDIDATE_SUMMARY_COLUMNS) if summary else "*"
+    
+    # Candidate columns kept for skill matching and deduplication, left out of
+    # returned rows so the API shape does not depend on them
+    INTERNAL_CANDIDATE_COLUMNS = ('normalized_skills', 'skill_ids', 'dedup_key')
+    
+    @staticmethod
+    def _convert_candidate_row(row):
+        """Convert a full candidate row, dropping INTERNAL_CANDIDATE_COLUMNS before any JSON is parsed."""
+        if not row:
+            return None
+        candidate = dict(row)
+        for column in Database.INTERNAL_CANDIDATE_COLUMNS:
+            candidate.pop(column, None)
+        return Database._convert_from_db_row(candidate)
+    
+    def _candidate_rows(self, rows, summary):
+        """Convert candidate rows; summary rows have no JSON fields to parse."""
+        if summary:
+            return [dict(row) for row in rows]
+        return [self._convert_candidate_row(row) for row in rows]
+    
     # Candidate operations
-    def get_all_candidates(self):
-        """Get all candidates from the database."""
+    @read_only
+    def get_all_candidates(self, summary=False, include_archived=False):
+        """
+        Get all candidates from the database, only CANDIDATE_SUMMARY_COLUMNS if summary is set.
+        
+        Archived candidates are left out unless include_archived is set.
+        """
         try:
-            self.cursor.execute("SELECT * FROM candidates ORDER BY score DESC")
-            rows = self.cursor.fetchall()
-            return [self._convert_from_db_row(row) for row in rows]
+            self._execute(f"SELECT {self._candidate_columns(summary)} FROM candidates ORDER BY {self.SCORE_ORDER}",
+                          prepare=True)
+            candidates = self._candidate_rows(self.cursor.fetchall(), summary)
         except Exception as e:
             print(f"Error getting candidates: {e}")
             return []
+        if not include_archived:
+            return candidates
+        archived = self.get_archived_candidates(summary=summary)
+        return list(heapq.merge(candidates, archived, key=lambda candidate: -(candidate.get('score') or 0)))
     
-    def get_candidate_by_id(self, id):
-        """Get a candidate by ID."""
+    @read_only
+    def get_candidate_by_id(self, id, include_archived=False):
+        """Get a candidate by ID, looking in the archive too if include_archived is set."""
         try:
-            self.cursor.execute("SELECT * FROM candidates WHERE id = %s", (id,))
+            self._execute("SELECT * FROM candidates WHERE id = %s", (id,), prepare=True)
             row = self.cursor.fetchone()
-            return self._convert_from_db_row(row)
+            if not row and include_archived:
+                return self._get_archived_candidate(id)
+            return self._convert_candidate_row(row)
         except Exception as e:
             print(f"Error getting candidate: {e}")
             return None
     
-    def get_candidates_by_position(self, position):
+    @read_only
+    def get_candidates_by_ids(self, ids):
+        """
+        Get full candidate rows for several IDs, e.g. the detail views opened from a list.
+        
+        Returns:
+            Candidates in the order of ids; IDs that do not exist are left out
+        """
+        try:
+            ids = list(dict.fromkeys(ids))
+            found = {}
+            for start in range(0, len(ids), self.ID_BATCH_SIZE):
+                batch = tuple(ids[start:start + self.ID_BATCH_SIZE])
+                placeholders = ", ".join(["%s"] * len(batch))
+                self._execute(f"SELECT * FROM candidates WHERE id IN ({placeholders})", batch)
+                for row in self.cursor.fetchall():
+                    found[row['id']] = self._convert_candidate_row(row)
+            return [found[id] for id in ids if id in found]
+        except Exception as e:
+            print(f"Error getting candidates by ID: {e}")
+            return []
+    
+    @read_only
+    def get_candidates_by_position(self, position, summary=False):
         """Get candidates by position."""
         try:
-            self.cursor.execute("SELECT * FROM candidates WHERE position = %s ORDER BY score DESC", (position,))
-            rows = self.cursor.fetchall()
-            return [self._convert_from_db_row(row) for row in rows]
+            self._execute(f"SELECT {self._candidate_columns(summary)} FROM candidates WHERE position = %s "
+                          f"ORDER BY {self.SCORE_ORDER}", (position,), prepare=True)
+            return self._candidate_rows(self.cursor.fetchall(), summary)
         except Exception as e:
             print(f"Error getting candidates by position: {e}")
             return []
     
-    def get_candidates_by_status(self, status):
+    @read_only
+    def get_candidates_by_status(self, status, summary=False):
         """Get candidates by status."""
         try:
-            self.cursor.execute("SELECT * FROM candidates WHERE status = %s ORDER BY score DESC", (status,))
+            self._execute(f"SELECT {self._candidate_columns(summary)} FROM candidates WHERE status = %s "
+                          f"ORDER BY {self.SCORE_ORDER}", (status,), prepare=True)
+            return self._candidate_rows(self.cursor.fetchall(), summary)
+        except Exception as e:
+            print(f"Error getting candidates by status: {e}")
+            return []
+    
+    @read_only
+    def get_candidates_by_min_years(self, min_years, summary=False):
+        """Get candidates with at least the given total years of experience."""
+        try:
+            self._execute(
+                f"SELECT {self._candidate_columns(summary)} FROM candidates WHERE total_years >= %s "
+                f"ORDER BY {self.SCORE_ORDER}", (min_years,), prepare=True)
+            return self._candidate_rows(self.cursor.fetchall(), summary)
+        except Exception as e:
+            print(f"Error getting candidates by experience: {e}")
+            return []
+    
+    def get_candidates_missing_derived(self, limit=500):
+        """Get a batch of candidates whose derived columns have not been filled in yet."""
+        try:
+            self._execute(
+                "SELECT id, skills, experience FROM candidates "
+                "WHERE total_years IS NULL OR skill_count IS NULL OR normalized_skills IS NULL "
+                "ORDER BY id LIMIT %s", (limit,))
             rows = self.cursor.fetchall()
             return [self._convert_from_db_row(row) for row in rows]
         except Exception as e:
-            print(f"Error getting candidates by status: {e}")
+            print(f"Error getting candidates to backfill: {e}")
+            return []
+    
+    def update_derived_columns(self, rows):
+        """
+        Write derived columns for many candidates in a single transaction.
+        
+        Args:
+            rows: List of dicts with id, total_years, skill_count and normalized_skills
+        """
+        try:
+            params = [
+                (row['total_years'], row['skill_count'], json.dumps(row['normalized_skills']), row['id'])
+                for row in rows
+            ]
+            self._executemany(
+                "UPDATE candidates SET total_years = %s, skill_count = %s, normalized_skills = %s "
+                "WHERE id = %s", params)
+            self.conn.commit()
+            return len(params)
+        except Exception as e:
+            print(f"Error updating derived columns: {e}")
+            self.conn.rollback()
+            return 0
+    
+    # Score component operations
+    def get_candidates_missing_components(self, limit=500):
+        """Get a batch of candidates scored before their component scores were stored."""
+        try:
+            self._execute(
+                "SELECT id, position, skills, experience, total_years FROM candidates "
+                "WHERE skill_score IS NULL OR experience_score IS NULL ORDER BY id LIMIT %s", (limit,))
+            rows = self.cursor.fetchall()
+            return [self._convert_from_db_row(row) for row in rows]
+        except Exception as e:
+            print(f"Error getting candidates to backfill: {e}")
+            return []
+    
+    def update_score_components(self, rows):
+        """
+        Write the component scores of many candidates in a single transaction.
+        
+        Args:
+            rows: List of dicts with id, skill_score and experience_score
+        """
+        try:
+            params = [(row['skill_score'], row['experience_score'], row['id']) for row in rows]
+            self._executemany(
+                "UPDATE candidates SET skill_score = %s, experience_score = %s WHERE id = %s", params)
+            self.conn.commit()
+            return len(params)
+        except Exception as e:
+            print(f"Error updating score components: {e}")
+            self.conn.rollback()
+            return 0
+    
+    @read_only
+    def get_score_components(self, position):
+        """
+        Get the IDs, stored scores and component scores of a position's candidates.
+        
+        Candidates without components (scored before they were stored) are
+        returned with them as None.
+        """
+        try:
+            self._execute(
+                "SELECT id, score, skill_score, experience_score FROM candidates WHERE position = %s",
+                (position,))
+            return [dict(row) for row in self.cursor.fetchall()]
+        except Exception as e:
+            print(f"Error getting score components: {e}")
             return []
     
+    def update_candidate_scores(self, position, scores):
+        """
+        Replace the scores of a position's candidates in one transaction.
+        
+        Statuses are left as they are; the position's aggregate row is
+        recomputed on the same transaction.
+        
+        Args:
+            position: Position title the candidates belong to
+            scores: List of (candidate ID, new score)
+            
+        Returns:
+            Number of candidates updated, or None on failure
+        """
+        try:
+            if self.dialect.begin_statement and not self.conn.in_transaction:
+                self._execute(self.dialect.begin_statement)
+            params = [(score, id, position) for id, score in scores]
+            self._executemany("UPDATE candidates SET score = %s WHERE id = %s AND position = %s", params)
+            self._rebuild_position_stats(position)
+            self.conn.commit()
+            return len(params)
+        except Exception as e:
+            print(f"Error updating candidate scores: {e}")
+            self.conn.rollback()
+            return None
+    
+    # Columns left untouched when an upload re-imports an existing candidate,
+    # so triage decisions survive re-uploads of the same file
+    UPSERT_PRESERVED_COLUMNS = ('id', 'email', 'position', 'dedup_key', 'status', 'notes', 'created_at')
+    
     def create_candidate(self, candidate):
-        """Create a new candidate."""
+        """
+        Create a candidate, or refresh it if the same (email, position) already exists.
+        
+        Re-imported candidates get the new scoring data but keep their status
+        and notes.
+        """
         try:
-            # Format data for database
-            data = self._handle_json_fields(candidate)
+            self._ensure_skills(self._candidate_skill_names(candidate))
+            candidate_id = self._upsert_candidate(candidate)
+            self.conn.commit()
+            self.detect_duplicates([candidate_id])
+            
+            # Return the created candidate
+            return self.get_candidate_by_id(candidate_id)
+        except Exception as e:
+            print(f"Error creating candidate: {e}")
+            self.conn.rollback()
+            return None
+    
+    def create_candidates(self, candidates):
+        """
+        Create or refresh many candidates, committing once per WRITE_BATCH_SIZE rows.
+        
+        Each row runs inside a savepoint, so a row that fails is rolled back
+        on its own without discarding the rest of its batch.
+        
+        Args:
+            candidates: List of candidate dicts, as passed to create_candidate
+            
+        Returns:
+            Tuple of (successful, failed)
+        """
+        successful = failed = 0
+        for start in range(0, len(candidates), self.WRITE_BATCH_SIZE):
+            batch = candidates[start:start + self.WRITE_BATCH_SIZE]
+            try:
+                batch_ids = self._write_candidate_batch(batch)
+                self.conn.commit()
+                successful += len(batch_ids)
+                failed += len(batch) - len(batch_ids)
+                # Fuzzy duplicates of the new rows, compared within their blocks
+                self.detect_duplicates(batch_ids)
+            except Exception as e:
+                print(f"Error creating candidate batch: {e}")
+                self.conn.rollback()
+                failed += len(batch)
+        return successful, failed
+    
+    def _write_candidate_batch(self, batch):
+        """Upsert candidates on one transaction, each in a savepoint; return the IDs written."""
+        self._ensure_skills({name for candidate in batch
+                             for name in self._candidate_skill_names(candidate)})
+        if self.dialect.begin_statement and not self.conn.in_transaction:
+            self._execute(self.dialect.begin_statement)
+        batch_ids = []
+        for candidate in batch:
+            self._execute("SAVEPOINT candidate_row")
+            try:
+                batch_ids.append(self._upsert_candidate(candidate))
+                self._execute("RELEASE SAVEPOINT candidate_row")
+            except Exception as e:
+                print(f"Error creating candidate: {e}")
+                self._execute("ROLLBACK TO SAVEPOINT candidate_row")
+        return batch_ids
+    
+    def _upsert_candidate(self, candidate):
+        """Upsert one candidate and its position_stats delta on the current transaction; return its ID."""
+        # Format data for database
+        data = self._handle_json_fields(candidate)
+        data['dedup_key'] = candidate_dedup_key(candidate.get('email'), candidate.get('position'))
+        # Signatures are computed at ingest; they live in candidate_minhash, not on the row
+        signature = data.pop('minhash', None) or minhash_signature(self._candidate_skill_names(candidate))
+        skill_ids = self._skill_ids(self._candidate_skill_names(candidate))
+        data['skill_ids'] = json.dumps(skill_ids)
+        
+        # Look up the row this insert would collide with, to keep the aggregates exact
+        self._execute(
+            f"SELECT id, status, score FROM candidates WHERE dedup_key = %s{self.dialect.for_update()}",
+            (data['dedup_key'],), prepare=True)
+        existing = self.cursor.fetchone()
+        
+        # Build SQL statement
+        columns = tuple(data.keys())
+        refreshed = tuple(c for c in columns if c not in self.UPSERT_PRESERVED_COLUMNS)
+        query = self.dialect.upsert('candidates', columns, ('dedup_key',), replace=refreshed)
+        
+        # Execute the query and get the row ID
+        if self.dialect.supports_returning:
+            self._execute(query + " RETURNING id", tuple(data.values()), prepare=True)
+            candidate_id = self.cursor.fetchone()['id']
+        else:
+            self._execute(query, tuple(data.values()))
+            candidate_id = existing['id'] if existing else self.cursor.lastrowid
+        
+        # Keep the position aggregates in the same transaction as the write
+        if existing:
+            delta = self._candidate_stats_delta(existing['status'], existing['score'], -1)
+            for column, value in self._candidate_stats_delta(existing['status'], candidate.get('score'), 1).items():
+                delta[column] = delta.get(column, 0) + value
+            delta = {column: value for column, value in delta.items() if value}
+        else:
+            delta = self._candidate_stats_delta(candidate.get('status', 'pending'), candidate.get('score'), 1)
+        self._apply_position_stats_delta(candidate.get('position'), delta)
+        self._replace_candidate_skills(candidate_id, skill_ids, replace=bool(existing))
+        self._replace_candidate_minhash(candidate_id, signature, replace=bool(existing))
+        self._replace_candidate_blocks(candidate_id, candidate, replace=bool(existing))
+        return candidate_id
+    
+    # Skill dictionary operations
+    @staticmethod
+    def _candidate_skill_names(candidate):
+        """Normalized skill names of a candidate, derived at ingest or from its skills."""
+        if candidate.get('normalized_skills') is not None:
+            return candidate['normalized_skills']
+        return normalize_skills(candidate.get('skills'))
+    
+    def _ensure_skills(self, names):
+        """
+        Add unknown skill names to the skills table and cache the IDs of all of them.
+        
+        Commits on its own, so the cached IDs never refer to rows a later
+        rollback could remove. Skill rows nothing references are harmless.
+        """
+        missing = sorted(name for name in names if self.skill_dictionary.get(name) is None)
+        if not missing:
+            return
+        try:
+            for start in range(0, len(missing), self.WRITE_BATCH_SIZE):
+                chunk = missing[start:start + self.WRITE_BATCH_SIZE]
+                self._executemany(self.dialect.upsert('skills', ('name',), ('name',)),
+                                  [(name,) for name in chunk])
+                placeholders = ", ".join(["%s"] * len(chunk))
+                self._execute(f"SELECT id, name FROM skills WHERE name IN ({placeholders})", tuple(chunk))
+                rows = self.cursor.fetchall()
+                self.conn.commit()
+                for row in rows:
+                    self.skill_dictionary.add(row['id'], row['name'])
+        except Exception:
+            self.conn.rollback()
+            raise
+    
+    def _skill_ids(self, names):
+        """Return the persisted IDs of normalized skill names, loading any that are not cached."""
+        if any(self.skill_dictionary.get(name) is None for name in names):
+            self._ensure_skills(names)
+        return sorted(self.skill_dictionary.get(name) for name in names)
+    
+    def _replace_candidate_skills(self, candidate_id, skill_ids, replace=True):
+        """Write a candidate's candidate_skills rows on the current transaction."""
+        if replace:
+            self._execute("DELETE FROM candidate_skills WHERE candidate_id = %s", (candidate_id,))
+        if skill_ids:
+            self._executemany(self.dialect.insert('candidate_skills', ('candidate_id', 'skill_id')),
+                              [(candidate_id, skill_id) for skill_id in skill_ids])
+    
+    @read_only
+    def get_candidates_by_skills(self, skills, summary=False):
+        """
+        Get candidates that have every one of the given skills, using the candidate_skills index.
+        
+        Args:
+            skills: Skill names; matched exactly after normalization
+            summary: Return only CANDIDATE_SUMMARY_COLUMNS
+        """
+        try:
+            names = sorted(set(normalize_skills(skills)))
+            if not names:
+                return self.get_all_candidates(summary)
+            placeholders = ", ".join(["%s"] * len(names))
+            self._execute(
+                f"SELECT {self._candidate_columns(summary)} FROM candidates WHERE id IN ("
+                "SELECT cs.candidate_id FROM candidate_skills cs JOIN skills s ON s.id = cs.skill_id "
+                f"WHERE s.name IN ({placeholders}) GROUP BY cs.candidate_id HAVING COUNT(*) = %s"
+                f") ORDER BY {self.SCORE_ORDER}", (*names, len(names)))
+            return self._candidate_rows(self.cursor.fetchall(), summary)
+        except Exception as e:
+            print(f"Error getting candidates by skills: {e}")
+            return []
+    
+    # Similarity operations
+    def _replace_candidate_minhash(self, candidate_id, signature, replace=True):
+        """Write a candidate's MinHash signature and LSH buckets on the current transaction."""
+        if replace:
+            self._execute("DELETE FROM candidate_minhash WHERE candidate_id = %s", (candidate_id,))
+            self._execute("DELETE FROM candidate_lsh WHERE candidate_id = %s", (candidate_id,))
+        if signature:
+            self._execute(self.dialect.insert('candidate_minhash', ('candidate_id', 'signature')),
+                          (candidate_id, json.dumps(signature)))
+            self._executemany(self.dialect.insert('candidate_lsh', ('band', 'bucket', 'candidate_id')),
+                              [(band, bucket, candidate_id) for band, bucket in lsh_buckets(signature)])
+    
+    @read_only
+    def get_similar_candidates(self, id, limit=10):
+        """
+        Get the candidates whose skill sets are most similar to a candidate's.
+        
+        Only candidates sharing an LSH bucket with it are compared, so the
+        cost depends on the bucket sizes rather than the number of candidates.
+        
+        Args:
+            id: Candidate ID
+            limit: Maximum number of neighbors
+            
+        Returns:
+            Candidates with an estimated Jaccard "similarity", most similar first
+        """
+        signature = self.get_candidate_signature(id)
+        if not signature:
+            return []
+        return self.get_candidates_similar_to(signature, limit, exclude_id=id)
+    
+    @read_only
+    def get_candidate_signature(self, id):
+        """Get a candidate's MinHash signature, or None if it has none."""
+        try:
+            self._execute("SELECT signature FROM candidate_minhash WHERE candidate_id = %s", (id,), prepare=True)
+            row = self.cursor.fetchone()
+            return self._load_json(row['signature']) if row else None
+        except Exception as e:
+            print(f"Error getting candidate signature: {e}")
+            return None
+    
+    @read_only
+    def get_candidates_similar_to(self, signature, limit=10, exclude_id=None):
+        """
+        Get the candidates most similar to a MinHash signature, compared within its LSH buckets.
+        
+        Args:
+            signature: MinHash signature, e.g. from get_candidate_signature
+            limit: Maximum number of neighbors
+            exclude_id: Candidate left out of the results, usually the one the signature belongs to
+            
+        Returns:
+            Candidates with an estimated Jaccard "similarity", most similar first
+        """
+        try:
+            buckets = lsh_buckets(signature)
+            conditions = " OR ".join(["(band = %s AND bucket = %s)"] * len(buckets))
+            params = [value for bucket in buckets for value in bucket]
+            # IDs start at 1, so 0 excludes nothing
+            self._execute(
+                f"SELECT DISTINCT candidate_id FROM candidate_lsh WHERE ({conditions}) AND candidate_id <> %s "
+                f"LIMIT %s", (*params, exclude_id or 0, self.MAX_SIMILARITY_CANDIDATES), prepare=True)
+            neighbor_ids = [row['candidate_id'] for row in self.cursor.fetchall()]
+            if not neighbor_ids:
+                return []
             
-            # Build SQL statement
-            fields = ", ".join(data.keys())
-            placeholders = ", ".join(["%s"] * len(data))
+            placeholders = ", ".join(["%s"] * len(neighbor_ids))
+            self._execute(
+                f"SELECT candidate_id, signature FROM candidate_minhash WHERE candidate_id IN ({placeholders})",
+                tuple(neighbor_ids))
+            scores = {row['candidate_id']: estimate_similarity(signature, self._load_json(row['signature']))
+                      for row in self.cursor.fetchall()}
+            best = sorted(scores, key=lambda candidate_id: (-scores[candidate_id], candidate_id))[:limit]
+            if not best:
+                return []
             
-            query = f"INSERT INTO candidates ({fields}) VALUES ({placeholders})"
+            placeholders = ", ".join(["%s"] * len(best))
+            self._execute(f"SELECT * FROM candidates WHERE id IN ({placeholders})", tuple(best))
+            candidates = {row['id']: self._convert_candidate_row(row) for row in self.cursor.fetchall()}
+            similar = []
+            for candidate_id in best:
+                if candidate_id in candidates:
+                    candidates[candidate_id]['similarity'] = round(scores[candidate_id], 3)
+                    similar.append(candidates[candidate_id])
+            return similar
+        except Exception as e:
+            print(f"Error getting similar candidates: {e}")
+            return []
+    
+    # Duplicate detection operations
+    def _replace_candidate_blocks(self, candidate_id, candidate, replace=True):
+        """Write a candidate's duplicate-detection blocking keys on the current transaction."""
+        if replace:
+            self._execute("DELETE FROM candidate_blocks WHERE candidate_id = %s", (candidate_id,))
+        keys = blocking_keys(candidate)
+        if keys:
+            self._executemany(self.dialect.insert('candidate_blocks', ('block_key', 'candidate_id')),
+                              [(key, candidate_id) for key in keys])
+    
+    def _save_duplicate_pairs(self, pairs):
+        """Store detected pairs, replacing the score of pairs already known."""
+        if pairs:
+            self._executemany(
+                self.dialect.upsert('duplicate_pairs', ('candidate_id', 'duplicate_id', 'score'),
+                                    ('candidate_id', 'duplicate_id'), replace=('score',)),
+                pairs)
+    
+    def _delete_candidate_rows(self, ids):
+        """Delete candidates and their index rows on the current transaction."""
+        if not ids:
+            return
+        ids = tuple(ids)
+        placeholders = ", ".join(["%s"] * len(ids))
+        for table in ('candidate_skills', 'candidate_minhash', 'candidate_lsh', 'candidate_blocks'):
+            self._execute(f"DELETE FROM {table} WHERE candidate_id IN ({placeholders})", ids)
+        self._execute(
+            f"DELETE FROM duplicate_pairs WHERE candidate_id IN ({placeholders}) "
+            f"OR duplicate_id IN ({placeholders})", ids + ids)
+        self._execute(f"DELETE FROM candidates WHERE id IN ({placeholders})", ids)
+    
+    def detect_duplicates(self, candidate_ids):
+        """
+        Find fuzzy duplicates of some candidates, e.g. the rows of one upload batch.
+        
+        Only candidates sharing a blocking key with them are loaded and
+        compared, and blocks above MAX_BLOCK_SIZE are skipped.
+        
+        Returns:
+            Number of duplicate pairs found
+        """
+        if not candidate_ids:
+            return 0
+        try:
+            ids = tuple(candidate_ids)
+            placeholders = ", ".join(["%s"] * len(ids))
+            self._execute(f"SELECT DISTINCT block_key FROM candidate_blocks WHERE candidate_id IN ({placeholders})",
+                          ids)
+            keys = tuple(row['block_key'] for row in self.cursor.fetchall())
+            if not keys:
+                return 0
             
-            # Execute the query
-            self.cursor.execute(query, tuple(data.values()))
+            placeholders = ", ".join(["%s"] * len(keys))
+            self._execute(
+                "SELECT id, name, email, position FROM candidates WHERE id IN ("
+                "SELECT candidate_id FROM candidate_blocks WHERE block_key IN ("
+                f"SELECT block_key FROM candidate_blocks WHERE block_key IN ({placeholders}) "
+                "GROUP BY block_key HAVING COUNT(*) <= %s))", (*keys, MAX_BLOCK_SIZE))
+            candidates = [dict(row) for row in self.cursor.fetchall()]
+            
+            pairs = find_duplicate_pairs(candidates, new_ids=set(ids))
+            self._save_duplicate_pairs(pairs)
             self.conn.commit()
+            return len(pairs)
+        except Exception as e:
+            print(f"Error detecting duplicates: {e}")
+            self.conn.rollback()
+            return 0
+    
+    def rebuild_duplicates(self, batch_size=1000):
+        """
+        Full duplicate detection pass: rebuild every blocking key and duplicate pair.
+        
+        Returns:
+            Tuple of (candidates scanned, duplicate pairs found)
+        """
+        try:
+            self._execute("SELECT id, name, email, position FROM candidates ORDER BY id")
+            candidates = [dict(row) for row in self.cursor.fetchall()]
             
-            # Get the inserted ID
-            candidate_id = self.cursor.lastrowid
+            self._execute("DELETE FROM candidate_blocks")
+            rows = [(key, candidate['id']) for candidate in candidates for key in blocking_keys(candidate)]
+            for start in range(0, len(rows), batch_size):
+                self._executemany(self.dialect.insert('candidate_blocks', ('block_key', 'candidate_id')),
+                                  rows[start:start + batch_size])
             
-            # Return the created candidate
-            return self.get_candidate_by_id(candidate_id)
+            pairs = find_duplicate_pairs(candidates)
+            self._execute("DELETE FROM duplicate_pairs")
+            self._save_duplicate_pairs(pairs)
+            self.conn.commit()
+            return len(candidates), len(pairs)
         except Exception as e:
-            print(f"Error creating candidate: {e}")
+            print(f"Error rebuilding duplicates: {e}")
+            self.conn.rollback()
+            return 0, 0
+    
+    @read_only
+    def get_duplicate_groups(self):
+        """
+        Get detected duplicates clustered into groups.
+        
+        Returns:
+            List of dicts with the group's candidates (lowest ID first) and its
+            matching pairs
+        """
+        try:
+            self._execute("SELECT candidate_id, duplicate_id, score FROM duplicate_pairs")
+            pairs = [(row['candidate_id'], row['duplicate_id'], row['score']) for row in self.cursor.fetchall()]
+            groups = cluster_pairs(pairs)
+            if not groups:
+                return []
+            
+            ids = tuple(candidate_id for group in groups for candidate_id in group)
+            placeholders = ", ".join(["%s"] * len(ids))
+            self._execute(f"SELECT * FROM candidates WHERE id IN ({placeholders})", ids)
+            candidates = {row['id']: self._convert_candidate_row(row) for row in self.cursor.fetchall()}
+            
+            group_of = {candidate_id: i for i, group in enumerate(groups) for candidate_id in group}
+            group_pairs = [[] for _ in groups]
+            for first, second, score in pairs:
+                group_pairs[group_of[first]].append({"candidateId": first, "duplicateId": second, "score": score})
+            return [
+                {
+                    "candidates": [candidates[candidate_id] for candidate_id in group if candidate_id in candidates],
+                    "pairs": group_pairs[i]
+                }
+                for i, group in enumerate(groups)
+            ]
+        except Exception as e:
+            print(f"Error getting duplicate groups: {e}")
+            return []
+    
+    def merge_candidates(self, keep_id, merge_ids):
+        """
+        Merge duplicate candidates into one and delete the others.
+        
+        The kept row keeps its own data and status. Notes from the merged
+        rows are appended to it, and position_stats are adjusted for the
+        deleted rows.
+        
+        Args:
+            keep_id: ID of the candidate to keep
+            merge_ids: IDs of the candidates folded into it; they must be
+                       applications to the same position
+            
+        Returns:
+            The kept candidate, or None if the merge was rejected or failed
+        """
+        merge_ids = [candidate_id for candidate_id in dict.fromkeys(merge_ids) if candidate_id != keep_id]
+        try:
+            ids = (keep_id, *merge_ids)
+            placeholders = ", ".join(["%s"] * len(ids))
+            self._execute(
+                f"SELECT id, position, status, score, notes FROM candidates WHERE id IN ({placeholders})"
+                f"{self.dialect.for_update()}", ids)
+            rows = {row['id']: dict(row) for row in self.cursor.fetchall()}
+            if len(rows) != len(ids) or len({row['position'] for row in rows.values()}) != 1:
+                self.conn.rollback()
+                return None
+            
+            keep = rows[keep_id]
+            notes = [keep['notes']] + [rows[candidate_id]['notes'] for candidate_id in merge_ids]
+            merged_notes = "\n\n".join(note for note in dict.fromkeys(notes) if note)
+            if merged_notes != (keep['notes'] or ''):
+                self._execute("UPDATE candidates SET notes = %s WHERE id = %s", (merged_notes, keep_id))
+            
+            delta = {}
+            for candidate_id in merge_ids:
+                for column, value in self._candidate_stats_delta(rows[candidate_id]['status'],
+                                                                 rows[candidate_id]['score'], -1).items():
+                    delta[column] = delta.get(column, 0) + value
+            self._apply_position_stats_delta(keep['position'], delta)
+            self._delete_candidate_rows(merge_ids)
+            self.conn.commit()
+            return self.get_candidate_by_id(keep_id)
+        except Exception as e:
+            print(f"Error merging candidates: {e}")
+            self.conn.rollback()
             return None
     
+    def backfill_minhash(self, batch_size=500):
+        """
+        Compute MinHash signatures and LSH buckets for candidates that predate them.
+        
+        Returns:
+            Number of candidates indexed
+        """
+        total = 0
+        last_id = 0
+        try:
+            while True:
+                self._execute(
+                    "SELECT id, skills, normalized_skills FROM candidates WHERE id > %s AND id NOT IN "
+                    "(SELECT candidate_id FROM candidate_minhash) ORDER BY id LIMIT %s", (last_id, batch_size))
+                rows = [self._convert_from_db_row(row) for row in self.cursor.fetchall()]
+                if not rows:
+                    break
+                for row in rows:
+                    self._replace_candidate_minhash(
+                        row['id'], minhash_signature(self._candidate_skill_names(row)), replace=False)
+                self.conn.commit()
+                total += len(rows)
+                last_id = rows[-1]['id']
+            return total
+        except Exception as e:
+            print(f"Error backfilling MinHash signatures: {e}")
+            self.conn.rollback()
+            return total
+    
+    def backfill_skill_ids(self, batch_size=500):
+        """
+        Assign skill IDs and candidate_skills rows to candidates and positions that predate them.
+        
+        Returns:
+            Tuple of (candidates updated, positions updated)
+        """
+        candidates = positions = 0
+        try:
+            while True:
+                self._execute(
+                    "SELECT id, skills, normalized_skills FROM candidates WHERE skill_ids IS NULL "
+                    "ORDER BY id LIMIT %s", (batch_size,))
+                rows = [self._convert_from_db_row(row) for row in self.cursor.fetchall()]
+                if not rows:
+                    break
+                self._ensure_skills({name for row in rows for name in self._candidate_skill_names(row)})
+                for row in rows:
+                    skill_ids = self._skill_ids(self._candidate_skill_names(row))
+                    self._execute("UPDATE candidates SET skill_ids = %s WHERE id = %s",
+                                  (json.dumps(skill_ids), row['id']))
+                    self._replace_candidate_skills(row['id'], skill_ids)
+                self.conn.commit()
+                candidates += len(rows)
+            
+            self._execute("SELECT id, required_skills FROM positions WHERE required_skill_ids IS NULL")
+            for row in [self._convert_from_db_row(row) for row in self.cursor.fetchall()]:
+                skill_ids = self._skill_ids(normalize_skills(row.get('required_skills')))
+                self._execute("UPDATE positions SET required_skill_ids = %s WHERE id = %s",
+                              (json.dumps(skill_ids), row['id']))
+                positions += 1
+            self.conn.commit()
+            return candidates, positions
+        except Exception as e:
+            print(f"Error backfilling skill IDs: {e}")
+            self.conn.rollback()
+            return candidates, positions
+    
+    def backfill_dedup_keys(self, batch_size=500):
+        """
+        Assign dedup keys to candidates created before keys existed.
+        
+        Rows are visited newest first; an older row whose key is already taken
+        is a duplicate and is deleted. Callers should rebuild position_stats
+        afterwards if anything was removed.
+        
+        Returns:
+            Tuple of (keys assigned, duplicates deleted)
+        """
+        assigned = deleted = 0
+        try:
+            while True:
+                self._execute(
+                    "SELECT id, email, position FROM candidates WHERE dedup_key IS NULL "
+                    "ORDER BY id DESC LIMIT %s", (batch_size,))
+                rows = self.cursor.fetchall()
+                if not rows:
+                    break
+                
+                keys = {row['id']: candidate_dedup_key(row['email'], row['position']) for row in rows}
+                distinct_keys = tuple(set(keys.values()))
+                placeholders = ", ".join(["%s"] * len(distinct_keys))
+                self._execute(
+                    f"SELECT dedup_key FROM candidates WHERE dedup_key IN ({placeholders})", distinct_keys)
+                taken = {row['dedup_key'] for row in self.cursor.fetchall()}
+                
+                updates, duplicates = [], []
+                for candidate_id, key in keys.items():
+                    if key in taken:
+                        duplicates.append((candidate_id,))
+                    else:
+                        taken.add(key)
+                        updates.append((key, candidate_id))
+                
+                if updates:
+                    self._executemany("UPDATE candidates SET dedup_key = %s WHERE id = %s", updates)
+                if duplicates:
+                    self._delete_candidate_rows([candidate_id for candidate_id, in duplicates])
+                self.conn.commit()
+                assigned += len(updates)
+                deleted += len(duplicates)
+            return assigned, deleted
+        except Exception as e:
+            print(f"Error backfilling dedup keys: {e}")
+            self.conn.rollback()
+            return assigned, deleted
+    
     def update_candidate_status(self, id, status):
         """Update a candidate's status."""
         try:
-            self.cursor.execute("UPDATE candidates SET status = %s WHERE id = %s", (status, id))
+            self._execute(
+                f"SELECT position, status FROM candidates WHERE id = %s{self.dialect.for_update()}", (id,))
+            current = self.cursor.fetchone()
+            if not current:
+                self.conn.rollback()
+                return None
+            
+            self._execute("UPDATE candidates SET status = %s WHERE id = %s", (status, id))
+            if current['status'] != status:
+                delta = {}
+                if current['status'] in CANDIDATE_STATUSES:
+                    delta[f"{current['status']}_count"] = -1
+                if status in CANDIDATE_STATUSES:
+                    delta[f"{status}_count"] = 1
+                self._apply_position_stats_delta(current['position'], delta)
             self.conn.commit()
             return self.get_candidate_by_id(id)
         except Exception as e:
             print(f"Error updating candidate status: {e}")
+            self.conn.rollback()
             return None
     
     def update_candidate_notes(self, id, notes):
         """Update a candidate's notes."""
         try:
-            self.cursor.execute("UPDATE candidates SET notes = %s WHERE id = %s", (notes, id))
+            self._execute("UPDATE candidates SET notes = %s WHERE id = %s", (notes, id))
             self.conn.commit()
             return self.get_candidate_by_id(id)
         except Exception as e:
             print(f"Error updating candidate notes: {e}")
+            self.conn.rollback()
+            return None
+    
+    def bulk_update_candidates(self, updates):
+        """
+        Apply many status and notes changes in one transaction and one UPDATE.
+        
+        Args:
+            updates: List of dicts with id and at least one of status or notes;
+                     later entries win when an ID repeats
+            
+        Returns:
+            List of updated candidates, or None on error. IDs that do not
+            exist are left out.
+        """
+        if not updates:
+            return []
+        
+        changes = {}
+        for update in updates:
+            changes.setdefault(update['id'], {}).update(
+                {field: update[field] for field in ('status', 'notes') if field in update})
+        ids = tuple(changes.keys())
+        id_placeholders = ", ".join(["%s"] * len(ids))
+        
+        try:
+            self._execute(
+                f"SELECT id, position, status FROM candidates WHERE id IN ({id_placeholders})"
+                f"{self.dialect.for_update()}", ids)
+            current = {row['id']: row for row in self.cursor.fetchall()}
+            if not current:
+                self.conn.rollback()
+                return []
+            
+            # One CASE expression per column, so the whole batch is a single statement
+            assignments, params = [], []
+            for field in ('status', 'notes'):
+                cases = [(candidate_id, change[field]) for candidate_id, change in changes.items()
+                         if field in change and candidate_id in current]
+                if not cases:
+                    continue
+                assignments.append(
+                    f"{field} = CASE id {' '.join(['WHEN %s THEN %s'] * len(cases))} ELSE {field} END")
+                for case in cases:
+                    params.extend(case)
+            
+            found = tuple(current.keys())
+            query = (f"UPDATE candidates SET {', '.join(assignments)} "
+                     f"WHERE id IN ({', '.join(['%s'] * len(found))})")
+            params.extend(found)
+            
+            if self.dialect.supports_returning:
+                self._execute(query + " RETURNING *", tuple(params))
+                rows = self.cursor.fetchall()
+            else:
+                self._execute(query, tuple(params))
+                self._execute(f"SELECT * FROM candidates WHERE id IN ({', '.join(['%s'] * len(found))})", found)
+                rows = self.cursor.fetchall()
+            
+            # Net status moves per position
+            deltas = {}
+            for candidate_id, row in current.items():
+                new_status = changes[candidate_id].get('status', row['status'])
+                if new_status == row['status']:
+                    continue
+                delta = deltas.setdefault(row['position'], {})
+                if row['status'] in CANDIDATE_STATUSES:
+                    delta[f"{row['status']}_count"] = delta.get(f"{row['status']}_count", 0) - 1
+                if new_status in CANDIDATE_STATUSES:
+                    delta[f"{new_status}_count"] = delta.get(f"{new_status}_count", 0) + 1
+            for position, delta in deltas.items():
+                self._apply_position_stats_delta(position, {c: v for c, v in delta.items() if v})
+            
+            self.conn.commit()
+            return [self._convert_candidate_row(row) for row in rows]
+        except Exception as e:
+            print(f"Error bulk updating candidates: {e}")
+            self.conn.rollback()
             return None
     
+    # Position statistics operations
+    @staticmethod
+    def _score_bucket(score):
+        """Return the histogram bucket index for a score."""
+        return min(max(int(score) // 10, 0), SCORE_BUCKETS - 1)
+    
+    def _candidate_stats_delta(self, status, score, sign):
+        """Build the position_stats column deltas for adding (sign=1) or removing (sign=-1) a candidate."""
+        delta = {'total_candidates': sign}
+        if status in CANDIDATE_STATUSES:
+            delta[f"{status}_count"] = sign
+        if score is not None:
+            delta['score_total'] = sign * int(score)
+            delta['scored_count'] = sign
+            delta[f"score_bucket_{self._score_bucket(score)}"] = sign
+        return delta
+    
+    def _apply_position_stats_delta(self, position, delta):
+        """
+        Add column deltas to a position's aggregate row, creating it if needed.
+        
+        Runs on the current transaction; the caller commits.
+        """
+        if not delta:
+            return
+        
+        columns = tuple(delta.keys())
+        query = self.dialect.upsert('position_stats', ('position',) + columns, ('position',), increment=columns)
+        self._execute(query, (position,) + tuple(delta.values()))
+    
+    @read_only
+    def get_position_stats(self):
+        """Get the aggregate row for every position."""
+        try:
+            self._execute("SELECT * FROM position_stats ORDER BY position")
+            rows = self.cursor.fetchall()
+            return [self._convert_from_db_row(row) for row in rows]
+        except Exception as e:
+            print(f"Error getting position stats: {e}")
+            return []
+    
+    def rebuild_position_stats(self):
+        """Recompute position_stats from the candidates table, repairing any drift."""
+        try:
+            self._rebuild_position_stats()
+            self.conn.commit()
+            return True
+        except Exception as e:
+            print(f"Error rebuilding position stats: {e}")
+            self.conn.rollback()
+            return False
+    
+    def _rebuild_position_stats(self, position=None):
+        """Recompute position_stats, or only one position's row, on the current transaction."""
+        status_columns = [f"{status}_count" for status in CANDIDATE_STATUSES]
+        bucket_columns = [f"score_bucket_{i}" for i in range(SCORE_BUCKETS)]
+        
+        status_exprs = [f"SUM(CASE WHEN status = '{status}' THEN 1 ELSE 0 END)"
+                        for status in CANDIDATE_STATUSES]
+        bucket_exprs = []
+        for i in range(SCORE_BUCKETS):
+            conditions = ["score IS NOT NULL"]
+            if i > 0:
+                conditions.append(f"score >= {i * 10}")
+            if i < SCORE_BUCKETS - 1:
+                conditions.append(f"score < {(i + 1) * 10}")
+            bucket_exprs.append(f"SUM(CASE WHEN {' AND '.join(conditions)} THEN 1 ELSE 0 END)")
+        
+        columns = ["position", "total_candidates"] + status_columns + ["score_total", "scored_count"] + bucket_columns
+        exprs = ["position", "COUNT(*)"] + status_exprs + ["COALESCE(SUM(score), 0)", "COUNT(score)"] + bucket_exprs
+        
+        where, params = ("", ()) if position is None else (" WHERE position = %s", (position,))
+        self._execute(f"DELETE FROM position_stats{where}", params)
+        self._execute(
+            f"INSERT INTO position_stats ({', '.join(columns)}) "
+            f"SELECT {', '.join(exprs)} FROM candidates{where} GROUP BY position", params)
+    
     # Position operations
+    @read_only
     def get_all_positions(self):
         """Get all positions."""
         try:
-            self.cursor.execute("SELECT * FROM positions")
+            self._execute("SELECT * FROM positions")
             rows = self.cursor.fetchall()
             return [self._convert_from_db_row(row) for row in rows]
         except Exception as e:
             print(f"Error getting positions: {e}")
             return []
     
+    @read_only
     def get_active_positions(self):
         """Get active positions."""
         try:
-            self.cursor.execute("SELECT * FROM positions WHERE status = 'active'")
+            self._execute("SELECT * FROM positions WHERE status = 'active'")
             rows = self.cursor.fetchall()
             return [self._convert_from_db_row(row) for row in rows]
         except Exception as e:
             print(f"Error getting active positions: {e}")
             return []
     
+    @read_only
     def get_position_by_id(self, id):
         """Get a position by ID."""
         try:
             print(f"Fetching position with ID: {id}")
-            self.cursor.execute("SELECT * FROM positions WHERE id = %s", (id,))
+            self._execute("SELECT * FROM positions WHERE id = %s", (id,))
             row = self.cursor.fetchone()
             print(f"Query result: {row}")
             result = self._convert_from_db_row(row)
@@ -377,10 +1977,11 @@ class Database:
             traceback.print_exc()
             return None
     
+    @read_only
     def get_position_by_title(self, title):
         """Get a position by title."""
         try:
-            self.cursor.execute("SELECT * FROM positions WHERE title = %s", (title,))
+            self._execute("SELECT * FROM positions WHERE title = %s", (title,), prepare=True)
             row = self.cursor.fetchone()
             return self._convert_from_db_row(row)
         except Exception as e:
@@ -392,23 +1993,9 @@ class Database:
         try:
             # Format data for database
             data = self._handle_json_fields(position)
+            data['required_skill_ids'] = json.dumps(self._skill_ids(normalize_skills(position.get('required_skills'))))
             
-            # Build SQL statement
-            fields = ", ".join(data.keys())
-            placeholders = ", ".join(["%s"] * len(data))
-            
-            # PostgreSQL needs RETURNING id to get the last inserted ID
-            if self.use_postgres:
-                query = f"INSERT INTO positions ({fields}) VALUES ({placeholders}) RETURNING id"
-                self.cursor.execute(query, tuple(data.values()))
-                result = self.cursor.fetchone()
-                position_id = result['id'] if result else None
-            else:
-                # MySQL or SQLite
-                query = f"INSERT INTO positions ({fields}) VALUES ({placeholders})"
-                self.cursor.execute(query, tuple(data.values()))
-                position_id = self.cursor.lastrowid
-            
+            position_id = self._insert('positions', data)
             self.conn.commit()
             
             # Log for debugging
@@ -425,66 +2012,535 @@ class Database:
             self.conn.rollback()
             return None
     
+    def update_position_score_weights(self, title, weights):
+        """Set the score component weights used for a position's future uploads."""
+        try:
+            self._execute("UPDATE positions SET score_weights = %s WHERE title = %s", (json.dumps(weights), title))
+            self.conn.commit()
+            return self.cursor.rowcount > 0
+        except Exception as e:
+            print(f"Error updating position score weights: {e}")
+            self.conn.rollback()
+            return False
+    
     # Upload operations
-    def get_all_uploads(self):
-        """Get all uploads."""
+    @read_only
+    def get_all_uploads(self, limit=None):
+        """Get all uploads, newest first, optionally capped at limit rows."""
         try:
-            self.cursor.execute("SELECT * FROM uploads ORDER BY processed_at DESC")
+            if limit:
+                self._execute("SELECT * FROM uploads ORDER BY processed_at DESC LIMIT %s", (limit,))
+            else:
+                self._execute("SELECT * FROM uploads ORDER BY processed_at DESC")
             rows = self.cursor.fetchall()
             return [self._convert_from_db_row(row) for row in rows]
         except Exception as e:
             print(f"Error getting uploads: {e}")
             return []
     
+    @read_only
+    def get_upload_by_hash(self, content_hash, position):
+        """Get the most recent completed upload of a file with this content hash for a position."""
+        try:
+            self._execute(
+                "SELECT * FROM uploads WHERE content_hash = %s AND position = %s "
+                "AND (status IS NULL OR status = 'completed') ORDER BY id DESC LIMIT 1",
+                (content_hash, position), prepare=True)
+            row = self.cursor.fetchone()
+            return self._convert_from_db_row(row)
+        except Exception as e:
+            print(f"Error getting upload by hash: {e}")
+            return None
+    
+    def start_upload(self, upload):
+        """
+        Begin a checkpointed upload, or pick up an interrupted one of the same file
+        
+        Args:
+            upload: Dict with filename, position, content_hash and total_records
+            
+        Returns:
+            The upload row, with committed_rows and chunks_committed showing
+            where to resume; False if another request is uploading the same
+            file; None on error
+        """
+        try:
+            now = time.time()
+            self._execute(
+                "SELECT * FROM uploads WHERE content_hash = %s AND position = %s AND status = 'processing' "
+                "ORDER BY id DESC LIMIT 1",
+                (upload['content_hash'], upload['position']))
+            row = self.cursor.fetchone()
+            if row:
+                # Claimed with a conditional update, so of two requests
+                # resuming the same upload only one goes on
+                self._execute(
+                    "UPDATE uploads SET claimed_at = %s "
+                    "WHERE id = %s AND (claimed_at IS NULL OR claimed_at < %s)",
+                    (now, row['id'], now - self.UPLOAD_CLAIM_SECONDS))
+                claimed = self.cursor.rowcount > 0
+                self.conn.commit()
+                if not claimed:
+                    return False
+                return {**self._convert_from_db_row(row), "claimed_at": now}
+            
+            data = self._handle_json_fields({
+                **upload,
+                "status": "processing",
+                "successful_records": 0,
+                "failed_records": 0,
+                "committed_rows": 0,
+                "chunks_committed": 0,
+                "claimed_at": now,
+            })
+            upload_id = self._insert('uploads', data)
+            self.conn.commit()
+            return {**data, "id": upload_id}
+        except Exception as e:
+            print(f"Error starting upload: {e}")
+            self.conn.rollback()
+            return None
+    
+    def commit_upload_chunk(self, upload_id, candidates, committed_rows, written_elsewhere=(0, 0)):
+        """
+        Write one chunk of an upload and advance its checkpoint on the same transaction
+        
+        Either the chunk's candidates and the checkpoint are both committed or
+        neither is, so a resumed upload never skips or repeats a chunk.
+        
+        Args:
+            upload_id: ID returned by start_upload
+            candidates: Processed candidates of the chunk
+            committed_rows: File rows covered once this chunk is committed
+            written_elsewhere: (successful, failed) counts of rows of the chunk
+                               already committed to other databases, e.g. shards
+            
+        Returns:
+            Tuple of (successful, failed), or None if the chunk was rolled back
+        """
+        try:
+            batch_ids = self._write_candidate_batch(candidates)
+            successful = len(batch_ids) + written_elsewhere[0]
+            failed = len(candidates) - len(batch_ids) + written_elsewhere[1]
+            self._execute(
+                "UPDATE uploads SET committed_rows = %s, chunks_committed = chunks_committed + 1, "
+                "successful_records = successful_records + %s, failed_records = failed_records + %s, "
+                "claimed_at = %s WHERE id = %s", (committed_rows, successful, failed, time.time(), upload_id))
+            self.conn.commit()
+            self.detect_duplicates(batch_ids)
+            return successful, failed
+        except Exception as e:
+            print(f"Error committing upload chunk: {e}")
+            self.conn.rollback()
+            return None
+    
+    def commit_candidate_chunk(self, candidates):
+        """
+        Write candidates on one transaction, like one chunk of commit_upload_chunk without the checkpoint
+        
+        Returns:
+            Tuple of (successful, failed), or None if the chunk was rolled back
+        """
+        try:
+            batch_ids = self._write_candidate_batch(candidates)
+            self.conn.commit()
+            self.detect_duplicates(batch_ids)
+            return len(batch_ids), len(candidates) - len(batch_ids)
+        except Exception as e:
+            print(f"Error committing candidate chunk: {e}")
+            self.conn.rollback()
+            return None
+    
+    def release_upload(self, upload_id):
+        """Drop the claim on an interrupted upload so the next upload of the file resumes it at once."""
+        try:
+            self._execute("UPDATE uploads SET claimed_at = NULL WHERE id = %s", (upload_id,))
+            self.conn.commit()
+            return True
+        except Exception as e:
+            print(f"Error releasing upload: {e}")
+            self.conn.rollback()
+            return False
+    
+    def complete_upload(self, upload_id, fields):
+        """Mark a checkpointed upload as completed, recording fields such as processed_at and timings."""
+        try:
+            data = self._handle_json_fields({**fields, "status": "completed", "claimed_at": None})
+            assignments = ", ".join(f"{column} = %s" for column in data)
+            self._execute(f"UPDATE uploads SET {assignments} WHERE id = %s", (*data.values(), upload_id))
+            self.conn.commit()
+            self._execute("SELECT * FROM uploads WHERE id = %s", (upload_id,))
+            return self._convert_from_db_row(self.cursor.fetchone())
+        except Exception as e:
+            print(f"Error completing upload: {e}")
+            self.conn.rollback()
+            return None
+    
     def create_upload(self, upload):
-        """Create a new upload record."""
+        """Create a new upload record, queued on the write-behind buffer when there is one."""
         try:
             # Format data for database
             data = self._handle_json_fields(upload)
+            if self.write_behind:
+                try:
+                    self.write_behind.add('uploads', data)
+                    return True
+                except WriteBehindUnavailable:
+                    self.write_behind.write_queued(self)
             
-            # Build SQL statement
-            fields = ", ".join(data.keys())
-            placeholders = ", ".join(["%s"] * len(data))
-            
-            query = f"INSERT INTO uploads ({fields}) VALUES ({placeholders})"
-            
-            # Execute the query
-            self.cursor.execute(query, tuple(data.values()))
+            self._insert('uploads', data)
             self.conn.commit()
             
             return True
         except Exception as e:
             print(f"Error creating upload: {e}")
+            self.conn.rollback()
             return False
     
     # Notification operations
-    def get_all_notifications(self):
-        """Get all notifications."""
+    @read_only
+    def get_all_notifications(self, limit=None):
+        """Get all notifications, newest first, optionally capped at limit rows."""
         try:
-            self.cursor.execute("SELECT * FROM notifications ORDER BY created_at DESC")
+            if limit:
+                self._execute("SELECT * FROM notifications ORDER BY created_at DESC LIMIT %s", (limit,))
+            else:
+                self._execute("SELECT * FROM notifications ORDER BY created_at DESC")
             rows = self.cursor.fetchall()
             return [self._convert_from_db_row(row) for row in rows]
         except Exception as e:
             print(f"Error getting notifications: {e}")
             return []
     
+    @read_only
+    def get_notifications_since(self, since_id, limit=100):
+        """Get notifications with an ID greater than since_id, oldest first."""
+        try:
+            self._execute(
+                "SELECT * FROM notifications WHERE id > %s ORDER BY id LIMIT %s", (since_id, limit),
+                prepare=True)
+            rows = self.cursor.fetchall()
+            return [self._convert_from_db_row(row) for row in rows]
+        except Exception as e:
+            print(f"Error getting notifications since {since_id}: {e}")
+            return []
+    
+    @read_only
+    def get_unread_notification_count(self):
+        """Count unread notifications using the index on the read flag."""
+        try:
+            self._execute(
+                f"SELECT COUNT(*) AS count FROM notifications WHERE {self.dialect.quote('read')} = %s", (False,),
+                prepare=True)
+            return self.cursor.fetchone()['count']
+        except Exception as e:
+            print(f"Error counting unread notifications: {e}")
+            return 0
+    
     def create_notification(self, notification):
-        """Create a new notification."""
+        """
+        Create a new notification and publish it to live subscribers.
+        
+        With a write-behind buffer the insert is queued, and the notification
+        is published once its batch commits.
+        """
         try:
             # Format data for database
             data = self._handle_json_fields(notification)
+            if self.write_behind:
+                try:
+                    self.write_behind.add('notifications', data,
+                                          lambda notification_id: broker.publish({**notification, "id": notification_id}))
+                    return True
+                except WriteBehindUnavailable:
+                    # The writer failed; insert on this request instead
+                    self.write_behind.write_queued(self)
             
-            # Build SQL statement
-            fields = ", ".join(data.keys())
-            placeholders = ", ".join(["%s"] * len(data))
-            
-            query = f"INSERT INTO notifications ({fields}) VALUES ({placeholders})"
-            
-            # Execute the query
-            self.cursor.execute(query, tuple(data.values()))
+            notification_id = self._insert('notifications', data)
             self.conn.commit()
             
+            broker.publish({**notification, "id": notification_id})
             return True
         except Exception as e:
             print(f"Error creating notification: {e}")
-            return False
\ No newline at end of file
+            self.conn.rollback()
+            return False
+    
+    def insert_rows(self, rows):
+        """
+        Insert rows into any tables on one transaction, e.g. a write-behind batch.
+        
+        Args:
+            rows: List of (table, data), data formatted for the database
+            
+        Returns:
+            The new rows' IDs, or None if the transaction was rolled back
+        """
+        try:
+            ids = [self._insert(table, data) for table, data in rows]
+            self.conn.commit()
+            return ids
+        except Exception as e:
+            print(f"Error inserting batch: {e}")
+            self.conn.rollback()
+            return None
+    
+    def prune_notifications(self, older_than, batch_size=1000):
+        """
+        Delete notifications created before a cutoff, in batches.
+        
+        Each batch is its own short transaction so pruning a large backlog
+        does not hold locks on the table for long.
+        
+        Args:
+            older_than: Cutoff timestamp (datetime or ISO string)
+            batch_size: Maximum rows deleted per transaction
+            
+        Returns:
+            Number of notifications deleted
+        """
+        deleted = 0
+        try:
+            while True:
+                self._execute(
+                    "SELECT id FROM notifications WHERE created_at < %s ORDER BY id LIMIT %s",
+                    (older_than, batch_size))
+                ids = [row['id'] for row in self.cursor.fetchall()]
+                if not ids:
+                    break
+                
+                placeholders = ", ".join(["%s"] * len(ids))
+                self._execute(f"DELETE FROM notifications WHERE id IN ({placeholders})", tuple(ids))
+                self.conn.commit()
+                deleted += len(ids)
+                
+                if len(ids) < batch_size:
+                    break
+            return deleted
+        except Exception as e:
+            print(f"Error pruning notifications: {e}")
+            self.conn.rollback()
+            return deleted
+    
+    # Archive operations
+    # Archived candidates are partitioned by the year of created_at: declarative
+    # partitions of ARCHIVE_TABLE on PostgreSQL, one ARCHIVE_TABLE_<year> table
+    # per year elsewhere. Rows without a date go to ARCHIVE_TABLE_undated.
+    ARCHIVE_TABLE = 'candidates_archive'
+    
+    @staticmethod
+    def _year_of(value):
+        """Year of a date, datetime or ISO string, or None."""
+        if hasattr(value, 'year'):
+            return value.year
+        if isinstance(value, str) and value[:4].isdigit():
+            return int(value[:4])
+        return None
+    
+    def _archive_partition(self, year):
+        return f"{self.ARCHIVE_TABLE}_{year}" if year else f"{self.ARCHIVE_TABLE}_undated"
+    
+    def _archive_partitions(self):
+        """Map each existing archive partition to its year (None for the undated one)."""
+        sql, params = self.dialect.tables_query(self.ARCHIVE_TABLE + '_')
+        partitions = {}
+        for row in self._execute(sql, params).fetchall():
+            name = row['table_name']
+            suffix = name[len(self.ARCHIVE_TABLE) + 1:]
+            if name.startswith(self.ARCHIVE_TABLE + '_') and (suffix.isdigit() or suffix == 'undated'):
+                partitions[name] = int(suffix) if suffix.isdigit() else None
+        return partitions
+    
+    def _ensure_archive_partition(self, year, partitions):
+        """Create the archive partition for a year if it is not in partitions, on the current transaction."""
+        partition = self._archive_partition(year)
+        if partition in partitions:
+            return partition
+        if self.dialect.supports_partitioning:
+            self._execute(
+                f"CREATE TABLE IF NOT EXISTS {self.ARCHIVE_TABLE} (LIKE candidates, archived_at TIMESTAMP) "
+                f"PARTITION BY RANGE (created_at)")
+            if year:
+                self._execute(
+                    f"CREATE TABLE IF NOT EXISTS {partition} PARTITION OF {self.ARCHIVE_TABLE} "
+                    f"FOR VALUES FROM ('{year}-01-01') TO ('{year + 1}-01-01')")
+            else:
+                self._execute(f"CREATE TABLE IF NOT EXISTS {partition} PARTITION OF {self.ARCHIVE_TABLE} DEFAULT")
+            # Indexes on the parent are created on every partition
+            self._create_index(f"idx_{self.ARCHIVE_TABLE}_id", self.ARCHIVE_TABLE, ('id',))
+            self._create_index(f"idx_{self.ARCHIVE_TABLE}_position", self.ARCHIVE_TABLE, ('position',))
+        else:
+            self._execute(self.dialect.copy_table_structure('candidates', partition))
+            self._execute(f"ALTER TABLE {partition} ADD COLUMN archived_at TIMESTAMP")
+            self._create_index(f"idx_{partition}_id", partition, ('id',))
+            self._create_index(f"idx_{partition}_position", partition, ('position',))
+        partitions[partition] = year
+        return partition
+    
+    def _archive_tables(self, partitions, first_year=None, last_year=None):
+        """Tables to read for archived candidates created between two years, inclusive."""
+        if not partitions:
+            return []
+        if self.dialect.supports_partitioning:
+            # The planner prunes partitions from the created_at conditions
+            return [self.ARCHIVE_TABLE]
+        tables = []
+        for table, year in sorted(partitions.items(), key=lambda item: item[0]):
+            if year is None:
+                if first_year is None and last_year is None:
+                    tables.append(table)
+            elif (first_year is None or year >= first_year) and (last_year is None or year <= last_year):
+                tables.append(table)
+        return tables
+    
+    def _upgrade_archive_tables(self, partitions):
+        """Add candidate columns introduced after archive partitions were created."""
+        tables = self._archive_tables(partitions)
+        for table in tables:
+            existing = self._get_table_columns(table)
+            for column, types in self.ADDED_COLUMNS['candidates']:
+                if column not in existing:
+                    self._execute(f"ALTER TABLE {table} ADD COLUMN {column} {types[self.dialect.name]}")
+    
+    def _archived_columns(self, summary):
+        # Partitions created before a column was added have it last, so never SELECT *
+        columns = self.CANDIDATE_SUMMARY_COLUMNS if summary else sorted(self._get_table_columns('candidates'))
+        return ", ".join(columns) + ", archived_at"
+    
+    def archive_candidates(self, active_positions, batch_size=500):
+        """
+        Move candidates of positions that are no longer active to the archive.
+        
+        Each batch is copied to the partitions of its created_at years and
+        deleted from candidates, with its skill, similarity and duplicate
+        rows, on one transaction. position_stats drop the archived rows, so
+        reports cover hot candidates only.
+        
+        Args:
+            active_positions: Titles of the positions whose candidates stay
+            batch_size: Maximum candidates moved per transaction
+            
+        Returns:
+            Number of candidates archived
+        """
+        archived = 0
+        try:
+            partitions = self._archive_partitions()
+            columns = ", ".join(sorted(self._get_table_columns('candidates')))
+            titles = tuple(active_positions)
+            condition = f"position NOT IN ({', '.join(['%s'] * len(titles))})" if titles else "1 = 1"
+            while True:
+                self._execute(
+                    f"SELECT id, position, status, score, created_at FROM candidates "
+                    f"WHERE {condition} ORDER BY id LIMIT %s", titles + (batch_size,))
+                rows = self.cursor.fetchall()
+                if not rows:
+                    break
+                
+                if self.dialect.begin_statement and not self.conn.in_transaction:
+                    self._execute(self.dialect.begin_statement)
+                by_partition = {}
+                for row in rows:
+                    year = self._year_of(row['created_at'])
+                    by_partition.setdefault(self._ensure_archive_partition(year, partitions), []).append(row['id'])
+                for partition, ids in by_partition.items():
+                    # PostgreSQL routes rows from the parent to their partition
+                    target = self.ARCHIVE_TABLE if self.dialect.supports_partitioning else partition
+                    placeholders = ", ".join(["%s"] * len(ids))
+                    self._execute(
+                        f"INSERT INTO {target} ({columns}, archived_at) "
+                        f"SELECT {columns}, CURRENT_TIMESTAMP FROM candidates WHERE id IN ({placeholders})",
+                        tuple(ids))
+                
+                deltas = {}
+                for row in rows:
+                    delta = deltas.setdefault(row['position'], {})
+                    for column, value in self._candidate_stats_delta(row['status'], row['score'], -1).items():
+                        delta[column] = delta.get(column, 0) + value
+                for position, delta in deltas.items():
+                    self._apply_position_stats_delta(position, delta)
+                self._delete_candidate_rows([row['id'] for row in rows])
+                self.conn.commit()
+                archived += len(rows)
+            
+            # Positions whose candidates were all archived leave the reports
+            self._execute("DELETE FROM position_stats WHERE total_candidates <= 0")
+            self.conn.commit()
+            return archived
+        except Exception as e:
+            print(f"Error archiving candidates: {e}")
+            self.conn.rollback()
+            return archived
+    
+    @read_only
+    def get_archived_candidates(self, position=None, created_from=None, created_to=None, summary=False):
+        """
+        Get archived candidates, highest score first.
+        
+        Args:
+            position: Only candidates for this position title
+            created_from: Only candidates created at or after this date
+            created_to: Only candidates created before this date
+            summary: Only CANDIDATE_SUMMARY_COLUMNS and archived_at
+        """
+        try:
+            tables = self._archive_tables(self._archive_partitions(),
+                                          self._year_of(created_from), self._year_of(created_to))
+            if not tables:
+                return []
+            
+            conditions, params = [], []
+            if position:
+                conditions.append("position = %s")
+                params.append(position)
+            if created_from:
+                conditions.append("created_at >= %s")
+                params.append(created_from)
+            if created_to:
+                conditions.append("created_at < %s")
+                params.append(created_to)
+            where = f" WHERE {' AND '.join(conditions)}" if conditions else ""
+            columns = self._archived_columns(summary)
+            
+            selects = [f"SELECT {columns} FROM {table}{where}" for table in tables]
+            # Ordered outside the union, as SQLite only orders compound selects by result columns
+            self._execute(f"SELECT * FROM ({' UNION ALL '.join(selects)}) archived ORDER BY {self.SCORE_ORDER}",
+                          tuple(params) * len(tables))
+            return self._candidate_rows(self.cursor.fetchall(), summary)
+        except Exception as e:
+            print(f"Error getting archived candidates: {e}")
+            return []
+    
+    def _get_archived_candidate(self, id):
+        """Get an archived candidate by ID, or None."""
+        tables = self._archive_tables(self._archive_partitions())
+        columns = self._archived_columns(False)
+        for table in tables:
+            self._execute(f"SELECT {columns} FROM {table} WHERE id = %s", (id,))
+            row = self.cursor.fetchone()
+            if row:
+                return self._convert_candidate_row(row)
+        return None
+    
+    def drop_archive_partitions(self, before_year):
+        """
+        Drop the archive partitions of years before a cutoff, e.g. for retention.
+        
+        Whole partitions are dropped, so no rows are deleted one by one. The
+        undated partition is kept.
+        
+        Returns:
+            Names of the dropped partitions
+        """
+        dropped = []
+        try:
+            for table, year in sorted(self._archive_partitions().items()):
+                if year is not None and year < before_year:
+                    self._execute(f"DROP TABLE {table}")
+                    dropped.append(table)
+            self.conn.commit()
+            return dropped
+        except Exception as e:
+            print(f"Error dropping archive partitions: {e}")
+            self.conn.rollback()
+            return []
@@ -0,0 +1,194 @@
+"""
+Duplicate Detection Service
+
+This module finds candidates that are probably the same person applying
+more than once with small differences in name or email. Comparing every pair
+of candidates is quadratic, so candidates are first grouped into blocks that
+share a cheap key:
+- the normalized email local part
+- a phonetic (Soundex) code of the name
+- the email domain combined with the last name's code
+
+Fuzzy comparison only runs within a block. Blocks are scoped to a position,
+because each candidate row is an application to one position, so only rows
+for the same position can be merged. Matching pairs are clustered into
+duplicate groups with union-find.
+"""
+
+import os
+import re
+import unicodedata
+from collections import defaultdict
+from difflib import SequenceMatcher
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+# Pairs scoring at least this are reported as duplicates
+DUPLICATE_THRESHOLD = float(os.getenv('DUPLICATE_THRESHOLD', 0.85))
+
+# Blocks with more members than this are too unspecific to compare pairwise
+MAX_BLOCK_SIZE = int(os.getenv('DUPLICATE_MAX_BLOCK_SIZE', 200))
+
+_SOUNDEX_CODES = {
+    **dict.fromkeys('bfpv', '1'), **dict.fromkeys('cgjkqsxz', '2'),
+    **dict.fromkeys('dt', '3'), 'l': '4', **dict.fromkeys('mn', '5'), 'r': '6',
+}
+
+def soundex(word: str) -> str:
+    """
+    American Soundex code of a word, e.g. "Robert" and "Rupert" are both R163
+
+    Args:
+        word: Name token; non-letters are ignored
+
+    Returns:
+        Four-character code, or an empty string if the word has no letters
+    """
+    letters = [c for c in word.lower() if 'a' <= c <= 'z']
+    if not letters:
+        return ''
+    code = [letters[0].upper()]
+    previous = _SOUNDEX_CODES.get(letters[0], '')
+    for letter in letters[1:]:
+        digit = _SOUNDEX_CODES.get(letter, '')
+        if digit and digit != previous:
+            code.append(digit)
+        if letter not in 'hw':
+            # Vowels separate repeated codes; h and w do not
+            previous = digit
+    return (''.join(code) + '000')[:4]
+
+def normalize_name(name: Any) -> List[str]:
+    """Lowercase a name, strip accents and punctuation, and split it into tokens."""
+    text = unicodedata.normalize('NFKD', str(name or '')).encode('ascii', 'ignore').decode('ascii')
+    return re.sub(r"[^a-z\s]", ' ', text.lower()).split()
+
+def split_email(email: Any) -> Tuple[str, str]:
+    """
+    Normalize an email into (local part, domain)
+
+    The local part drops "+tag" suffixes and dots, so j.smith+jobs@x.com and
+    jsmith@x.com normalize the same.
+    """
+    email = str(email or '').strip().lower()
+    local, _, domain = email.partition('@')
+    local = local.split('+', 1)[0].replace('.', '')
+    return local, domain
+
+def position_key(position: Any) -> str:
+    return ' '.join(str(position or '').lower().split())
+
+def blocking_keys(candidate: Dict[str, Any]) -> List[str]:
+    """
+    Blocking keys of a candidate; candidates sharing a key are compared
+
+    Args:
+        candidate: Dict with name, email and position
+
+    Returns:
+        Keys prefixed by their kind, each scoped to the candidate's position
+    """
+    position = position_key(candidate.get('position'))
+    tokens = normalize_name(candidate.get('name'))
+    local, domain = split_email(candidate.get('email'))
+
+    keys = []
+    if local:
+        keys.append(f"email:{local}")
+    if tokens:
+        # Sorted, so "Smith John" and "John Smith" share a key
+        codes = sorted({soundex(tokens[0]), soundex(tokens[-1])})
+        keys.append(f"name:{'|'.join(codes)}")
+        if domain:
+            keys.append(f"domain:{domain}|{soundex(tokens[-1])}")
+    return [f"{position}#{key}"[:255] for key in keys]
+
+def match_score(a: Dict[str, Any], b: Dict[str, Any]) -> float:
+    """
+    Score how likely two candidates are the same person
+
+    Args:
+        a, b: Dicts with name and email
+
+    Returns:
+        1.0 when the normalized emails are equal, otherwise a 0-1 blend of
+        name similarity (60%) and email local part similarity (40%)
+    """
+    local_a, domain_a = split_email(a.get('email'))
+    local_b, domain_b = split_email(b.get('email'))
+    if local_a and (local_a, domain_a) == (local_b, domain_b):
+        return 1.0
+
+    name_a = ' '.join(sorted(normalize_name(a.get('name'))))
+    name_b = ' '.join(sorted(normalize_name(b.get('name'))))
+    name_similarity = SequenceMatcher(None, name_a, name_b).ratio() if name_a and name_b else 0.0
+    local_similarity = SequenceMatcher(None, local_a, local_b).ratio() if local_a and local_b else 0.0
+    return round(0.6 * name_similarity + 0.4 * local_similarity, 3)
+
+def find_duplicate_pairs(candidates: Iterable[Dict[str, Any]], new_ids: Optional[Set[int]] = None,
+                         threshold: float = DUPLICATE_THRESHOLD) -> List[Tuple[int, int, float]]:
+    """
+    Compare candidates within their blocks and return the pairs that match
+
+    Args:
+        candidates: Dicts with id, name, email and position
+        new_ids: When given, only pairs involving one of these IDs are
+                 compared, for incremental runs over an upload batch
+        threshold: Minimum match_score of a duplicate pair
+
+    Returns:
+        List of (lower ID, higher ID, score)
+    """
+    by_id = {}
+    blocks = defaultdict(list)
+    for candidate in candidates:
+        by_id[candidate['id']] = candidate
+        for key in blocking_keys(candidate):
+            blocks[key].append(candidate['id'])
+
+    compared = set()
+    pairs = []
+    for key, members in blocks.items():
+        if len(members) < 2:
+            continue
+        if len(members) > MAX_BLOCK_SIZE:
+            print(f"Skipping duplicate block {key!r} with {len(members)} candidates")
+            continue
+        for i, first in enumerate(members):
+            for second in members[i + 1:]:
+                pair = (min(first, second), max(first, second))
+                if pair in compared:
+                    continue
+                if new_ids is not None and first not in new_ids and second not in new_ids:
+                    continue
+                compared.add(pair)
+                score = match_score(by_id[first], by_id[second])
+                if score >= threshold:
+                    pairs.append((*pair, score))
+    return pairs
+
+def cluster_pairs(pairs: Iterable[Tuple[int, int, float]]) -> List[List[int]]:
+    """
+    Group duplicate pairs into clusters with union-find
+
+    Returns:
+        Sorted lists of candidate IDs, one per group of two or more
+    """
+    parent: Dict[int, int] = {}
+
+    def find(x):
+        parent.setdefault(x, x)
+        while parent[x] != x:
+            # Path halving keeps the trees shallow
+            parent[x] = parent[parent[x]]
+            x = parent[x]
+        return x
+
+    for first, second, _ in pairs:
+        root_first, root_second = find(first), find(second)
+        if root_first != root_second:
+            parent[max(root_first, root_second)] = min(root_first, root_second)
+
+    groups = defaultdict(list)
+    for member in parent:
+        groups[find(member)].append(member)
+    return sorted(sorted(members) for members in groups.values() if len(members) > 1)
@@ -0,0 +1,231 @@
+"""
+SQL Dialect Service
+
+This module hides the differences between the PostgreSQL, MySQL and SQLite
+backends supported by Database. Queries are written once with %s
+placeholders; each dialect generates INSERT/upsert statements for a table and
+column list and compiles queries to its driver's parameter style. Generated
+and compiled statements are cached by shape, so hot paths do not rebuild SQL
+strings on every call.
+"""
+
+import hashlib
+import sqlite3
+from functools import lru_cache
+from typing import List, Optional, Tuple
+
+# Size of the per-dialect compiled statement caches
+STATEMENT_CACHE_SIZE = 512
+
+@lru_cache(maxsize=STATEMENT_CACHE_SIZE)
+def number_placeholders(sql: str) -> str:
+    """Rewrite %s placeholders as PostgreSQL's numbered $1, $2, ... parameters."""
+    parts = sql.split('%s')
+    numbered = [parts[0]]
+    for i, part in enumerate(parts[1:], start=1):
+        numbered.append(f"${i}{part}")
+    return "".join(numbered)
+
+class Dialect:
+    """Base class describing one SQL backend."""
+
+    name = None
+    placeholder = '%s'
+    supports_returning = False
+    supports_prepared_statements = False
+    reserved_words = frozenset()
+    # Statement that opens a transaction explicitly, where the driver does not do it for SAVEPOINT
+    begin_statement = None
+    # Declarative range partitioning, where the database routes rows and prunes partitions itself
+    supports_partitioning = False
+
+    def quote(self, identifier: str) -> str:
+        """Quote an identifier if it is a reserved word in this dialect."""
+        return identifier
+
+    @lru_cache(maxsize=STATEMENT_CACHE_SIZE)
+    def compile(self, sql: str) -> str:
+        """Convert a query written with %s placeholders to the driver's parameter style."""
+        if self.placeholder == '%s':
+            return sql
+        return sql.replace('%s', self.placeholder)
+
+    def for_update(self) -> str:
+        """Row-locking suffix for SELECTs that precede an update in the same transaction."""
+        return " FOR UPDATE"
+
+    @lru_cache(maxsize=STATEMENT_CACHE_SIZE)
+    def insert(self, table: str, columns: Tuple[str, ...], returning: Optional[str] = None) -> str:
+        """
+        Build an INSERT statement for a table and column list
+
+        Args:
+            table: Table name
+            columns: Column names, in parameter order
+            returning: Column to return, only used when the dialect supports RETURNING
+
+        Returns:
+            SQL with %s placeholders
+        """
+        fields = ", ".join(self.quote(column) for column in columns)
+        placeholders = ", ".join(["%s"] * len(columns))
+        sql = f"INSERT INTO {table} ({fields}) VALUES ({placeholders})"
+        if returning and self.supports_returning:
+            sql += f" RETURNING {returning}"
+        return sql
+
+    @lru_cache(maxsize=STATEMENT_CACHE_SIZE)
+    def upsert(self, table: str, columns: Tuple[str, ...], conflict_columns: Tuple[str, ...],
+               replace: Tuple[str, ...] = (), increment: Tuple[str, ...] = ()) -> str:
+        """
+        Build an INSERT that updates the existing row on a unique-key conflict
+
+        Args:
+            table: Table name
+            columns: Column names, in parameter order
+            conflict_columns: Columns of the unique index that detects the conflict
+            replace: Columns overwritten with the inserted value
+            increment: Columns increased by the inserted value
+
+        Returns:
+            SQL with %s placeholders
+        """
+        fields = ", ".join(self.quote(column) for column in columns)
+        placeholders = ", ".join(["%s"] * len(columns))
+        assignments = ([f"{c} = excluded.{c}" for c in replace] +
+                       [f"{c} = {table}.{c} + excluded.{c}" for c in increment])
+        if not assignments:
+            # Still a no-op update, so the statement does not fail on conflict
+            assignments = [f"{conflict_columns[0]} = excluded.{conflict_columns[0]}"]
+        return (f"INSERT INTO {table} ({fields}) VALUES ({placeholders}) "
+                f"ON CONFLICT ({', '.join(conflict_columns)}) DO UPDATE SET {', '.join(assignments)}")
+
+    def table_columns_query(self, table: str) -> Tuple[str, tuple]:
+        """Return a query and parameters listing a table's columns as column_name."""
+        return ("SELECT column_name AS column_name FROM information_schema.columns "
+                "WHERE table_name = %s", (table,))
+
+    def index_exists_query(self, table: str, name: str) -> Optional[Tuple[str, tuple]]:
+        """Return a query counting indexes with this name, or None if CREATE INDEX IF NOT EXISTS works."""
+        return None
+
+    def drop_index(self, table: str, name: str) -> str:
+        """Return a statement dropping an index; run it only if the index exists where there is no IF EXISTS."""
+        return f"DROP INDEX IF EXISTS {name}"
+
+    def tables_query(self, prefix: str) -> Tuple[str, tuple]:
+        """Return a query and parameters listing tables whose names start with prefix as table_name."""
+        # _ is a LIKE wildcard; callers check the prefix again
+        return ("SELECT table_name AS table_name FROM information_schema.tables "
+                "WHERE table_schema = current_schema() AND table_name LIKE %s", (prefix + '%',))
+
+    def copy_table_structure(self, source: str, table: str) -> str:
+        """Return a statement creating an empty table with the columns, but not the keys or indexes, of source."""
+        return f"CREATE TABLE IF NOT EXISTS {table} AS SELECT * FROM {source} WHERE 1 = 0"
+
+    def clear_tables(self, tables: Tuple[str, ...]) -> List[str]:
+        """Return statements deleting every row of the tables."""
+        return [f"DELETE FROM {table}" for table in tables]
+
+    def reset_id_sequence(self, table: str) -> Optional[str]:
+        """Return a statement moving a table's id sequence past its rows after a bulk load, if one is needed."""
+        return None
+
+class PostgresDialect(Dialect):
+    name = 'postgres'
+    supports_returning = True
+    supports_partitioning = True
+    supports_prepared_statements = True
+
+    @lru_cache(maxsize=STATEMENT_CACHE_SIZE)
+    def prepare(self, sql: str) -> Tuple[str, str, int]:
+        """
+        Build a server-side prepared statement for a query
+
+        Args:
+            sql: Query written with %s placeholders
+
+        Returns:
+            Tuple of (statement name, PREPARE statement, number of parameters)
+        """
+        name = "stmt_" + hashlib.sha1(sql.encode('utf-8')).hexdigest()[:16]
+        return name, f"PREPARE {name} AS {number_placeholders(sql)}", sql.count('%s')
+
+    def execute_prepared(self, name: str, count: int) -> str:
+        """Return the EXECUTE statement for a prepared statement with count parameters."""
+        if not count:
+            return f"EXECUTE {name}"
+        return f"EXECUTE {name} ({', '.join(['%s'] * count)})"
+
+    def clear_tables(self, tables: Tuple[str, ...]) -> List[str]:
+        # TRUNCATE skips the per-row work of DELETE and stays transactional
+        return [f"TRUNCATE {', '.join(tables)}"]
+
+    def reset_id_sequence(self, table: str) -> Optional[str]:
+        # Explicit ids do not advance SERIAL sequences
+        return (f"SELECT setval(pg_get_serial_sequence('{table}', 'id'), COALESCE(MAX(id), 1), "
+                f"MAX(id) IS NOT NULL) FROM {table}")
+
+class MySQLDialect(Dialect):
+    # MySQL Connector's prepared cursors only keep the last statement, which
+    # gains nothing when hot queries alternate, so MySQL uses the text protocol
+    name = 'mysql'
+    reserved_words = frozenset({'read'})
+
+    def quote(self, identifier: str) -> str:
+        if identifier in self.reserved_words:
+            return f"`{identifier}`"
+        return identifier
+
+    @lru_cache(maxsize=STATEMENT_CACHE_SIZE)
+    def upsert(self, table: str, columns: Tuple[str, ...], conflict_columns: Tuple[str, ...],
+               replace: Tuple[str, ...] = (), increment: Tuple[str, ...] = ()) -> str:
+        fields = ", ".join(self.quote(column) for column in columns)
+        placeholders = ", ".join(["%s"] * len(columns))
+        assignments = ([f"{c} = VALUES({c})" for c in replace] +
+                       [f"{c} = {c} + VALUES({c})" for c in increment])
+        if not assignments:
+            assignments = [f"{conflict_columns[0]} = {conflict_columns[0]}"]
+        return (f"INSERT INTO {table} ({fields}) VALUES ({placeholders}) "
+                f"ON DUPLICATE KEY UPDATE {', '.join(assignments)}")
+
+    def table_columns_query(self, table: str) -> Tuple[str, tuple]:
+        return ("SELECT column_name AS column_name FROM information_schema.columns "
+                "WHERE table_schema = DATABASE() AND table_name = %s", (table,))
+
+    def index_exists_query(self, table: str, name: str) -> Optional[Tuple[str, tuple]]:
+        # MySQL has no CREATE INDEX IF NOT EXISTS
+        return ("SELECT COUNT(*) AS count FROM information_schema.statistics "
+                "WHERE table_schema = DATABASE() AND table_name = %s AND index_name = %s",
+                (table, name))
+
+    def drop_index(self, table: str, name: str) -> str:
+        return f"DROP INDEX {name} ON {table}"
+
+    def tables_query(self, prefix: str) -> Tuple[str, tuple]:
+        return ("SELECT table_name AS table_name FROM information_schema.tables "
+                "WHERE table_schema = DATABASE() AND table_name LIKE %s", (prefix + '%',))
+
+class SQLiteDialect(Dialect):
+    # The sqlite3 driver keeps its own per-connection prepared statement cache
+    name = 'sqlite'
+    placeholder = '?'
+    # RETURNING was added in SQLite 3.35
+    supports_returning = sqlite3.sqlite_version_info >= (3, 35, 0)
+    # The sqlite3 driver only opens transactions before DML; a SAVEPOINT
+    # outside one would start its own and commit on RELEASE
+    begin_statement = "BEGIN"
+
+    def for_update(self) -> str:
+        # SQLite locks the whole database for writes; there is no row locking
+        return ""
+
+    def table_columns_query(self, table: str) -> Tuple[str, tuple]:
+        return f"SELECT name AS column_name FROM pragma_table_info('{table}')", ()
+
+    def tables_query(self, prefix: str) -> Tuple[str, tuple]:
+        return "SELECT name AS table_name FROM sqlite_master WHERE type = 'table' AND name LIKE %s", (prefix + '%',)
+
+POSTGRES = PostgresDialect()
+MYSQL = MySQLDialect()
+SQLITE = SQLiteDialect()
@@ -0,0 +1,226 @@
+"""
+Ingest Service
+
+This module holds the upload pipeline shared by the Flask routes, the ASGI
+app and the bulk import CLI: parsing and scoring an uploaded file (CPU-bound,
+safe to run in a worker process) and persisting the scored candidates with
+their upload record and notification. Each run can be measured with an
+UploadMetrics, whose timings and peak memory are stored on the upload record.
+
+Candidates are committed in chunks of UPLOAD_CHUNK_ROWS file rows. Each
+chunk is committed on the same transaction as the upload's checkpoint (the
+number of rows committed so far), and the upload is marked completed after
+the last chunk. When an upload fails part way, importing the same file for
+the same position again resumes after the last committed chunk.
+"""
+
+import os
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+import pandas as pd
+
+from backend.services.cv_processing import process_cv_data
+from backend.services.parsers import parse_upload
+from backend.services.upload_metrics import UploadMetrics
+
+# Columns every uploaded file must provide
+REQUIRED_HEADERS = ['name', 'email', 'skills']
+
+# File rows scored and committed per checkpointed chunk
+UPLOAD_CHUNK_ROWS = int(os.getenv('UPLOAD_CHUNK_ROWS', 2000))
+
+class InvalidUploadError(ValueError):
+    """Raised when an uploaded file parses but cannot be imported."""
+
+class UploadInterruptedError(RuntimeError):
+    """Raised when an upload stops part way; importing the same file again resumes it."""
+
+class UploadInProgressError(RuntimeError):
+    """Raised when another request is already uploading the same file for the position."""
+
+def parse_frame(filename: str, data: bytes, metrics: Optional[UploadMetrics] = None) -> pd.DataFrame:
+    """
+    Parse an uploaded file and check it has the required columns
+
+    Args:
+        filename: Uploaded file name, used to select the parser
+        data: Raw file content
+        metrics: Records the parse stage when given
+
+    Returns:
+        DataFrame with one row per candidate
+    """
+    metrics = metrics or UploadMetrics()
+    with metrics.stage('parse'):
+        df = parse_upload(filename, data)
+
+    missing_headers = [h for h in REQUIRED_HEADERS if h not in df.columns]
+    if missing_headers:
+        raise InvalidUploadError(f"File is missing required headers: {', '.join(missing_headers)}")
+    return df
+
+def parse_and_score(filename: str, data: bytes, position_data: Dict[str, Any],
+                    metrics: Optional[UploadMetrics] = None) -> List[Dict[str, Any]]:
+    """
+    Parse an uploaded file and score each row against a position
+
+    Args:
+        filename: Uploaded file name, used to select the parser
+        data: Raw file content
+        position_data: Position the candidates applied for
+        metrics: Records the parse and score stages when given
+
+    Returns:
+        List of processed candidate dictionaries with scores and status
+    """
+    metrics = metrics or UploadMetrics()
+    df = parse_frame(filename, data, metrics)
+    with metrics.stage('score'):
+        return process_cv_data(df, position_data)
+
+def measured_parse_and_score(filename: str, data: bytes,
+                             position_data: Dict[str, Any]) -> Tuple[List[Dict[str, Any]], UploadMetrics]:
+    """
+    Run parse_and_score and return its metrics too, for worker processes
+
+    Returns:
+        Tuple of (processed candidates, UploadMetrics to merge into the request's)
+    """
+    metrics = UploadMetrics()
+    return parse_and_score(filename, data, position_data, metrics), metrics
+
+def score_chunk(chunk: pd.DataFrame, position_data: Dict[str, Any]) -> Tuple[List[Dict[str, Any]], UploadMetrics]:
+    """
+    Score one chunk of parsed rows, for running in a worker process
+
+    Returns:
+        Tuple of (processed candidates, UploadMetrics with the score stage)
+    """
+    metrics = UploadMetrics()
+    with metrics.stage('score'):
+        return process_cv_data(chunk, position_data), metrics
+
+def _start_upload(db, filename: str, position: str, content_hash: str, total_records: int) -> Dict[str, Any]:
+    upload = db.start_upload({
+        "filename": filename,
+        "position": position,
+        "content_hash": content_hash,
+        "total_records": total_records
+    })
+    if upload is None:
+        raise UploadInterruptedError(f"Could not record the upload of {filename}")
+    if upload is False:
+        raise UploadInProgressError(f"{filename} is already being uploaded for {position}")
+    if upload['committed_rows']:
+        print(f"Resuming upload {upload['id']} of {filename} after row {upload['committed_rows']}")
+    return upload
+
+def _commit_chunks(db, upload: Dict[str, Any], chunks: Iterable[Tuple[int, List[Dict[str, Any]]]],
+                   metrics: UploadMetrics) -> Tuple[int, int]:
+    """Commit (end row, candidates) chunks in order; return the upload's (successful, failed) totals."""
+    successful = upload.get('successful_records') or 0
+    failed = upload.get('failed_records') or 0
+    try:
+        for end_row, candidates in chunks:
+            with metrics.stage('persist'):
+                result = db.commit_upload_chunk(upload['id'], candidates, end_row)
+            if result is None:
+                raise UploadInterruptedError(
+                    f"Upload of {upload['filename']} stopped at row {end_row - len(candidates)}; "
+                    "upload the file again to resume")
+            successful += result[0]
+            failed += result[1]
+    except BaseException:
+        # Lets the next upload of the file resume without waiting out the claim
+        db.release_upload(upload['id'])
+        raise
+    return successful, failed
+
+def _finish_upload(db, upload: Dict[str, Any], successful: int, rows: int,
+                   metrics: UploadMetrics, notify: bool) -> None:
+    db.complete_upload(upload['id'], {
+        "processed_at": datetime.now().isoformat(),
+        **metrics.as_record(rows)
+    })
+
+    # Create a notification
+    if notify and successful > 0:
+        db.create_notification({
+            "message": f"Processed {successful} candidates from {upload['filename']}",
+            "type": "info",
+            "read": False,
+            "created_at": datetime.now().isoformat()
+        })
+
+def import_upload(db, filename: str, data: bytes, position_data: Dict[str, Any], content_hash: str,
+                  metrics: Optional[UploadMetrics] = None,
+                  scorer: Callable[..., Tuple[List[Dict[str, Any]], UploadMetrics]] = score_chunk
+                  ) -> Tuple[int, int, int]:
+    """
+    Parse a file, then score and commit it in checkpointed chunks
+
+    Args:
+        db: Database to write to
+        filename: Uploaded file name
+        data: Raw file content
+        position_data: Position the candidates applied for
+        content_hash: SHA-256 of the raw file, used to detect re-uploads and resume
+        metrics: Metrics of this run, stored on the upload record when given
+        scorer: Callable(chunk, position_data) like score_chunk, e.g. one that
+                runs score_chunk in a worker process
+
+    Returns:
+        Tuple of (total records, successful records, failed records), counting
+        chunks committed by earlier attempts
+
+    Raises:
+        InvalidUploadError: The file is missing required columns
+        UploadInProgressError: Another request is uploading the same file
+        UploadInterruptedError: A chunk could not be committed
+    """
+    metrics = metrics or UploadMetrics()
+    df = parse_frame(filename, data, metrics)
+    upload = _start_upload(db, filename, position_data['title'], content_hash, len(df))
+    resume_row = upload['committed_rows']
+
+    def chunks():
+        for start in range(resume_row, len(df), UPLOAD_CHUNK_ROWS):
+            chunk = df.iloc[start:start + UPLOAD_CHUNK_ROWS]
+            candidates, chunk_metrics = scorer(chunk, position_data)
+            metrics.merge(chunk_metrics)
+            yield start + len(chunk), candidates
+
+    successful, failed = _commit_chunks(db, upload, chunks(), metrics)
+    _finish_upload(db, upload, successful, len(df) - resume_row, metrics, notify=True)
+    return len(df), successful, failed
+
+def save_candidates(db, candidates: List[Dict[str, Any]], filename: str, position: str,
+                    content_hash: str, metrics: Optional[UploadMetrics] = None,
+                    notify: bool = True) -> Tuple[int, int]:
+    """
+    Persist processed candidates in checkpointed chunks and record the upload
+
+    Args:
+        db: Database to write to
+        candidates: Output of parse_and_score
+        filename: Uploaded file name
+        position: Position title the file was uploaded for
+        content_hash: SHA-256 of the raw file, used to detect re-uploads and resume
+        metrics: Metrics of this run, stored on the upload record when given
+        notify: Create a notification for the upload; bulk imports send one
+                summary notification instead
+
+    Returns:
+        Tuple of (successful records, failed records), counting chunks
+        committed by earlier attempts
+    """
+    metrics = metrics or UploadMetrics()
+    upload = _start_upload(db, filename, position, content_hash, len(candidates))
+    resume_row = upload['committed_rows']
+
+    chunks = ((min(start + UPLOAD_CHUNK_ROWS, len(candidates)), candidates[start:start + UPLOAD_CHUNK_ROWS])
+              for start in range(resume_row, len(candidates), UPLOAD_CHUNK_ROWS))
+    successful, failed = _commit_chunks(db, upload, chunks, metrics)
+    _finish_upload(db, upload, successful, len(candidates) - resume_row, metrics, notify)
+    return successful, failed
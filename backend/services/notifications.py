@@ -0,0 +1,73 @@
+"""
+Notification Service
+
+This module provides an in-process publish/subscribe hub for notifications.
+The database publishes each notification it creates, and Server-Sent Events
+streams subscribe to receive them without polling the notifications table.
+"""
+
+import json
+import queue
+import threading
+from typing import Any, Dict, Optional, Set
+
+class NotificationBroker:
+    """Fan out published notifications to every subscribed queue."""
+    
+    def __init__(self, max_queue_size: int = 100):
+        self.max_queue_size = max_queue_size
+        self._subscribers: Set[queue.Queue] = set()
+        self._lock = threading.Lock()
+    
+    def subscribe(self) -> queue.Queue:
+        """Register a new subscriber and return the queue it should read from."""
+        subscriber = queue.Queue(maxsize=self.max_queue_size)
+        with self._lock:
+            self._subscribers.add(subscriber)
+        return subscriber
+    
+    def unsubscribe(self, subscriber: queue.Queue) -> None:
+        """Remove a subscriber; safe to call more than once."""
+        with self._lock:
+            self._subscribers.discard(subscriber)
+    
+    def publish(self, notification: Dict[str, Any]) -> None:
+        """Deliver a notification to all subscribers without blocking."""
+        with self._lock:
+            subscribers = list(self._subscribers)
+        
+        for subscriber in subscribers:
+            try:
+                subscriber.put_nowait(notification)
+            except queue.Full:
+                # A stalled client misses live events; it catches up from its
+                # Last-Event-ID cursor when it reconnects
+                pass
+    
+    @property
+    def subscriber_count(self) -> int:
+        with self._lock:
+            return len(self._subscribers)
+
+def format_sse(data: Any, event: Optional[str] = None, event_id: Optional[Any] = None) -> str:
+    """
+    Format a message for a Server-Sent Events stream
+    
+    Args:
+        data: JSON-serializable payload
+        event: Optional event name
+        event_id: Optional event ID, echoed back by the browser as Last-Event-ID
+        
+    Returns:
+        The encoded SSE message, terminated by a blank line
+    """
+    lines = []
+    if event_id is not None:
+        lines.append(f"id: {event_id}")
+    if event:
+        lines.append(f"event: {event}")
+    lines.append(f"data: {json.dumps(data, default=str)}")
+    return "\n".join(lines) + "\n\n"
+
+# Shared broker for the process
+broker = NotificationBroker()
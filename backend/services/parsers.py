@@ -0,0 +1,189 @@
+"""
+Upload Parsing Service
+
+This module turns uploaded candidate files into DataFrames. Parsers are
+registered per file extension, so new input formats can be added without
+touching the upload route. CSV input is parsed with pyarrow's multithreaded
+reader straight from the raw bytes when pyarrow is installed, and with the
+pandas C engine otherwise.
+"""
+
+import gzip
+import io
+import os
+import zipfile
+import zlib
+from typing import Callable, Dict, List, Optional
+
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    import pyarrow.csv as pa_csv
+    import pyarrow.json as pa_json
+    HAS_PYARROW = True
+except ImportError:
+    HAS_PYARROW = False
+
+# 'auto' uses pyarrow when it is installed; 'pandas' or 'pyarrow' force an engine
+CSV_ENGINE = os.getenv('CSV_PARSER_ENGINE', 'auto')
+
+class UnsupportedFormatError(ValueError):
+    """Raised when an uploaded file cannot be parsed in its declared format."""
+
+# Errors the parsers raise on malformed input: pandas parser and empty-file
+# errors and pyarrow's ArrowInvalid are ValueErrors, corrupt gzip streams
+# raise OSError, EOFError or zlib.error, and pyarrow I/O errors derive from
+# ArrowException
+MALFORMED_INPUT_ERRORS = (ValueError, OSError, EOFError, zlib.error, zipfile.BadZipFile)
+if HAS_PYARROW:
+    MALFORMED_INPUT_ERRORS += (pa.ArrowException,)
+
+def resolve_engine(engine: Optional[str] = None) -> str:
+    """
+    Pick the engine used for CSV and JSON Lines parsing
+    
+    Args:
+        engine: 'auto', 'pyarrow' or 'pandas'; defaults to CSV_PARSER_ENGINE
+        
+    Returns:
+        'pyarrow' or 'pandas'
+    """
+    engine = engine or CSV_ENGINE
+    if engine == 'auto':
+        return 'pyarrow' if HAS_PYARROW else 'pandas'
+    if engine == 'pyarrow' and not HAS_PYARROW:
+        return 'pandas'
+    return engine
+
+def _read_csv_stream(open_stream: Callable[[], io.IOBase], engine: Optional[str] = None) -> pd.DataFrame:
+    """
+    Read CSV from a stream, falling back to pandas if pyarrow rejects the file
+    
+    Args:
+        open_stream: Callable returning a fresh binary stream positioned at the start
+        engine: Engine override, see resolve_engine
+        
+    Returns:
+        Parsed DataFrame
+    """
+    if resolve_engine(engine) == 'pyarrow':
+        try:
+            with open_stream() as stream:
+                table = pa_csv.read_csv(stream, read_options=pa_csv.ReadOptions(use_threads=True))
+            return table.to_pandas()
+        except pa.ArrowInvalid as e:
+            # pyarrow is stricter than pandas about ragged rows and quoting
+            print(f"pyarrow could not parse CSV, retrying with pandas: {e}")
+    
+    with open_stream() as stream:
+        return pd.read_csv(stream)
+
+def parse_csv(data: bytes, engine: Optional[str] = None) -> pd.DataFrame:
+    """Parse an uncompressed CSV file."""
+    if resolve_engine(engine) == 'pyarrow':
+        return _read_csv_stream(lambda: pa.BufferReader(data), engine)
+    return _read_csv_stream(lambda: io.BytesIO(data), engine)
+
+def parse_gzip_csv(data: bytes, engine: Optional[str] = None) -> pd.DataFrame:
+    """Parse a gzip-compressed CSV file, decompressing it as a stream."""
+    if resolve_engine(engine) == 'pyarrow':
+        return _read_csv_stream(lambda: pa.input_stream(pa.BufferReader(data), compression='gzip'), engine)
+    return _read_csv_stream(lambda: gzip.GzipFile(fileobj=io.BytesIO(data)), engine)
+
+def parse_zip_csv(data: bytes, engine: Optional[str] = None) -> pd.DataFrame:
+    """Parse the first CSV file inside a zip archive, decompressing it as a stream."""
+    try:
+        archive = zipfile.ZipFile(io.BytesIO(data))
+    except zipfile.BadZipFile as e:
+        raise UnsupportedFormatError(f"Invalid zip archive: {e}")
+    
+    members = [name for name in archive.namelist() if name.lower().endswith('.csv')]
+    if not members:
+        raise UnsupportedFormatError("Zip archive does not contain a CSV file")
+    
+    with archive:
+        return _read_csv_stream(lambda: archive.open(members[0]), engine)
+
+def parse_parquet(data: bytes, engine: Optional[str] = None) -> pd.DataFrame:
+    """Parse a Parquet file."""
+    try:
+        return pd.read_parquet(io.BytesIO(data))
+    except ImportError:
+        raise UnsupportedFormatError("Parquet uploads require pyarrow to be installed")
+
+def parse_json_lines(data: bytes, engine: Optional[str] = None) -> pd.DataFrame:
+    """Parse a JSON Lines file with one candidate object per line."""
+    if resolve_engine(engine) == 'pyarrow':
+        try:
+            table = pa_json.read_json(pa.BufferReader(data))
+            return table.to_pandas()
+        except pa.ArrowInvalid as e:
+            print(f"pyarrow could not parse JSON Lines, retrying with pandas: {e}")
+    return pd.read_json(io.BytesIO(data), lines=True)
+
+# Parsers keyed by file extension; the longest matching extension wins
+PARSERS: Dict[str, Callable[..., pd.DataFrame]] = {
+    '.csv': parse_csv,
+    '.csv.gz': parse_gzip_csv,
+    '.zip': parse_zip_csv,
+    '.parquet': parse_parquet,
+    '.jsonl': parse_json_lines,
+    '.ndjson': parse_json_lines,
+}
+
+def register_parser(extension: str, parser: Callable[..., pd.DataFrame]) -> None:
+    """
+    Register a parser for an additional file extension
+    
+    Args:
+        extension: Lowercase extension including the leading dot, e.g. '.tsv'
+        parser: Callable taking (data, engine=None) and returning a DataFrame
+    """
+    PARSERS[extension.lower()] = parser
+
+def supported_extensions() -> List[str]:
+    """Return the registered extensions, sorted."""
+    return sorted(PARSERS)
+
+def get_parser(filename: str) -> Optional[Callable[..., pd.DataFrame]]:
+    """
+    Find the parser for a filename
+    
+    Args:
+        filename: Uploaded file name
+        
+    Returns:
+        The registered parser, or None if the extension is not supported
+    """
+    name = filename.lower()
+    matches = [ext for ext in PARSERS if name.endswith(ext)]
+    if not matches:
+        return None
+    return PARSERS[max(matches, key=len)]
+
+def parse_upload(filename: str, data: bytes, engine: Optional[str] = None) -> pd.DataFrame:
+    """
+    Parse an uploaded file into a DataFrame based on its extension
+    
+    Args:
+        filename: Uploaded file name, used to select the format
+        data: Raw file content
+        engine: Engine override, see resolve_engine
+        
+    Returns:
+        DataFrame with one row per candidate
+        
+    Raises:
+        UnsupportedFormatError: The extension is not supported or the file is malformed
+    """
+    parser = get_parser(filename)
+    if parser is None:
+        raise UnsupportedFormatError(
+            f"Unsupported file type. Allowed: {', '.join(supported_extensions())}")
+    try:
+        return parser(data, engine=engine)
+    except UnsupportedFormatError:
+        raise
+    except MALFORMED_INPUT_ERRORS as e:
+        raise UnsupportedFormatError(f"Could not parse {filename}: {e or type(e).__name__}") from e
@@ -0,0 +1,50 @@
+"""
+Request Timing Service
+
+This module adds up the time each request spends in database calls and
+reports it in a Server-Timing response header, which browser dev tools and
+the load-test harness (backend/benchmarks/load_test.py) read. On a
+connection shared by request threads, database time includes waiting for
+the connection and for database locks, so a rising share of db time under
+load points at contention rather than slow handlers.
+"""
+
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Optional
+
+_request_started: ContextVar[Optional[float]] = ContextVar('request_started', default=None)
+_db_seconds: ContextVar[float] = ContextVar('db_seconds', default=0.0)
+_db_calls: ContextVar[int] = ContextVar('db_calls', default=0)
+
+def start_request() -> None:
+    """Start timing the current request."""
+    _request_started.set(time.perf_counter())
+    _db_seconds.set(0.0)
+    _db_calls.set(0)
+
+@contextmanager
+def timed_db_call():
+    """Count the enclosed block as database time of the current request."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        _db_seconds.set(_db_seconds.get() + time.perf_counter() - start)
+        _db_calls.set(_db_calls.get() + 1)
+
+def server_timing_header() -> Optional[str]:
+    """
+    Format the current request's timings as a Server-Timing header value
+
+    Returns:
+        "db;dur=...;desc=..., app;dur=..." in milliseconds, where app is the
+        time outside database calls, or None if start_request was not called
+    """
+    started = _request_started.get()
+    if started is None:
+        return None
+    total_ms = (time.perf_counter() - started) * 1000
+    db_ms = _db_seconds.get() * 1000
+    return f'db;dur={db_ms:.1f};desc="{_db_calls.get()} queries", app;dur={max(total_ms - db_ms, 0):.1f}'
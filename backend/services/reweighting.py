@@ -0,0 +1,143 @@
+"""
+Score Re-weighting Service
+
+This module answers what-if questions about the score weights. Candidates
+store the component scores their match score was combined from
+(cv_processing.SCORE_COMPONENTS), so re-ranking a position under other
+weights is one vectorized linear combination over its stored components,
+with no file re-parsed and no skill re-matched. The new scores are computed
+exactly as combine_score_components would, so the current weights reproduce
+the stored scores.
+
+Committing a what-if writes the new scores in bulk, recomputes the
+position's aggregates, and stores the weights on the position so later
+uploads are scored the same way. Statuses are not changed.
+"""
+
+import time
+from typing import Any, Dict, Optional
+
+import numpy as np
+
+from backend.services.cv_processing import SCORE_COMPONENTS, position_score_weights
+
+# Largest top-N returned by one what-if ranking
+MAX_WHAT_IF_RESULTS = 500
+
+def parse_weights(weights: Any, defaults: Dict[str, float]) -> Dict[str, float]:
+    """
+    Validate requested weights, taking missing components from defaults
+
+    Args:
+        weights: Dict of component name to weight, e.g. {"skill_score": 0.5}
+        defaults: Weights of the components left out
+
+    Returns:
+        Weight for every component in SCORE_COMPONENTS
+
+    Raises:
+        ValueError: Unknown components, or weights that are not non-negative numbers
+    """
+    if not isinstance(weights, dict) or not weights:
+        raise ValueError(f"weights must be an object with any of: {', '.join(SCORE_COMPONENTS)}")
+    unknown = sorted(set(weights) - set(SCORE_COMPONENTS))
+    if unknown:
+        raise ValueError(f"Unknown score components: {', '.join(unknown)}")
+    result = dict(defaults)
+    for component, weight in weights.items():
+        if isinstance(weight, bool) or not isinstance(weight, (int, float)) or not 0 <= weight <= 100:
+            raise ValueError(f"Weight of {component} must be a number from 0 to 100")
+        result[component] = float(weight)
+    return result
+
+def combine(components: np.ndarray, weights: Dict[str, float]) -> np.ndarray:
+    """
+    Scores of many candidates under weights
+
+    Args:
+        components: Array of shape (candidates, len(SCORE_COMPONENTS))
+
+    Returns:
+        Integer scores from 0-100
+    """
+    # Accumulated column by column, in the order combine_score_components adds
+    total = np.zeros(len(components))
+    for column, component in enumerate(SCORE_COMPONENTS):
+        total += weights[component] * components[:, column]
+    return np.clip(np.floor(total), 0, 100).astype(np.int64)
+
+def top_indices(scores: np.ndarray, limit: int) -> np.ndarray:
+    """Indices of the limit highest scores, highest first, ties in input order."""
+    return np.argsort(-scores, kind='stable')[:limit]
+
+def what_if(db, position: Dict[str, Any], weights: Dict[str, float], limit: int = 20,
+            commit: bool = False) -> Optional[Dict[str, Any]]:
+    """
+    Re-rank a position's candidates under other score weights
+
+    Args:
+        db: Database or ShardedDatabase
+        position: The position, as returned by get_position_by_title
+        weights: Weight for every component, from parse_weights
+        limit: Number of top candidates to return
+        commit: Write the new scores and keep the weights for the position
+
+    Returns:
+        The new top candidates with their previous score and rank, and counts
+        of candidates re-scored, changed and lacking stored components; None
+        if committing failed
+    """
+    started = time.perf_counter()
+    rows = db.get_score_components(position['title'])
+    # Missing components become NaN; those candidates are left out
+    values = np.array([[row[column] for column in ('score',) + SCORE_COMPONENTS] for row in rows],
+                      dtype=np.float64).reshape(len(rows), len(SCORE_COMPONENTS) + 1)
+    has_components = ~np.isnan(values[:, 1:]).any(axis=1)
+    scored = [row for row, keep in zip(rows, has_components) if keep]
+    values = values[has_components]
+
+    previous = np.nan_to_num(values[:, 0]).astype(np.int64)
+    scores = combine(values[:, 1:], weights)
+
+    # Rank of every candidate under the stored scores, 1 being the best
+    previous_rank = np.empty(len(scored), dtype=np.int64)
+    previous_rank[top_indices(previous, len(scored))] = np.arange(1, len(scored) + 1)
+
+    # Names and statuses are loaded for the top rows only
+    indices = top_indices(scores, max(1, limit))
+    details = {candidate['id']: candidate
+               for candidate in db.get_candidates_by_ids([scored[index]['id'] for index in indices])}
+    top = []
+    for rank, index in enumerate(indices, start=1):
+        candidate = details.get(scored[index]['id'], {})
+        top.append({
+            "id": scored[index]['id'],
+            "name": candidate.get('name'),
+            "email": candidate.get('email'),
+            "status": candidate.get('status'),
+            "score": int(scores[index]),
+            "previousScore": scored[index]['score'],
+            "rank": rank,
+            "previousRank": int(previous_rank[index]),
+        })
+
+    changed = np.flatnonzero(scores != previous)
+    result = {
+        "position": position['title'],
+        "weights": weights,
+        "previousWeights": position_score_weights(position),
+        "candidates": len(scored),
+        "withoutComponents": len(rows) - len(scored),
+        "changed": len(changed),
+        "top": top,
+        "committed": False,
+    }
+
+    if commit:
+        updated = db.update_candidate_scores(
+            position['title'], [(scored[index]['id'], int(scores[index])) for index in changed])
+        if updated is None or not db.update_position_score_weights(position['title'], weights):
+            return None
+        result["committed"] = True
+    result["elapsedMs"] = round((time.perf_counter() - started) * 1000, 2)
+    return result
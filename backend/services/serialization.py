@@ -0,0 +1,196 @@
+"""
+Response Serialization Service
+
+This module encodes list responses in the format a client negotiates, and
+compresses response bodies. The default is the existing JSON array of row
+objects. Large lists can be requested in more compact formats:
+
+- Columnar JSON ("application/vnd.cvsmarthire.columnar+json", or ?format=columnar):
+  one array per field, so key names are sent once instead of once per row
+- MessagePack ("application/msgpack", or ?format=msgpack): the columnar
+  layout in binary, when msgpack is installed
+- Arrow IPC ("application/vnd.apache.arrow.stream", or ?format=arrow): a
+  typed record batch stream, when pyarrow is installed. Nested fields are
+  sent as JSON text.
+
+Bodies are compressed with brotli when the client accepts it and the brotli
+package is installed, and with gzip otherwise.
+"""
+
+import gzip
+import io
+import json
+import os
+from datetime import date, datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+try:
+    import pyarrow as pa
+    HAS_PYARROW = True
+except ImportError:
+    HAS_PYARROW = False
+
+try:
+    import msgpack
+    HAS_MSGPACK = True
+except ImportError:
+    HAS_MSGPACK = False
+
+try:
+    import brotli
+    HAS_BROTLI = True
+except ImportError:
+    HAS_BROTLI = False
+
+JSON_TYPE = 'application/json'
+COLUMNAR_JSON_TYPE = 'application/vnd.cvsmarthire.columnar+json'
+MSGPACK_TYPE = 'application/msgpack'
+ARROW_TYPE = 'application/vnd.apache.arrow.stream'
+
+# ?format= values accepted in place of an Accept header
+FORMAT_TYPES = {
+    'json': JSON_TYPE,
+    'columnar': COLUMNAR_JSON_TYPE,
+    'msgpack': MSGPACK_TYPE,
+    'arrow': ARROW_TYPE,
+}
+
+# Bodies smaller than this are not worth compressing
+MIN_COMPRESS_SIZE = int(os.getenv('RESPONSE_COMPRESS_MIN_BYTES', 1024))
+GZIP_LEVEL = int(os.getenv('RESPONSE_GZIP_LEVEL', 5))
+BROTLI_QUALITY = int(os.getenv('RESPONSE_BROTLI_QUALITY', 4))
+
+def available_types() -> List[str]:
+    """Media types this server can produce for list responses."""
+    types = [JSON_TYPE, COLUMNAR_JSON_TYPE]
+    if HAS_MSGPACK:
+        types.append(MSGPACK_TYPE)
+    if HAS_PYARROW:
+        types.append(ARROW_TYPE)
+    return types
+
+def negotiate(accept: Optional[str], format: Optional[str] = None) -> str:
+    """
+    Pick the media type for a list response
+
+    Args:
+        accept: The request's Accept header
+        format: The ?format= query parameter, which overrides Accept
+
+    Returns:
+        One of available_types(); JSON when nothing better was asked for
+    """
+    available = available_types()
+    if format:
+        media_type = FORMAT_TYPES.get(format.lower())
+        return media_type if media_type in available else JSON_TYPE
+
+    best, best_quality = JSON_TYPE, 0.0
+    for part in (accept or '').split(','):
+        media_type, _, params = part.strip().partition(';')
+        quality = 1.0
+        for param in params.split(';'):
+            name, _, value = param.strip().partition('=')
+            if name == 'q':
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        # Prefer the client's order among equal qualities
+        if media_type.strip() in available and quality > best_quality:
+            best, best_quality = media_type.strip(), quality
+    return best
+
+def to_columns(records: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Convert row objects to the columnar layout
+
+    Returns:
+        {"fields": [...], "columns": {field: [values]}, "length": n}; a field
+        missing from a row is null in that row
+    """
+    fields: Dict[str, None] = {}
+    for record in records:
+        for field in record:
+            fields.setdefault(field, None)
+    return {
+        "fields": list(fields),
+        "columns": {field: [record.get(field) for record in records] for field in fields},
+        "length": len(records),
+    }
+
+def _default(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    raise TypeError(f"Object of type {type(value).__name__} is not serializable")
+
+def _to_arrow(records: List[Dict[str, Any]]) -> bytes:
+    columns = to_columns(records)["columns"]
+    arrays = {}
+    for field, values in columns.items():
+        if any(isinstance(value, (dict, list)) for value in values):
+            # Nested fields vary per row; send them as JSON text
+            values = [None if value is None else json.dumps(value, default=_default) for value in values]
+        try:
+            arrays[field] = pa.array(values)
+        except (pa.ArrowInvalid, pa.ArrowTypeError):
+            arrays[field] = pa.array([None if value is None else str(value) for value in values])
+    table = pa.table(arrays)
+    sink = io.BytesIO()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue()
+
+def encode_records(records: List[Dict[str, Any]], media_type: str) -> bytes:
+    """
+    Encode a list of row objects in a negotiated media type
+
+    Args:
+        records: Rows as returned by Database
+        media_type: Output of negotiate()
+
+    Returns:
+        Response body
+    """
+    if media_type == COLUMNAR_JSON_TYPE:
+        return json.dumps(to_columns(records), default=_default, separators=(',', ':')).encode('utf-8')
+    if media_type == MSGPACK_TYPE:
+        return msgpack.packb(to_columns(records), default=_default)
+    if media_type == ARROW_TYPE:
+        return _to_arrow(records)
+    return json.dumps(records, default=_default).encode('utf-8')
+
+def choose_encoding(accept_encoding: Optional[str]) -> Optional[str]:
+    """Pick 'br', 'gzip' or None from an Accept-Encoding header."""
+    accepted = {}
+    for part in (accept_encoding or '').split(','):
+        coding, _, params = part.strip().partition(';')
+        quality = 1.0
+        if params.strip().startswith('q='):
+            try:
+                quality = float(params.strip()[2:])
+            except ValueError:
+                quality = 0.0
+        accepted[coding.strip().lower()] = quality
+    if HAS_BROTLI and accepted.get('br', 0) > 0:
+        return 'br'
+    if accepted.get('gzip', 0) > 0:
+        return 'gzip'
+    return None
+
+def compress(body: bytes, encoding: Optional[str]) -> Tuple[bytes, Optional[str]]:
+    """
+    Compress a response body
+
+    Args:
+        body: Uncompressed body
+        encoding: Output of choose_encoding()
+
+    Returns:
+        Tuple of (body, Content-Encoding or None if the body was left as is)
+    """
+    if encoding is None or len(body) < MIN_COMPRESS_SIZE:
+        return body, None
+    if encoding == 'br':
+        return brotli.compress(body, quality=BROTLI_QUALITY), 'br'
+    return gzip.compress(body, compresslevel=GZIP_LEVEL), 'gzip'
@@ -0,0 +1,398 @@
+"""
+Sharding Service
+
+This module spreads candidates over several databases (shards), so the
+candidates table is no longer bound to one server. DATABASE_SHARD_URLS
+lists the shards, in the URL forms DATABASE_REPLICA_URLS takes (N SQLite
+files work for local testing), and open_database then returns a
+ShardedDatabase, which has the Database methods the API and jobs use.
+
+- Candidates live on the shard picked by a stable hash of SHARD_KEY: the
+  position (the default, which keeps a position's candidates and
+  position_stats row together) or the email. Their skill, similarity and
+  duplicate rows live on the same shard.
+- Positions, uploads and notifications live on the first shard.
+- Candidate IDs outside this module are global: local ID * N + shard, so a
+  candidate's shard is its ID modulo N.
+- Candidate reads run on every shard in parallel and are merged: lists with
+  a k-way merge on score, position_stats by adding up each position's rows,
+  similar candidates by similarity.
+
+The shard list and key cannot change once candidates are stored, as both
+the routing and the global IDs depend on them. Duplicates are detected and
+merged within a shard only.
+"""
+
+import heapq
+import os
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
+
+from backend.services.database import Database
+from backend.services.replicas import connection_kwargs
+from backend.services.request_timing import timed_db_call
+
+SHARD_KEYS = ('position', 'email')
+
+# Candidate field hashed to pick a shard
+SHARD_KEY = os.getenv('SHARD_KEY', 'position')
+
+def shard_urls_from_env() -> List[str]:
+    """Read the comma-separated DATABASE_SHARD_URLS setting."""
+    return [url.strip() for url in os.getenv('DATABASE_SHARD_URLS', '').split(',') if url.strip()]
+
+def open_database():
+    """Open the database configured by the environment: a ShardedDatabase if DATABASE_SHARD_URLS is set."""
+    urls = shard_urls_from_env()
+    if not urls:
+        return Database()
+    # An empty replica list keeps the shards from reading DATABASE_REPLICA_URLS
+    return ShardedDatabase([Database(replica_urls=[], **connection_kwargs(url)) for url in urls])
+
+def _score_order(candidate):
+    return -(candidate.get('score') or 0)
+
+def _similarity_order(candidate):
+    return -candidate['similarity']
+
+class ShardedDatabase:
+    """Candidates partitioned across Database shards, with scatter-gather reads."""
+
+    def __init__(self, shards: List[Database], key: str = SHARD_KEY):
+        if key not in SHARD_KEYS:
+            raise ValueError(f"SHARD_KEY must be one of {', '.join(SHARD_KEYS)}, got {key!r}")
+        self.shards = shards
+        self.home = shards[0]
+        self.key = key
+        # Shards have no read replicas of their own
+        self.replicas = None
+        # Not one SQLite file; jobs that copy the database file refuse to run
+        self.sqlite_path = None
+        # Notifications and uploads are written on the home shard
+        self.write_behind = self.home.write_behind
+        self._pool = ThreadPoolExecutor(len(shards), thread_name_prefix='shard')
+        print(f"Sharding candidates by {key} across {len(shards)} databases")
+
+    @property
+    def dialect(self):
+        return self.home.dialect
+
+    # Routing
+    def shard_index(self, candidate: Dict[str, Any]) -> int:
+        """Return the shard a candidate is stored on, from its SHARD_KEY field."""
+        value = candidate.get(self.key)
+        if self.key == 'position':
+            value = ' '.join(str(value or '').lower().split())
+        else:
+            value = str(value or '').strip().lower()
+        # crc32 rather than hash(), which differs between processes
+        return zlib.crc32(value.encode('utf-8')) % len(self.shards)
+
+    def _global_id(self, index: int, local_id: int) -> int:
+        return local_id * len(self.shards) + index
+
+    def _locate(self, id: int) -> Tuple[int, int]:
+        """Split a global candidate ID into (shard index, local ID)."""
+        return id % len(self.shards), id // len(self.shards)
+
+    def _globalize(self, index: int, candidate: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+        if candidate:
+            candidate['id'] = self._global_id(index, candidate['id'])
+        return candidate
+
+    def _on_all(self, method: str, *args, **kwargs) -> List[Any]:
+        """Call a Database method on every shard in parallel; return the results in shard order."""
+        # The fan-out counts as one database call of the request
+        with timed_db_call():
+            futures = [self._pool.submit(getattr(shard, method), *args, **kwargs) for shard in self.shards]
+            return [future.result() for future in futures]
+
+    def _on_groups(self, method: str, groups: Dict[int, list]) -> Dict[int, Any]:
+        """Call a Database method on the shards in groups, each with its own list; return results by shard."""
+        with timed_db_call():
+            futures = {index: self._pool.submit(getattr(self.shards[index], method), items)
+                       for index, items in groups.items()}
+            return {index: future.result() for index, future in futures.items()}
+
+    def _merge_by_score(self, results: List[List[Dict[str, Any]]]) -> List[Dict[str, Any]]:
+        """K-way merge of per-shard lists that are each sorted by score, highest first."""
+        return list(heapq.merge(*([self._globalize(index, candidate) for candidate in candidates]
+                                  for index, candidates in enumerate(results)), key=_score_order))
+
+    def _group_by_id(self, items: List[Dict[str, Any]]) -> Dict[int, List[Dict[str, Any]]]:
+        """Group dicts carrying a global id by shard, rewriting the id to the local one."""
+        groups = {}
+        for item in items:
+            index, local_id = self._locate(item['id'])
+            groups.setdefault(index, []).append({**item, 'id': local_id})
+        return groups
+
+    # Schema and health
+    def create_tables(self):
+        return all(self._on_all('create_tables'))
+
+    def ping(self):
+        return all(self._on_all('ping'))
+
+    # Candidate operations
+    def get_all_candidates(self, summary=False, include_archived=False):
+        return self._merge_by_score(self._on_all('get_all_candidates', summary, include_archived))
+
+    def get_candidate_by_id(self, id, include_archived=False):
+        index, local_id = self._locate(id)
+        return self._globalize(index, self.shards[index].get_candidate_by_id(local_id, include_archived))
+
+    def get_candidates_by_ids(self, ids):
+        groups = {}
+        for id in ids:
+            index, local_id = self._locate(id)
+            groups.setdefault(index, []).append(local_id)
+        found = {candidate['id']: candidate
+                 for index, candidates in self._on_groups('get_candidates_by_ids', groups).items()
+                 for candidate in (self._globalize(index, candidate) for candidate in candidates)}
+        return [found[id] for id in dict.fromkeys(ids) if id in found]
+
+    def get_candidates_by_position(self, position, summary=False):
+        if self.key == 'position':
+            # All of a position's candidates are on one shard
+            index = self.shard_index({'position': position})
+            return [self._globalize(index, candidate)
+                    for candidate in self.shards[index].get_candidates_by_position(position, summary)]
+        return self._merge_by_score(self._on_all('get_candidates_by_position', position, summary))
+
+    def get_candidates_by_status(self, status, summary=False):
+        return self._merge_by_score(self._on_all('get_candidates_by_status', status, summary))
+
+    def get_candidates_by_min_years(self, min_years, summary=False):
+        return self._merge_by_score(self._on_all('get_candidates_by_min_years', min_years, summary))
+
+    def get_candidates_by_skills(self, skills, summary=False):
+        return self._merge_by_score(self._on_all('get_candidates_by_skills', skills, summary))
+
+    def get_candidates_missing_derived(self, limit=500):
+        batches = self._on_all('get_candidates_missing_derived', limit)
+        return [self._globalize(index, candidate)
+                for index, batch in enumerate(batches) for candidate in batch][:limit]
+
+    def update_derived_columns(self, rows):
+        return sum(self._on_groups('update_derived_columns', self._group_by_id(rows)).values())
+
+    # Score component operations
+    def get_candidates_missing_components(self, limit=500):
+        batches = self._on_all('get_candidates_missing_components', limit)
+        return [self._globalize(index, candidate)
+                for index, batch in enumerate(batches) for candidate in batch][:limit]
+
+    def update_score_components(self, rows):
+        return sum(self._on_groups('update_score_components', self._group_by_id(rows)).values())
+
+    def get_score_components(self, position):
+        return [self._globalize(index, candidate)
+                for index, candidates in enumerate(self._on_all('get_score_components', position))
+                for candidate in candidates]
+
+    def update_candidate_scores(self, position, scores):
+        """Update each shard's candidates on its own transaction; None if any shard failed."""
+        groups = {}
+        for id, score in scores:
+            index, local_id = self._locate(id)
+            groups.setdefault(index, []).append((local_id, score))
+        with timed_db_call():
+            futures = [self._pool.submit(self.shards[index].update_candidate_scores, position, group)
+                       for index, group in groups.items()]
+            results = [future.result() for future in futures]
+        return None if None in results else sum(results)
+
+    def create_candidate(self, candidate):
+        index = self.shard_index(candidate)
+        return self._globalize(index, self.shards[index].create_candidate(candidate))
+
+    def create_candidates(self, candidates):
+        groups = {}
+        for candidate in candidates:
+            groups.setdefault(self.shard_index(candidate), []).append(candidate)
+        results = self._on_groups('create_candidates', groups).values()
+        return sum(result[0] for result in results), sum(result[1] for result in results)
+
+    def update_candidate_status(self, id, status):
+        index, local_id = self._locate(id)
+        return self._globalize(index, self.shards[index].update_candidate_status(local_id, status))
+
+    def update_candidate_notes(self, id, notes):
+        index, local_id = self._locate(id)
+        return self._globalize(index, self.shards[index].update_candidate_notes(local_id, notes))
+
+    def bulk_update_candidates(self, updates):
+        """
+        Apply status and notes changes on each shard in parallel
+
+        Each shard commits on its own, so on error (None) the changes on the
+        other shards may have been applied.
+        """
+        results = self._on_groups('bulk_update_candidates', self._group_by_id(updates))
+        if any(result is None for result in results.values()):
+            return None
+        return [self._globalize(index, candidate) for index, result in results.items() for candidate in result]
+
+    # Similarity operations
+    def get_similar_candidates(self, id, limit=10):
+        """Search every shard with the candidate's signature and keep the top limit."""
+        index, local_id = self._locate(id)
+        signature = self.shards[index].get_candidate_signature(local_id)
+        if not signature:
+            return []
+        with timed_db_call():
+            futures = [self._pool.submit(shard.get_candidates_similar_to, signature, limit,
+                                         local_id if shard_index == index else None)
+                       for shard_index, shard in enumerate(self.shards)]
+            results = [future.result() for future in futures]
+        merged = heapq.merge(*([self._globalize(shard_index, candidate) for candidate in candidates]
+                               for shard_index, candidates in enumerate(results)), key=_similarity_order)
+        return list(merged)[:limit]
+
+    def backfill_minhash(self, batch_size=500):
+        return sum(self._on_all('backfill_minhash', batch_size))
+
+    def backfill_skill_ids(self, batch_size=500):
+        results = self._on_all('backfill_skill_ids', batch_size)
+        return sum(result[0] for result in results), sum(result[1] for result in results)
+
+    def backfill_dedup_keys(self, batch_size=500):
+        results = self._on_all('backfill_dedup_keys', batch_size)
+        return sum(result[0] for result in results), sum(result[1] for result in results)
+
+    # Duplicate detection operations
+    def rebuild_duplicates(self, batch_size=1000):
+        results = self._on_all('rebuild_duplicates', batch_size)
+        return sum(result[0] for result in results), sum(result[1] for result in results)
+
+    def get_duplicate_groups(self):
+        groups = []
+        for index, shard_groups in enumerate(self._on_all('get_duplicate_groups')):
+            for group in shard_groups:
+                groups.append({
+                    "candidates": [self._globalize(index, candidate) for candidate in group['candidates']],
+                    "pairs": [{**pair,
+                               "candidateId": self._global_id(index, pair['candidateId']),
+                               "duplicateId": self._global_id(index, pair['duplicateId'])}
+                              for pair in group['pairs']]
+                })
+        return groups
+
+    def merge_candidates(self, keep_id, merge_ids):
+        """Merge duplicates; candidates on different shards cannot be merged and return None."""
+        index, local_keep = self._locate(keep_id)
+        local_merge = []
+        for candidate_id in merge_ids:
+            merge_index, local_id = self._locate(candidate_id)
+            if merge_index != index:
+                print(f"Cannot merge candidate {candidate_id} into {keep_id}: they are on different shards")
+                return None
+            local_merge.append(local_id)
+        return self._globalize(index, self.shards[index].merge_candidates(local_keep, local_merge))
+
+    # Position statistics operations
+    def get_position_stats(self):
+        """Add up each position's aggregate rows across the shards."""
+        combined = {}
+        for rows in self._on_all('get_position_stats'):
+            for row in rows:
+                total = combined.get(row['position'])
+                if total is None:
+                    combined[row['position']] = dict(row)
+                    continue
+                for column, value in row.items():
+                    if column != 'position' and isinstance(value, (int, float)):
+                        total[column] = (total.get(column) or 0) + value
+        return [combined[position] for position in sorted(combined)]
+
+    def rebuild_position_stats(self):
+        return all(self._on_all('rebuild_position_stats'))
+
+    # Position operations, on the home shard
+    def get_all_positions(self):
+        return self.home.get_all_positions()
+
+    def get_active_positions(self):
+        return self.home.get_active_positions()
+
+    def get_position_by_id(self, id):
+        return self.home.get_position_by_id(id)
+
+    def get_position_by_title(self, title):
+        return self.home.get_position_by_title(title)
+
+    def create_position(self, position):
+        return self.home.create_position(position)
+
+    def update_position_score_weights(self, title, weights):
+        return self.home.update_position_score_weights(title, weights)
+
+    # Upload operations, on the home shard
+    def get_all_uploads(self, limit=None):
+        return self.home.get_all_uploads(limit)
+
+    def get_upload_by_hash(self, content_hash, position):
+        return self.home.get_upload_by_hash(content_hash, position)
+
+    def start_upload(self, upload):
+        return self.home.start_upload(upload)
+
+    def commit_upload_chunk(self, upload_id, candidates, committed_rows):
+        """
+        Write one chunk of an upload across the shards, then advance its checkpoint
+
+        The other shards commit their part first. The home shard's part and
+        the checkpoint then commit together, so a failure anywhere leaves the
+        checkpoint behind and a resumed upload writes the chunk again. Rows
+        rewritten that way are upserted on their (email, position) key, so
+        they are not duplicated.
+        """
+        groups = {}
+        for candidate in candidates:
+            groups.setdefault(self.shard_index(candidate), []).append(candidate)
+        home_part = groups.pop(0, [])
+        results = self._on_groups('commit_candidate_chunk', groups).values()
+        if any(result is None for result in results):
+            return None
+        written = (sum(result[0] for result in results), sum(result[1] for result in results))
+        return self.home.commit_upload_chunk(upload_id, home_part, committed_rows, written)
+
+    def release_upload(self, upload_id):
+        return self.home.release_upload(upload_id)
+
+    def complete_upload(self, upload_id, fields):
+        return self.home.complete_upload(upload_id, fields)
+
+    def create_upload(self, upload):
+        return self.home.create_upload(upload)
+
+    # Notification operations, on the home shard
+    def get_all_notifications(self, limit=None):
+        return self.home.get_all_notifications(limit)
+
+    def get_notifications_since(self, since_id, limit=100):
+        return self.home.get_notifications_since(since_id, limit)
+
+    def get_unread_notification_count(self):
+        return self.home.get_unread_notification_count()
+
+    def create_notification(self, notification):
+        return self.home.create_notification(notification)
+
+    def prune_notifications(self, older_than, batch_size=1000):
+        return self.home.prune_notifications(older_than, batch_size)
+
+    # Archive operations
+    def archive_candidates(self, active_positions, batch_size=500):
+        return sum(self._on_all('archive_candidates', active_positions, batch_size))
+
+    def get_archived_candidates(self, position=None, created_from=None, created_to=None, summary=False):
+        return self._merge_by_score(self._on_all('get_archived_candidates', position, created_from,
+                                                 created_to, summary))
+
+    def drop_archive_partitions(self, before_year):
+        """Drop the partitions on every shard; each name is listed once."""
+        dropped = [table for tables in self._on_all('drop_archive_partitions', before_year) for table in tables]
+        return sorted(set(dropped))
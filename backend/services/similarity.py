@@ -0,0 +1,72 @@
+"""
+Candidate Similarity Service
+
+This module estimates Jaccard similarity between candidates' skill sets with
+MinHash signatures, and finds likely neighbors with locality-sensitive
+hashing. Each signature is cut into LSH_BANDS bands, and each band is hashed
+into a bucket. Two candidates sharing any bucket are compared by signature,
+so a lookup only touches the candidates in its own buckets instead of every
+candidate.
+
+With 16 bands of 4 rows, pairs with a Jaccard similarity of 0.5 share a
+bucket about 64% of the time, and pairs at 0.7 share one about 99% of the
+time.
+"""
+
+import hashlib
+import zlib
+from typing import Iterable, List, Optional, Tuple
+
+import numpy as np
+
+# Hash functions per signature; changing these requires rebuilding the index
+NUM_PERMUTATIONS = 64
+LSH_BANDS = 16
+ROWS_PER_BAND = NUM_PERMUTATIONS // LSH_BANDS
+
+# Universal hashing (a * x + b) mod p over 32-bit skill hashes; products stay below 2**64
+_PRIME = (1 << 31) - 1
+_rng = np.random.RandomState(20240611)
+_A = _rng.randint(1, _PRIME, size=NUM_PERMUTATIONS).astype(np.uint64)
+_B = _rng.randint(0, _PRIME, size=NUM_PERMUTATIONS).astype(np.uint64)
+
+def minhash_signature(skills: Iterable[str]) -> Optional[List[int]]:
+    """
+    Compute the MinHash signature of a set of normalized skill names
+
+    Args:
+        skills: Normalized skill names
+
+    Returns:
+        NUM_PERMUTATIONS integers, or None for an empty skill set
+    """
+    names = set(skills)
+    if not names:
+        return None
+    # crc32 is stable across processes, unlike hash()
+    hashes = np.fromiter((zlib.crc32(name.encode('utf-8')) for name in names),
+                         dtype=np.uint64, count=len(names)) % _PRIME
+    permuted = (_A[:, None] * hashes[None, :] + _B[:, None]) % _PRIME
+    return permuted.min(axis=1).tolist()
+
+def lsh_buckets(signature: List[int]) -> List[Tuple[int, int]]:
+    """
+    Hash each band of a signature into a bucket
+
+    Args:
+        signature: Output of minhash_signature
+
+    Returns:
+        List of (band, bucket) pairs; buckets are signed 64-bit integers so
+        every backend can store them in a BIGINT column
+    """
+    buckets = []
+    for band in range(LSH_BANDS):
+        rows = signature[band * ROWS_PER_BAND:(band + 1) * ROWS_PER_BAND]
+        digest = hashlib.blake2b(np.asarray(rows, dtype=np.uint32).tobytes(), digest_size=8).digest()
+        buckets.append((band, int.from_bytes(digest, 'big', signed=True)))
+    return buckets
+
+def estimate_similarity(a: List[int], b: List[int]) -> float:
+    """Estimate the Jaccard similarity of two skill sets from their signatures."""
+    return sum(1 for x, y in zip(a, b) if x == y) / NUM_PERMUTATIONS
@@ -0,0 +1,202 @@
+"""
+Skill Dictionary Service
+
+This module maps normalized skill names to dense integer IDs and represents
+skill sets as integer bitsets. Matching a candidate against a position then
+takes a bitwise AND and a popcount instead of comparing every pair of skill
+names.
+
+A required skill matches any candidate skill whose name contains it (so
+"sql" matches "postgresql"), as in calculate_skill_match. For each required
+skill, the dictionary keeps a mask of all known names containing it. The
+mask is extended incrementally as new names are added.
+"""
+
+import threading
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
+def normalize_skill(skill: str) -> str:
+    """
+    Normalize a skill name for storage and comparison
+
+    Args:
+        skill: Raw skill name
+
+    Returns:
+        Lowercased skill name with surrounding and repeated whitespace removed
+    """
+    return ' '.join(str(skill).lower().split())
+
+def normalize_skills(skills: Union[Dict[str, float], List[str], None]) -> List[str]:
+    """
+    Normalize a candidate's skills into a sorted list of unique names
+
+    Args:
+        skills: Dict of skill name to proficiency score, or a list of skill names
+
+    Returns:
+        Sorted list of normalized skill names
+    """
+    if not skills:
+        return []
+
+    return sorted({normalize_skill(skill) for skill in skills if normalize_skill(skill)})
+
+def to_bitset(skill_ids: Iterable[int]) -> int:
+    """Pack skill IDs into an integer with one bit set per ID."""
+    bits = 0
+    for skill_id in skill_ids:
+        bits |= 1 << skill_id
+    return bits
+
+def popcount(bits: int) -> int:
+    """Number of set bits."""
+    return bits.bit_count()
+
+def iter_bits(bits: int) -> Iterator[int]:
+    """Yield the positions of the set bits, lowest first."""
+    while bits:
+        low = bits & -bits
+        yield low.bit_length() - 1
+        bits ^= low
+
+class SkillProfile:
+    """
+    Required skills of a position, compiled against one version of a dictionary
+
+    Attributes:
+        exact_bits: Required skills that only match themselves, as one bitset
+        fuzzy_masks: Masks of the remaining required skills, one per skill
+        size: Number of required skills
+    """
+
+    __slots__ = ('exact_bits', 'fuzzy_masks', 'size')
+
+    def __init__(self, exact_bits: int, fuzzy_masks: List[int], size: int):
+        self.exact_bits = exact_bits
+        self.fuzzy_masks = fuzzy_masks
+        self.size = size
+
+class SkillDictionary:
+    """Thread-safe mapping between normalized skill names and integer IDs."""
+
+    def __init__(self):
+        self._ids: Dict[str, int] = {}
+        self._names: Dict[int, str] = {}
+        # Names in the order they were added, for incremental mask updates
+        self._added: List[Tuple[int, str]] = []
+        # Required skill -> (mask of names containing it, number of names scanned)
+        self._masks: Dict[str, Tuple[int, int]] = {}
+        self._profiles: Dict[Tuple[str, ...], Tuple[SkillProfile, int]] = {}
+        self._next_id = 1
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def __contains__(self, name: str) -> bool:
+        return normalize_skill(name) in self._ids
+
+    def add(self, skill_id: int, name: str) -> None:
+        """Register a name under an ID assigned elsewhere, e.g. by the skills table."""
+        name = normalize_skill(name)
+        with self._lock:
+            if name not in self._ids:
+                self._register(skill_id, name)
+
+    def _register(self, skill_id: int, name: str) -> None:
+        # Callers hold the lock
+        self._ids[name] = skill_id
+        self._names[skill_id] = name
+        self._added.append((skill_id, name))
+        self._next_id = max(self._next_id, skill_id + 1)
+
+    def get(self, name: str) -> Optional[int]:
+        """Return the ID of a name, or None if it is unknown."""
+        return self._ids.get(normalize_skill(name))
+
+    def ids(self, names: Iterable[str]) -> List[int]:
+        """Return IDs for names in order, assigning the next free ID to unknown names."""
+        result = []
+        for name in names:
+            name = normalize_skill(name)
+            skill_id = self._ids.get(name)
+            if skill_id is None:
+                with self._lock:
+                    skill_id = self._ids.get(name)
+                    if skill_id is None:
+                        skill_id = self._next_id
+                        self._register(skill_id, name)
+            result.append(skill_id)
+        return result
+
+    def names(self, skill_ids: Iterable[int]) -> List[str]:
+        """Return the names of known IDs."""
+        return [self._names[skill_id] for skill_id in skill_ids if skill_id in self._names]
+
+    def bitset(self, names: Iterable[str]) -> int:
+        """Return the bitset of a list of names."""
+        return to_bitset(self.ids(names))
+
+    def containing_mask(self, skill: str) -> int:
+        """Return the bitset of every known name that contains a required skill."""
+        skill = normalize_skill(skill)
+        mask, scanned = self._masks.get(skill, (0, 0))
+        added = self._added
+        if scanned < len(added):
+            for skill_id, name in added[scanned:]:
+                if skill in name:
+                    mask |= 1 << skill_id
+            self._masks[skill] = (mask, len(added))
+        return mask
+
+    def profile(self, required_skills: Iterable[str]) -> SkillProfile:
+        """Compile a position's required skills, reusing the last result while no names were added."""
+        key = tuple(normalize_skill(skill) for skill in required_skills)
+        cached = self._profiles.get(key)
+        if cached and cached[1] == len(self._added):
+            return cached[0]
+
+        exact_bits = 0
+        fuzzy_masks = []
+        for skill in key:
+            mask = self.containing_mask(skill)
+            skill_id = self._ids.get(skill)
+            if (mask == 0 or (skill_id is not None and mask == 1 << skill_id)) and not exact_bits & mask:
+                exact_bits |= mask
+            else:
+                # Skills matched by other names, and repeated skills, are checked one by one
+                fuzzy_masks.append(mask)
+        profile = SkillProfile(exact_bits, fuzzy_masks, len(key))
+        self._profiles[key] = (profile, len(self._added))
+        return profile
+
+    def match(self, candidate_ids: List[int], scores: List[float],
+              profile: SkillProfile) -> Tuple[int, float]:
+        """
+        Match a candidate's skills against a compiled position profile
+
+        Args:
+            candidate_ids: Candidate skill IDs in the candidate's own order
+            scores: Proficiency score of each skill in candidate_ids
+            profile: Output of profile()
+
+        Returns:
+            Tuple of (required skills matched, total proficiency of the matches),
+            taking each match's proficiency from the first candidate skill that
+            satisfies it
+        """
+        first_score: Dict[int, float] = {}
+        for skill_id, score in zip(candidate_ids, scores):
+            first_score.setdefault(skill_id, score)
+        candidate_bits = to_bitset(first_score)
+
+        matched = candidate_bits & profile.exact_bits
+        matches = popcount(matched)
+        total = sum(first_score[skill_id] for skill_id in iter_bits(matched))
+
+        for mask in profile.fuzzy_masks:
+            if candidate_bits & mask:
+                matches += 1
+                total += next(first_score[skill_id] for skill_id in first_score if mask >> skill_id & 1)
+        return matches, total
@@ -0,0 +1,292 @@
+"""
+Snapshot Service
+
+This module dumps and loads the application tables at bulk-load speed, so
+staging and benchmark databases can be refreshed without replaying uploads
+through the scorer. Three snapshot formats are supported:
+- "sqlite": the SQLite online backup API copies the whole database, page by
+  page, to a single file; restoring copies it back the same way
+- "pgcopy": one PostgreSQL binary COPY file per table
+- "parquet": one Parquet file per table, readable by any backend
+
+The per-table formats write a directory holding a manifest.json with each
+table's columns and row count. Restoring one replaces the contents of the
+tables it lists on a single transaction: the secondary indexes in
+Database.INDEXES are dropped first and rebuilt once the rows are in, rather
+than maintained row by row, and SERIAL sequences are moved past the loaded
+ids. Columns the target schema lacks are skipped, and columns the snapshot
+lacks keep their defaults, so snapshots load across schema upgrades.
+"""
+
+import json
+import os
+import sqlite3
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    HAS_PYARROW = True
+except ImportError:
+    HAS_PYARROW = False
+
+# Tables in a snapshot, parents before the tables that reference their ids
+SNAPSHOT_TABLES = (
+    'positions', 'candidates', 'uploads', 'notifications', 'position_stats',
+    'skills', 'candidate_skills', 'candidate_minhash', 'candidate_lsh',
+    'candidate_blocks', 'duplicate_pairs',
+)
+
+# Tables with a SERIAL id column
+SERIAL_TABLES = ('positions', 'candidates', 'uploads', 'notifications', 'skills')
+
+SNAPSHOT_FORMATS = ('sqlite', 'pgcopy', 'parquet')
+
+# Rows per Parquet row group and per insert batch on restore
+SNAPSHOT_BATCH_ROWS = int(os.getenv('SNAPSHOT_BATCH_ROWS', 50000))
+
+MANIFEST = 'manifest.json'
+
+class SnapshotError(RuntimeError):
+    """Raised when a snapshot cannot be written or restored."""
+
+def _require_pyarrow() -> None:
+    if not HAS_PYARROW:
+        raise SnapshotError("The parquet format needs pyarrow; install the 'arrow' extra")
+
+def default_format(db) -> str:
+    """The fastest format the database's backend supports."""
+    return {'sqlite': 'sqlite', 'postgres': 'pgcopy'}.get(db.dialect.name, 'parquet')
+
+def create_snapshot(db, path: str, format: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Write a snapshot of the application tables
+
+    Args:
+        db: Database to snapshot
+        path: File to write for the sqlite format, directory for the others
+        format: One of SNAPSHOT_FORMATS; defaults to default_format(db)
+
+    Returns:
+        Manifest with the format and each table's columns and row count
+    """
+    format = format or default_format(db)
+    if format not in SNAPSHOT_FORMATS:
+        raise SnapshotError(f"Unknown snapshot format {format!r}")
+    if format == 'sqlite':
+        return _backup_sqlite(db, path)
+    if format == 'pgcopy' and db.dialect.name != 'postgres':
+        raise SnapshotError("The pgcopy format needs a PostgreSQL database")
+    if format == 'parquet':
+        _require_pyarrow()
+
+    os.makedirs(path, exist_ok=True)
+    manifest = {
+        "format": format,
+        "dialect": db.dialect.name,
+        "created_at": datetime.now().isoformat(),
+        "tables": {}
+    }
+    # End any open transaction, so the dump reads from one consistent snapshot
+    db.conn.commit()
+    try:
+        if db.dialect.name == 'postgres':
+            db._execute("SET TRANSACTION ISOLATION LEVEL REPEATABLE READ, READ ONLY")
+        elif db.dialect.begin_statement:
+            db._execute(db.dialect.begin_statement)
+        for table in SNAPSHOT_TABLES:
+            columns = _table_columns(db, table)
+            if format == 'pgcopy':
+                rows = _copy_out(db, table, columns, os.path.join(path, f"{table}.bin"))
+            else:
+                rows = _write_parquet(db, table, columns, os.path.join(path, f"{table}.parquet"))
+            manifest["tables"][table] = {"columns": columns, "rows": rows}
+            print(f"  - {table}: {rows:,} rows")
+    finally:
+        db.conn.rollback()
+
+    with open(os.path.join(path, MANIFEST), 'w') as f:
+        json.dump(manifest, f, indent=2)
+    return manifest
+
+def restore_snapshot(db, path: str) -> Dict[str, Any]:
+    """
+    Replace the application tables with the contents of a snapshot
+
+    Args:
+        db: Database to load into; its tables are created or upgraded first
+        path: A sqlite snapshot file, or a pgcopy or parquet snapshot directory
+
+    Returns:
+        Manifest of the restored snapshot
+    """
+    if os.path.isfile(path):
+        return _restore_sqlite(db, path)
+
+    manifest_path = os.path.join(path, MANIFEST)
+    if not os.path.isfile(manifest_path):
+        raise SnapshotError(f"{path} is not a snapshot: no {MANIFEST}")
+    with open(manifest_path) as f:
+        manifest = json.load(f)
+    if manifest["format"] == 'pgcopy' and db.dialect.name != 'postgres':
+        raise SnapshotError("pgcopy snapshots can only be restored into PostgreSQL; use the parquet format")
+    if manifest["format"] == 'parquet':
+        _require_pyarrow()
+
+    if not db.create_tables():
+        raise SnapshotError("Could not create the tables to restore into")
+    tables = [table for table in SNAPSHOT_TABLES if table in manifest["tables"]]
+    try:
+        if db.dialect.begin_statement and not db.conn.in_transaction:
+            db._execute(db.dialect.begin_statement)
+        db.drop_indexes()
+        for statement in db.dialect.clear_tables(tuple(reversed(tables))):
+            db._execute(statement)
+        for table in tables:
+            snapshot_columns = manifest["tables"][table]["columns"]
+            target_columns = set(_table_columns(db, table))
+            columns = [column for column in snapshot_columns if column in target_columns]
+            if manifest["format"] == 'pgcopy':
+                rows = _copy_in(db, table, snapshot_columns, columns, os.path.join(path, f"{table}.bin"))
+            else:
+                rows = _read_parquet(db, table, columns, os.path.join(path, f"{table}.parquet"))
+            print(f"  - {table}: {rows:,} rows")
+        for table in SERIAL_TABLES:
+            statement = db.dialect.reset_id_sequence(table)
+            if statement and table in tables:
+                db._execute(statement)
+        # One pass per index over the loaded rows
+        db.create_indexes()
+        db.conn.commit()
+    except Exception:
+        db.conn.rollback()
+        raise
+
+    if db.dialect.name == 'postgres':
+        # Fresh planner statistics for the reloaded tables
+        db._execute("ANALYZE")
+        db.conn.commit()
+    return manifest
+
+def _table_columns(db, table: str) -> List[str]:
+    """Column names of a table, in table order."""
+    cursor = db._execute(f"SELECT * FROM {table} LIMIT 0")
+    columns = [description[0] for description in cursor.description]
+    cursor.fetchall()
+    return columns
+
+def _backup_sqlite(db, path: str) -> Dict[str, Any]:
+    if db.dialect.name != 'sqlite':
+        raise SnapshotError("The sqlite format needs a SQLite database")
+    target = sqlite3.connect(path)
+    try:
+        # Copies committed pages; writers on other connections are not blocked
+        db.conn.backup(target)
+        counts = {table: target.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+                  for table in SNAPSHOT_TABLES}
+    finally:
+        target.close()
+    for table, rows in counts.items():
+        print(f"  - {table}: {rows:,} rows")
+    return {"format": 'sqlite', "dialect": 'sqlite', "created_at": datetime.now().isoformat(),
+            "tables": {table: {"rows": rows} for table, rows in counts.items()}}
+
+def _restore_sqlite(db, path: str) -> Dict[str, Any]:
+    if db.dialect.name != 'sqlite':
+        raise SnapshotError("sqlite snapshots can only be restored into SQLite; use the parquet format")
+    source = sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+    try:
+        db.conn.commit()
+        # Replaces the whole database, indexes included, page by page
+        source.backup(db.conn)
+    finally:
+        source.close()
+    # Snapshots taken before a schema upgrade gain the newer columns and indexes
+    if not db.create_tables():
+        raise SnapshotError("Could not upgrade the restored tables")
+    tables = {}
+    for table in SNAPSHOT_TABLES:
+        rows = db._execute(f"SELECT COUNT(*) AS count FROM {table}").fetchone()['count']
+        tables[table] = {"rows": rows}
+        print(f"  - {table}: {rows:,} rows")
+    return {"format": 'sqlite', "dialect": 'sqlite', "tables": tables}
+
+def _copy_out(db, table: str, columns: List[str], path: str) -> int:
+    with open(path, 'wb') as f:
+        db.cursor.copy_expert(f"COPY {table} ({', '.join(columns)}) TO STDOUT (FORMAT binary)", f)
+    return db.cursor.rowcount
+
+def _copy_in(db, table: str, snapshot_columns: List[str], columns: List[str], path: str) -> int:
+    if columns != snapshot_columns:
+        # Binary COPY rows carry every dumped column, in order
+        missing = sorted(set(snapshot_columns) - set(columns))
+        raise SnapshotError(f"{table} has no {', '.join(missing)} column; restore from a parquet snapshot")
+    with open(path, 'rb') as f:
+        db.cursor.copy_expert(f"COPY {table} ({', '.join(columns)}) FROM STDIN (FORMAT binary)", f)
+    return db.cursor.rowcount
+
+def _arrow_value(value):
+    # JSON columns come back as dicts and lists from PostgreSQL
+    if isinstance(value, (dict, list)):
+        return json.dumps(value)
+    return value
+
+def _write_parquet(db, table: str, columns: List[str], path: str) -> int:
+    cursor = db._execute(f"SELECT {', '.join(columns)} FROM {table}")
+    writer = None
+    schema = None
+    rows = 0
+    try:
+        while True:
+            batch = cursor.fetchmany(SNAPSHOT_BATCH_ROWS)
+            if not batch and writer is not None:
+                break
+            arrays = {column: [_arrow_value(row[column]) for row in batch] for column in columns}
+            if schema is None:
+                inferred = pa.table(arrays)
+                # Columns that are all NULL in the first batch are kept as text
+                schema = pa.schema([pa.field(field.name, pa.string()) if pa.types.is_null(field.type) else field
+                                    for field in inferred.schema])
+                writer = pq.ParquetWriter(path, schema)
+            writer.write_table(_to_schema(arrays, schema))
+            rows += len(batch)
+    finally:
+        if writer is not None:
+            writer.close()
+    return rows
+
+def _to_schema(arrays: Dict[str, list], schema: 'pa.Schema') -> 'pa.Table':
+    """Build a batch with the file's schema, falling back to text for values that do not fit it."""
+    columns = []
+    for field in schema:
+        try:
+            columns.append(pa.array(arrays[field.name], type=field.type))
+        except (pa.ArrowInvalid, pa.ArrowTypeError):
+            values = [None if value is None else str(value) for value in arrays[field.name]]
+            columns.append(pa.array(values, type=pa.string()).cast(field.type, safe=False))
+    return pa.Table.from_arrays(columns, schema=schema)
+
+def _read_parquet(db, table: str, columns: List[str], path: str) -> int:
+    if not columns:
+        return 0
+    boolean_columns = _boolean_columns(db, table)
+    query = db.dialect.insert(table, tuple(columns))
+    rows = 0
+    for batch in pq.ParquetFile(path).iter_batches(SNAPSHOT_BATCH_ROWS, columns=columns):
+        values = batch.to_pydict()
+        for column in boolean_columns & set(columns):
+            # SQLite and MySQL store booleans as integers
+            values[column] = [None if value is None else bool(value) for value in values[column]]
+        params = list(zip(*(values[column] for column in columns)))
+        db._executemany(query, params)
+        rows += len(params)
+    return rows
+
+def _boolean_columns(db, table: str) -> set:
+    """Columns PostgreSQL types as BOOLEAN, which reject integer values."""
+    if db.dialect.name != 'postgres':
+        return set()
+    rows = db._execute("SELECT column_name FROM information_schema.columns "
+                       "WHERE table_name = %s AND data_type = 'boolean'", (table,)).fetchall()
+    return {row['column_name'] for row in rows}
@@ -0,0 +1,166 @@
+"""
+Upload Metrics Service
+
+This module measures an upload run: wall time, time spent in each stage
+(parse, score, persist) and peak memory. Parsing and scoring may run in a
+worker process, so the worker measures its own stages and returns its
+UploadMetrics to be merged into the request's.
+
+Peak memory is tracked according to UPLOAD_MEMORY_TRACKING:
+- "rss" (default): a thread samples the process's resident set size every
+  UPLOAD_RSS_SAMPLE_INTERVAL seconds. Cheap, but misses spikes shorter than
+  the interval and requires /proc.
+- "tracemalloc": exact peak of Python allocations, but scoring runs several
+  times slower while it is on
+- "off": no memory tracking
+
+Peaks are reported as growth over the memory in use when a stage started.
+Uploads that overlap in one process are counted in each other's peaks.
+"""
+
+import os
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+from typing import Any, Dict, Optional
+
+MEMORY_TRACKING = os.getenv('UPLOAD_MEMORY_TRACKING', 'rss').lower()
+RSS_SAMPLE_INTERVAL = float(os.getenv('UPLOAD_RSS_SAMPLE_INTERVAL', 0.05))
+
+# Stages with a column on the uploads table
+STAGES = ('parse', 'score', 'persist')
+
+_PAGE_SIZE = os.sysconf('SC_PAGE_SIZE') if hasattr(os, 'sysconf') else 4096
+
+# tracemalloc is process-wide; it runs while any upload in the process needs it
+_tracing_lock = threading.Lock()
+_tracing_users = 0
+
+def current_rss() -> Optional[int]:
+    """Resident set size of this process in bytes, or None without /proc."""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * _PAGE_SIZE
+    except (OSError, ValueError, IndexError):
+        return None
+
+class _RssSampler(threading.Thread):
+    """Record the highest RSS seen until finish() is called."""
+
+    def __init__(self):
+        super().__init__(name='upload-rss-sampler', daemon=True)
+        self.baseline = current_rss()
+        self.peak = self.baseline
+        self._done = threading.Event()
+
+    def run(self):
+        while not self._done.wait(RSS_SAMPLE_INTERVAL):
+            self._sample()
+
+    def _sample(self):
+        rss = current_rss()
+        if rss is not None and (self.peak is None or rss > self.peak):
+            self.peak = rss
+
+    def finish(self) -> Optional[int]:
+        self._done.set()
+        self.join()
+        self._sample()
+        if self.baseline is None:
+            return None
+        return self.peak - self.baseline
+
+@contextmanager
+def _rss_peak():
+    sampler = _RssSampler()
+    sampler.start()
+    result = {"peak": None}
+    try:
+        yield result
+    finally:
+        result["peak"] = sampler.finish()
+
+@contextmanager
+def _traced_peak():
+    global _tracing_users
+    with _tracing_lock:
+        if _tracing_users == 0:
+            tracemalloc.start()
+        _tracing_users += 1
+        tracemalloc.reset_peak()
+        baseline = tracemalloc.get_traced_memory()[0]
+    result = {"peak": None}
+    try:
+        yield result
+    finally:
+        with _tracing_lock:
+            result["peak"] = max(0, tracemalloc.get_traced_memory()[1] - baseline)
+            _tracing_users -= 1
+            if _tracing_users == 0:
+                tracemalloc.stop()
+
+@contextmanager
+def measure_memory():
+    """
+    Measure the peak memory growth of the enclosed block
+
+    Yields:
+        Dict whose "peak" is set to the growth in bytes on exit, or None when
+        memory tracking is off or unavailable
+    """
+    if MEMORY_TRACKING == 'tracemalloc':
+        with _traced_peak() as result:
+            yield result
+    elif MEMORY_TRACKING == 'rss':
+        with _rss_peak() as result:
+            yield result
+    else:
+        yield {"peak": None}
+
+class UploadMetrics:
+    """Timings and peak memory of one upload run."""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.stage_seconds: Dict[str, float] = {}
+        self.peak_memory_bytes: Optional[int] = None
+
+    @contextmanager
+    def stage(self, name: str):
+        """Time the enclosed block as a stage and track its memory peak."""
+        start = time.perf_counter()
+        with measure_memory() as memory:
+            yield
+        self.stage_seconds[name] = self.stage_seconds.get(name, 0.0) + time.perf_counter() - start
+        self._record_peak(memory["peak"])
+
+    def _record_peak(self, peak: Optional[int]):
+        if peak is not None and (self.peak_memory_bytes is None or peak > self.peak_memory_bytes):
+            self.peak_memory_bytes = peak
+
+    def merge(self, other: 'UploadMetrics'):
+        """Add the stages measured by another UploadMetrics, e.g. from a worker process."""
+        for name, seconds in other.stage_seconds.items():
+            self.stage_seconds[name] = self.stage_seconds.get(name, 0.0) + seconds
+        self._record_peak(other.peak_memory_bytes)
+
+    def as_record(self, rows: int) -> Dict[str, Any]:
+        """
+        Metrics as uploads table columns
+
+        Args:
+            rows: Records in the upload, for rows_per_second
+
+        Returns:
+            Dict of wall_seconds, <stage>_seconds, rows_per_second and
+            peak_memory_bytes
+        """
+        wall_seconds = time.perf_counter() - self.started
+        record = {"wall_seconds": round(wall_seconds, 3)}
+        for name in STAGES:
+            seconds = self.stage_seconds.get(name)
+            record[f"{name}_seconds"] = round(seconds, 3) if seconds is not None else None
+        record["rows_per_second"] = round(rows / wall_seconds, 1) if wall_seconds > 0 else None
+        record["peak_memory_bytes"] = self.peak_memory_bytes
+        return record
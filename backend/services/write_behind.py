@@ -0,0 +1,234 @@
+"""
+Write-Behind Service
+
+This module takes low-priority inserts (notifications, upload records) off
+the request path. Database methods queue the rows in memory and return; a
+background thread commits them in batches on a connection of its own, as
+soon as WRITE_BEHIND_BATCH_SIZE rows are waiting or the oldest has waited
+WRITE_BEHIND_FLUSH_SECONDS. One commit, and one fsync, then covers the whole
+batch instead of each row.
+
+Write-behind is on by default, and it gives up read-after-write
+consistency for these tables: queued rows become visible to readers only
+when their batch commits. /api/notifications and /api/uploads can miss the
+records of an upload that just returned, and counts lag, by up to
+WRITE_BEHIND_FLUSH_SECONDS. Set WRITE_BEHIND=0 where that matters.
+
+Rows still queued when the process exits are flushed by an atexit hook (and
+by the ASGI lifespan), but are lost if the process is killed. When
+WRITE_BEHIND_MAX_QUEUED rows are waiting, callers block until the writer
+catches up. If the writer cannot open its connection, or cannot write a
+row even on its own, the buffer fails: the unwritten rows go back on the
+queue, add() raises WriteBehindUnavailable, and callers write the rows left
+queued and their own synchronously.
+"""
+
+import atexit
+import os
+import threading
+import time
+import weakref
+from collections import deque
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+# Set WRITE_BEHIND=0 to commit every insert in the calling request
+WRITE_BEHIND_ENABLED = os.getenv('WRITE_BEHIND', '1') != '0'
+WRITE_BEHIND_BATCH_SIZE = int(os.getenv('WRITE_BEHIND_BATCH_SIZE', 200))
+WRITE_BEHIND_FLUSH_SECONDS = float(os.getenv('WRITE_BEHIND_FLUSH_SECONDS', 0.5))
+WRITE_BEHIND_MAX_QUEUED = int(os.getenv('WRITE_BEHIND_MAX_QUEUED', 10000))
+
+# Buffers to flush at exit
+_buffers = weakref.WeakSet()
+
+class WriteBehindUnavailable(RuntimeError):
+    """Raised by add() when the buffer's writer has failed; insert the row directly instead."""
+
+class WriteBehindBuffer:
+    """
+    Queue of rows to insert, committed in batches by a background thread
+
+    Args:
+        connect: Returns the Database the writer thread inserts through,
+                 called on first use so idle buffers open no connection
+    """
+
+    def __init__(self, connect: Callable[[], Any], batch_size: int = WRITE_BEHIND_BATCH_SIZE,
+                 flush_interval: float = WRITE_BEHIND_FLUSH_SECONDS, max_queued: int = WRITE_BEHIND_MAX_QUEUED):
+        self.connect = connect
+        self.batch_size = max(1, batch_size)
+        self.flush_interval = flush_interval
+        self.max_queued = max(self.batch_size, max_queued)
+        # (table, row, on_commit, queued at)
+        self._queue: deque = deque()
+        self._condition = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+        self._closed = False
+        # Why the writer stopped, if it failed
+        self._error: Optional[Exception] = None
+        # Rows taken off the queue but not yet committed, for flush()
+        self._in_flight = 0
+        self._last_flush_seconds: Optional[float] = None
+        self._counts = {"written": 0, "failed": 0, "batches": 0, "blocked": 0}
+        _buffers.add(self)
+
+    def add(self, table: str, row: Dict[str, Any], on_commit: Optional[Callable[[int], None]] = None) -> None:
+        """
+        Queue a row for insertion
+
+        Args:
+            table: Table to insert into
+            row: Column values, already formatted for the database
+            on_commit: Called with the new row's ID once it is committed
+            
+        Raises:
+            WriteBehindUnavailable: The writer failed; the row was not queued
+        """
+        with self._condition:
+            if self._closed:
+                raise RuntimeError("Write-behind buffer is closed")
+            self._check_writer()
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='write-behind', daemon=True)
+                self._thread.start()
+            if len(self._queue) >= self.max_queued:
+                self._counts["blocked"] += 1
+                self._condition.notify_all()
+                while len(self._queue) >= self.max_queued and not self._closed and self._error is None:
+                    self._condition.wait()
+                self._check_writer()
+            self._queue.append((table, row, on_commit, time.monotonic()))
+            if len(self._queue) >= self.batch_size:
+                self._condition.notify_all()
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Wait until every row queued so far is committed (or failed); return False on timeout."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._condition:
+            self._condition.notify_all()
+            while self._queue or self._in_flight:
+                if self._thread is None or not self._thread.is_alive():
+                    return not self._queue
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._condition.wait(remaining)
+        return True
+
+    def close(self) -> None:
+        """Flush the queue and stop the writer thread."""
+        with self._condition:
+            if self._closed:
+                return
+            self._closed = True
+            self._condition.notify_all()
+            thread = self._thread
+        if thread is not None:
+            thread.join()
+        if self._queue:
+            # Only left by a failed writer that no caller has written for since
+            print(f"Write-behind buffer closed with {len(self._queue)} unwritten row(s): {self._error}")
+
+    def _check_writer(self) -> None:
+        if self._error is not None:
+            raise WriteBehindUnavailable(f"Write-behind writer failed: {self._error}")
+    
+    def _run(self) -> None:
+        try:
+            db = self.connect()
+        except Exception as e:
+            with self._condition:
+                self._error = e
+                self._condition.notify_all()
+            print(f"Write-behind writer could not connect, inserting synchronously: {e}")
+            return
+        while True:
+            with self._condition:
+                while not self._closed and not self._due():
+                    self._condition.wait(self._wait_seconds())
+                if not self._queue:
+                    if self._closed:
+                        return
+                    continue
+                batch = [self._queue.popleft() for _ in range(min(self.batch_size, len(self._queue)))]
+                self._in_flight = len(batch)
+                # Room in the queue for blocked callers
+                self._condition.notify_all()
+            unwritten = self._write(db, batch)
+            with self._condition:
+                self._in_flight = 0
+                if unwritten:
+                    # Back at the head of the queue for the next caller to write
+                    self._queue.extendleft(reversed(unwritten))
+                    self._error = RuntimeError(f"{len(unwritten)} row(s) could not be written")
+                self._condition.notify_all()
+            if unwritten:
+                print(f"Write-behind writer failed, inserting synchronously: {self._error}")
+                return
+
+    def write_queued(self, db) -> None:
+        """Write the rows a failed writer left queued through db, e.g. the caller's connection."""
+        with self._condition:
+            batch = list(self._queue)
+            self._queue.clear()
+            self._condition.notify_all()
+        unwritten = self._write(db, batch) if batch else []
+        with self._condition:
+            self._counts["failed"] += len(unwritten)
+        for table, row, _, _ in unwritten:
+            print(f"Dropped {table} row the write-behind writer could not write: {row}")
+
+    def _due(self) -> bool:
+        """Whether a full batch is waiting or the oldest row has waited flush_interval."""
+        if len(self._queue) >= self.batch_size:
+            return True
+        return bool(self._queue) and time.monotonic() - self._queue[0][3] >= self.flush_interval
+
+    def _wait_seconds(self) -> Optional[float]:
+        if not self._queue:
+            return None
+        return max(self.flush_interval - (time.monotonic() - self._queue[0][3]), 0.001)
+
+    def _write(self, db, batch: List[Tuple]) -> List[Tuple]:
+        """Insert a batch through db, retrying row by row if it fails; return the rows not written."""
+        started = time.perf_counter()
+        ids = db.insert_rows([(table, row) for table, row, _, _ in batch])
+        if ids is None:
+            # Retry the rows one by one, so a bad row only loses itself
+            ids = []
+            for table, row, _, _ in batch:
+                row_ids = db.insert_rows([(table, row)])
+                ids.append(row_ids[0] if row_ids else None)
+        written = sum(1 for id in ids if id is not None)
+        with self._condition:
+            self._counts["batches"] += 1
+            self._counts["written"] += written
+            self._last_flush_seconds = time.perf_counter() - started
+        for (_, _, on_commit, _), id in zip(batch, ids):
+            if on_commit is not None and id is not None:
+                try:
+                    on_commit(id)
+                except Exception as e:
+                    print(f"Error in write-behind commit callback: {e}")
+        return [entry for entry, id in zip(batch, ids) if id is None]
+
+    def status(self) -> Dict[str, Any]:
+        with self._condition:
+            oldest = time.monotonic() - self._queue[0][3] if self._queue else 0.0
+            return {
+                "queued": len(self._queue),
+                "inFlight": self._in_flight,
+                "oldestQueuedSeconds": round(oldest, 3),
+                "batchSize": self.batch_size,
+                "flushIntervalSeconds": self.flush_interval,
+                "maxQueued": self.max_queued,
+                "lastFlushSeconds": round(self._last_flush_seconds, 4) if self._last_flush_seconds is not None else None,
+                "error": str(self._error) if self._error is not None else None,
+                **self._counts,
+            }
+
+def close_all() -> None:
+    """Flush and stop every buffer, e.g. at shutdown."""
+    for buffer in list(_buffers):
+        buffer.close()
+
+atexit.register(close_all)
@@ -1,6 +1,7 @@
 """
 Main entry point for the CV Smart Hire application.
 This script starts the Flask backend on port 5001 to avoid conflicts with the Node.js server.
+Pass --asgi to serve the same API from the asyncio stack in backend/asgi.py instead.
 """
 
 import sys
@@ -13,5 +14,10 @@ sys.path.insert(0, os.path.abspath(os.path.dirname(__file__)))
 from backend.app import app
 
 if __name__ == '__main__':
-    # Start the Flask application on a different port to avoid conflict with Node.js
-    app.run(host='0.0.0.0', port=5001, debug=True)
\ No newline at end of file
+    if '--asgi' in sys.argv:
+        # Async serving mode: requires the 'async' optional dependencies
+        import uvicorn
+        uvicorn.run('backend.asgi:app', host='0.0.0.0', port=5001)
+    else:
+        # Start the Flask application on a different port to avoid conflict with Node.js
+        app.run(host='0.0.0.0', port=5001, debug=True)
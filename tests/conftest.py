@@ -0,0 +1,61 @@
+import os
+import tempfile
+
+import pandas as pd
+import pytest
+
+# The app opens its own database on import; the client fixture swaps in db
+os.environ.setdefault('SQLITE_PATH', os.path.join(tempfile.mkdtemp(), 'app.db'))
+os.environ.setdefault('WRITE_BEHIND', '0')
+
+from backend.services.cv_processing import process_cv_data
+from backend.services.database import Database
+from backend.services.sharding import ShardedDatabase
+
+POSITION = {
+    "title": "Backend Developer",
+    "department": "Engineering",
+    "required_skills": ["Python", "Flask", "SQL", "API"],
+    "status": "active",
+}
+
+def open_sqlite(path):
+    """A file-backed SQLite Database with its tables, without replicas or write-behind."""
+    db = Database(sqlite_path=str(path), replica_urls=[], write_behind=False)
+    assert db.create_tables()
+    return db
+
+@pytest.fixture
+def db(tmp_path):
+    db = open_sqlite(tmp_path / "hire.db")
+    db.create_position(POSITION)
+    return db
+
+@pytest.fixture
+def client(db, monkeypatch):
+    """Flask test client of the API, on the db fixture."""
+    from backend import api_routes
+    from backend.app import app
+    monkeypatch.setattr(api_routes, 'db', db)
+    return app.test_client()
+
+@pytest.fixture
+def sharded(tmp_path):
+    db = ShardedDatabase([open_sqlite(tmp_path / f"shard{index}.db") for index in range(3)], key='email')
+    db.create_position(POSITION)
+    return db
+
+def csv_rows(count, start=0):
+    """Bytes of a CSV upload with count candidates."""
+    lines = ["name,email,skills"]
+    lines += [f"Candidate {i},candidate{i}@example.com,\"Python, SQL, Flask\"" for i in range(start, start + count)]
+    return ("\n".join(lines) + "\n").encode("utf-8")
+
+def scored_candidates(count, start=0, position=POSITION):
+    """Processed candidates, every second one with all of position's skills."""
+    frame = pd.DataFrame({
+        "name": [f"Candidate {i}" for i in range(start, start + count)],
+        "email": [f"candidate{i}@example.com" for i in range(start, start + count)],
+        "skills": ["Python, SQL" if i % 2 else "Python, Flask, SQL, API" for i in range(start, start + count)],
+    })
+    return process_cv_data(frame, position)
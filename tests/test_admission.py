@@ -0,0 +1,80 @@
+import io
+import threading
+
+import pytest
+
+from backend import api_routes
+from backend.services.admission import Overloaded, ResourceGovernor
+from tests.conftest import csv_rows
+
+def test_full_queue_is_rejected_with_429():
+    governor = ResourceGovernor('test', max_concurrent=1, max_queued=0, queue_timeout=1)
+    started = governor.acquire()
+    with pytest.raises(Overloaded) as excinfo:
+        governor.acquire()
+    assert excinfo.value.status == 429
+    assert excinfo.value.retry_after >= 1
+    governor.release(started)
+    governor.release(governor.acquire())
+    assert governor.status()["admitted"] == 2
+    assert governor.status()["rejected"] == 1
+
+def test_queued_request_times_out_with_503():
+    governor = ResourceGovernor('test', max_concurrent=1, max_queued=1, queue_timeout=0.05)
+    governor.acquire()
+    with pytest.raises(Overloaded) as excinfo:
+        governor.acquire()
+    assert excinfo.value.status == 503
+    assert governor.status()["queued"] == 0
+    assert governor.status()["timedOut"] == 1
+
+def test_release_hands_slot_to_waiting_request():
+    governor = ResourceGovernor('test', max_concurrent=1, max_queued=1, queue_timeout=5)
+    started = governor.acquire()
+    admitted = threading.Event()
+
+    def wait_for_slot():
+        governor.acquire()
+        admitted.set()
+
+    waiter = threading.Thread(target=wait_for_slot)
+    waiter.start()
+    while governor.status()["queued"] == 0:
+        pass
+    # The slot is handed over, not freed for a new arrival
+    governor.release(started)
+    assert governor.status()["running"] == 1
+    waiter.join(5)
+    assert admitted.is_set()
+    assert governor.status()["running"] == 1
+
+def upload(client):
+    return client.post('/api/upload', data={
+        "position": "Backend Developer",
+        "file": (io.BytesIO(csv_rows(2)), "candidates.csv"),
+    })
+
+def test_upload_is_turned_away_when_busy(client, db, monkeypatch):
+    governor = api_routes.heavy_work
+    monkeypatch.setattr(governor, 'running', governor.max_concurrent)
+    monkeypatch.setattr(governor, 'max_queued', 0)
+
+    response = upload(client)
+    assert response.status_code == 429
+    assert int(response.headers["Retry-After"]) >= 1
+    assert response.get_json()["retryAfter"] == int(response.headers["Retry-After"])
+    assert db.get_all_candidates() == []
+
+def test_export_times_out_with_503(client, monkeypatch):
+    governor = api_routes.heavy_work
+    monkeypatch.setattr(governor, 'running', governor.max_concurrent)
+    monkeypatch.setattr(governor, 'queue_timeout', 0.05)
+
+    response = client.get('/api/exports')
+    assert response.status_code == 503
+    assert "Retry-After" in response.headers
+    assert client.get('/api/admission').get_json()["queued"] == 0
+
+def test_upload_runs_when_a_slot_is_free(client, db):
+    assert upload(client).status_code in (200, 201)
+    assert len(db.get_all_candidates()) == 2
@@ -0,0 +1,55 @@
+import pytest
+
+from tests.conftest import POSITION, scored_candidates
+
+CLOSED = {**POSITION, "title": "Closed Role", "status": "inactive"}
+
+@pytest.fixture
+def candidates(db):
+    """Ten hot candidates and ten of a closed position, created in 2019 and 2024."""
+    db.create_position(CLOSED)
+    for position, start in ((POSITION, 0), (CLOSED, 10)):
+        upload = db.start_upload({"filename": f"{start}.csv", "position": position["title"],
+                                  "content_hash": f"{start:064d}", "total_records": 10})
+        db.commit_upload_chunk(upload["id"], scored_candidates(10, start, position), 10)
+    db._execute("UPDATE candidates SET created_at = %s WHERE position = %s AND id <= 15",
+                ("2019-05-01 10:00:00", CLOSED["title"]))
+    db._execute("UPDATE candidates SET created_at = %s WHERE position = %s AND id > 15",
+                ("2024-05-01 10:00:00", CLOSED["title"]))
+    db.conn.commit()
+    return db
+
+def scores(candidates):
+    return [candidate["score"] for candidate in candidates]
+
+def test_archive_moves_closed_positions_to_yearly_partitions(candidates):
+    db = candidates
+    assert db.archive_candidates([POSITION["title"]], batch_size=3) == 10
+
+    assert {c["position"] for c in db.get_all_candidates()} == {POSITION["title"]}
+    assert len(db.get_archived_candidates()) == 10
+    assert len(db.get_archived_candidates(created_from="2024-01-01")) == 5
+    archived = db.get_archived_candidates()[0]
+    assert db.get_candidate_by_id(archived["id"]) is None
+    assert db.get_candidate_by_id(archived["id"], include_archived=True)["email"] == archived["email"]
+    assert CLOSED["title"] not in {row["position"] for row in db.get_position_stats()}
+
+def test_lists_with_archive_merge_in_score_order_with_null_scores(candidates):
+    db = candidates
+    db._execute("UPDATE candidates SET score = NULL WHERE id IN (1, 12)")
+    db.conn.commit()
+    db.archive_candidates([POSITION["title"]])
+
+    hot, archived = db.get_all_candidates(), db.get_archived_candidates()
+    assert scores(hot)[-1] is None and scores(archived)[-1] is None
+    merged = scores(db.get_all_candidates(include_archived=True))
+    assert len(merged) == 20
+    assert [score or 0 for score in merged] == sorted((score or 0 for score in merged), reverse=True)
+
+def test_prune_drops_whole_partitions_before_the_cutoff(candidates):
+    db = candidates
+    db.archive_candidates([POSITION["title"]])
+
+    assert db.drop_archive_partitions(2020) == [f"{db.ARCHIVE_TABLE}_2019"]
+    assert len(db.get_archived_candidates()) == 5
+    assert {c["created_at"][:4] for c in db.get_archived_candidates()} == {"2024"}
@@ -0,0 +1,59 @@
+import pytest
+
+from backend import api_routes
+from tests.conftest import POSITION, scored_candidates
+
+@pytest.fixture
+def candidates(db):
+    upload = db.start_upload({"filename": "a.csv", "position": POSITION["title"],
+                              "content_hash": "0" * 64, "total_records": 4})
+    db.commit_upload_chunk(upload["id"], scored_candidates(4), 4)
+    return {candidate["id"]: candidate for candidate in db.get_all_candidates()}
+
+def stats(db):
+    return {row["position"]: row for row in db.get_position_stats()}[POSITION["title"]]
+
+def test_bulk_update_changes_status_and_notes_and_reports_missing_ids(client, db, candidates):
+    before = stats(db)
+    response = client.post("/api/candidates/bulk", json={"updates": [
+        {"id": 1, "status": "shortlisted"},
+        {"id": 2, "notes": "call back"},
+        {"id": 3, "status": "rejected", "notes": "no"},
+        {"id": 99, "status": "review"},
+    ]})
+    assert response.status_code == 200
+    body = response.get_json()
+    assert body["notFound"] == [99]
+    updated = {candidate["id"]: candidate for candidate in body["updated"]}
+    assert (updated[1]["status"], updated[2]["notes"]) == ("shortlisted", "call back")
+    assert (updated[3]["status"], updated[3]["notes"]) == ("rejected", "no")
+    assert "dedup_key" not in updated[1]
+
+    assert db.get_candidate_by_id(2)["status"] == candidates[2]["status"]
+    after = stats(db)
+    assert after["shortlisted_count"] - before["shortlisted_count"] == \
+        int(candidates[1]["status"] != "shortlisted")
+    assert after["total_candidates"] == before["total_candidates"]
+
+@pytest.mark.parametrize("body", [
+    [1],
+    {},
+    {"updates": []},
+    {"updates": [{"status": "review"}]},
+    {"updates": [{"id": True, "status": "review"}]},
+    {"updates": [{"id": "1", "status": "review"}]},
+    {"updates": [{"id": 1}]},
+    {"updates": [{"id": 1, "status": "hired"}]},
+    {"updates": [{"id": 1, "notes": 5}]},
+    {"updates": [{"id": 1, "notes": None}]},
+])
+def test_invalid_bulk_updates_are_rejected_without_changes(client, db, candidates, body):
+    response = client.post("/api/candidates/bulk", json=body)
+    assert response.status_code == 400
+    assert {c["id"]: (c["status"], c["notes"]) for c in db.get_all_candidates()} == \
+        {id: (c["status"], c["notes"]) for id, c in candidates.items()}
+
+def test_bulk_update_is_capped(client, candidates, monkeypatch):
+    monkeypatch.setattr(api_routes, "MAX_BULK_UPDATES", 2)
+    updates = [{"id": id, "status": "review"} for id in (1, 2, 3)]
+    assert client.post("/api/candidates/bulk", json={"updates": updates}).status_code == 400
@@ -0,0 +1,77 @@
+import pandas as pd
+import pytest
+
+from backend.services.cv_processing import process_cv_data
+from backend.services.dedup import blocking_keys, find_duplicate_pairs, match_score, soundex
+from tests.conftest import POSITION, scored_candidates
+
+@pytest.fixture
+def candidates(db):
+    upload = db.start_upload({"filename": "a.csv", "position": "Backend Developer",
+                              "content_hash": "0" * 64, "total_records": 3})
+    db.commit_upload_chunk(upload["id"], scored_candidates(3), 3)
+    return db.get_all_candidates()
+
+@pytest.fixture
+def near_duplicates(db):
+    """Two spellings of one person and an unrelated candidate."""
+    frame = pd.DataFrame({
+        "name": ["Jon Smith", "John Smith", "Maria Garcia"],
+        "email": ["jon.smith@example.com", "jonsmith+jobs@example.com", "maria@example.com"],
+        "skills": ["Python, SQL", "Python, Flask, SQL, API", "Python"],
+    })
+    upload = db.start_upload({"filename": "a.csv", "position": POSITION["title"],
+                              "content_hash": "0" * 64, "total_records": 3})
+    db.commit_upload_chunk(upload["id"], process_cv_data(frame, POSITION), 3)
+    return {candidate["name"]: candidate for candidate in db.get_all_candidates()}
+
+def test_blocking_keys_group_spelling_variants():
+    assert soundex("Robert") == soundex("Rupert")
+    jon = {"name": "Jon Smith", "email": "jon.smith@example.com", "position": "Backend Developer"}
+    john = {"name": "Smith John", "email": "jonsmith+jobs@example.com", "position": "Backend Developer"}
+    other = dict(john, position="Data Engineer")
+    assert set(blocking_keys(jon)) & set(blocking_keys(john))
+    assert not set(blocking_keys(jon)) & set(blocking_keys(other))
+    assert match_score(jon, john) == 1.0
+
+def test_find_duplicate_pairs_only_compares_new_ids():
+    candidates = [
+        {"id": 1, "name": "Jon Smith", "email": "jon.smith@example.com", "position": "Dev"},
+        {"id": 2, "name": "John Smith", "email": "jonsmith@example.com", "position": "Dev"},
+        {"id": 3, "name": "Maria Garcia", "email": "maria@example.com", "position": "Dev"},
+    ]
+    assert find_duplicate_pairs(candidates) == [(1, 2, 1.0)]
+    assert find_duplicate_pairs(candidates, new_ids={3}) == []
+
+def test_upload_detects_duplicate_groups(db, near_duplicates):
+    groups = db.get_duplicate_groups()
+    jon, john = near_duplicates["Jon Smith"], near_duplicates["John Smith"]
+    assert [[candidate["id"] for candidate in group["candidates"]] for group in groups] == [[jon["id"], john["id"]]]
+    assert groups[0]["pairs"] == [{"candidateId": jon["id"], "duplicateId": john["id"], "score": 1.0}]
+
+def test_merge_folds_duplicates_into_kept_candidate(client, db, near_duplicates):
+    jon, john = near_duplicates["Jon Smith"], near_duplicates["John Smith"]
+    db.update_candidate_notes(jon["id"], "Phone screen done")
+    db.update_candidate_notes(john["id"], "Referred by Ana")
+
+    response = client.post('/api/duplicates/merge', json={"keep": jon["id"], "merge": [john["id"]]})
+    assert response.status_code == 200
+    assert response.get_json()["notes"] == "Phone screen done\n\nReferred by Ana"
+
+    assert db.get_candidate_by_id(john["id"]) is None
+    assert sorted(candidate["name"] for candidate in db.get_all_candidates()) == ["Jon Smith", "Maria Garcia"]
+    assert db.get_duplicate_groups() == []
+    stats = {row["position"]: row for row in db.get_position_stats()}
+    assert stats[POSITION["title"]]["total_candidates"] == 2
+
+@pytest.mark.parametrize("body", [
+    {"keep": True, "merge": [2]},
+    {"keep": 1, "merge": [True]},
+    {"keep": "1", "merge": [2]},
+    {"keep": 1, "merge": []},
+    [1, 2],
+])
+def test_merge_rejects_ids_that_are_not_integers(client, db, candidates, body):
+    response = client.post('/api/duplicates/merge', json=body)
+    assert response.status_code == 400
+    assert len(db.get_all_candidates()) == 3
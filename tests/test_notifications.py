@@ -0,0 +1,54 @@
+import json
+from datetime import datetime
+
+import pytest
+
+from backend import api_routes
+from backend.services.notifications import broker
+
+def notification(message):
+    return {"message": message, "type": "info", "read": False, "created_at": datetime.now().isoformat()}
+
+def next_events(chunks, count):
+    """The next count notification events of an SSE stream, as (event id, message)."""
+    received = []
+    while len(received) < count:
+        fields = dict(line.split(": ", 1) for line in next(chunks).decode().splitlines() if ": " in line)
+        if "data" in fields:
+            received.append((int(fields["id"]), json.loads(fields["data"])["message"]))
+    return received
+
+@pytest.fixture
+def open_stream(client, monkeypatch):
+    monkeypatch.setattr(api_routes, "SSE_HEARTBEAT_SECONDS", 0.05)
+    responses = []
+    def open_stream(query=""):
+        response = client.get(f"/api/notifications/stream{query}", buffered=False)
+        responses.append(response)
+        return iter(response.response)
+    yield open_stream
+    for response in responses:
+        response.close()
+
+def test_reconnect_replays_every_missed_notification(db, open_stream, monkeypatch):
+    monkeypatch.setattr(api_routes, "SSE_REPLAY_PAGE_SIZE", 2)
+    for i in range(5):
+        db.create_notification(notification(f"n{i}"))
+
+    events = next_events(open_stream("?since=1"), 4)
+    assert [message for _, message in events] == ["n1", "n2", "n3", "n4"]
+    assert [event_id for event_id, _ in events] == [2, 3, 4, 5]
+
+def test_live_notification_committed_out_of_order_is_sent(db, open_stream):
+    db.create_notification(notification("replayed"))
+    chunks = open_stream("?since=0")
+    assert next_events(chunks, 1) == [(1, "replayed")]
+
+    broker.publish({"id": 1, **notification("replayed")})
+    broker.publish({"id": 5, **notification("five")})
+    broker.publish({"id": 4, **notification("four")})
+    broker.publish({"id": 5, **notification("five")})
+    broker.publish({"id": 6, **notification("six")})
+
+    # The event ID stays the highest ID sent, so a reconnect resumes after it
+    assert next_events(chunks, 3) == [(5, "five"), (5, "four"), (6, "six")]
@@ -0,0 +1,82 @@
+import gzip
+import io
+import json
+import zipfile
+
+import pandas as pd
+import pytest
+
+from backend.services import parsers
+from backend.services.parsers import (UnsupportedFormatError, get_parser, parse_upload, register_parser,
+                                      resolve_engine)
+from tests.conftest import csv_rows
+
+ENGINES = ["pandas", pytest.param("pyarrow", marks=pytest.mark.skipif(
+    not parsers.HAS_PYARROW, reason="pyarrow is not installed"))]
+
+def zipped(name, data):
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w") as archive:
+        archive.writestr(name, data)
+    return buffer.getvalue()
+
+def json_lines(data):
+    frame = pd.read_csv(io.BytesIO(data))
+    return "\n".join(json.dumps(row) for row in frame.to_dict("records")).encode()
+
+@pytest.mark.parametrize("filename, parser", [
+    ("a.csv", parsers.parse_csv),
+    ("A.CSV", parsers.parse_csv),
+    ("a.csv.gz", parsers.parse_gzip_csv),
+    ("a.zip", parsers.parse_zip_csv),
+    ("a.parquet", parsers.parse_parquet),
+    ("a.jsonl", parsers.parse_json_lines),
+    ("a.ndjson", parsers.parse_json_lines),
+    ("a.xlsx", None),
+    ("a.gz", None),
+])
+def test_parser_is_picked_by_the_longest_matching_extension(filename, parser):
+    assert get_parser(filename) is parser
+
+@pytest.mark.parametrize("engine", ENGINES)
+@pytest.mark.parametrize("filename, encode", [
+    ("a.csv", lambda data: data),
+    ("a.csv.gz", gzip.compress),
+    ("a.zip", lambda data: zipped("candidates.csv", data)),
+    ("a.jsonl", json_lines),
+])
+def test_every_format_parses_to_the_same_rows(filename, encode, engine):
+    data = csv_rows(4)
+    frame = parse_upload(filename, encode(data), engine=engine)
+    assert list(frame["email"]) == [f"candidate{i}@example.com" for i in range(4)]
+    assert list(frame["skills"]) == ["Python, SQL, Flask"] * 4
+
+def test_parquet_upload():
+    pytest.importorskip("pyarrow")
+    buffer = io.BytesIO()
+    pd.read_csv(io.BytesIO(csv_rows(3))).to_parquet(buffer)
+    assert len(parse_upload("a.parquet", buffer.getvalue())) == 3
+
+@pytest.mark.parametrize("engine", ENGINES)
+@pytest.mark.parametrize("filename, data", [
+    ("a.xlsx", b"anything"),
+    ("a.csv", b""),
+    ("a.csv.gz", b"\x1f\x8bnot gzip"),
+    ("a.zip", b"PK\x03\x04junk"),
+    ("a.zip", zipped("notes.txt", b"no csv here")),
+    ("a.jsonl", b'{"name": '),
+])
+def test_unsupported_or_malformed_files_raise_unsupported_format(filename, data, engine):
+    with pytest.raises(UnsupportedFormatError):
+        parse_upload(filename, data, engine=engine)
+
+def test_engine_falls_back_to_pandas_without_pyarrow(monkeypatch):
+    monkeypatch.setattr(parsers, "HAS_PYARROW", False)
+    assert resolve_engine("auto") == "pandas"
+    assert resolve_engine("pyarrow") == "pandas"
+
+def test_registered_parser_is_used(monkeypatch):
+    monkeypatch.setattr(parsers, "PARSERS", dict(parsers.PARSERS))
+    register_parser(".TSV", lambda data, engine=None: pd.read_csv(io.BytesIO(data), sep="\t"))
+    frame = parse_upload("a.tsv", b"name\temail\nA\ta@example.com\n")
+    assert list(frame["email"]) == ["a@example.com"]
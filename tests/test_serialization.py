@@ -0,0 +1,82 @@
+import gzip
+import io
+import json
+
+import pytest
+
+from backend.services import serialization
+from backend.services.serialization import (ARROW_TYPE, COLUMNAR_JSON_TYPE, JSON_TYPE, MSGPACK_TYPE,
+                                            choose_encoding, compress, encode_records, negotiate)
+from tests.conftest import scored_candidates
+
+@pytest.fixture
+def candidates(db):
+    upload = db.start_upload({"filename": "a.csv", "position": "Backend Developer",
+                              "content_hash": "0" * 64, "total_records": 20})
+    db.commit_upload_chunk(upload["id"], scored_candidates(20), 20)
+    return db.get_all_candidates()
+
+def test_negotiate_follows_quality_and_availability(monkeypatch):
+    monkeypatch.setattr(serialization, 'HAS_MSGPACK', False)
+    assert negotiate(None) == JSON_TYPE
+    assert negotiate(f"{JSON_TYPE};q=0.5, {COLUMNAR_JSON_TYPE}") == COLUMNAR_JSON_TYPE
+    assert negotiate(f"{COLUMNAR_JSON_TYPE};q=0.2, {JSON_TYPE}") == JSON_TYPE
+    # Types the server can't produce fall back to JSON
+    assert negotiate(MSGPACK_TYPE) == JSON_TYPE
+    assert negotiate(JSON_TYPE, format='msgpack') == JSON_TYPE
+    # ?format= overrides Accept
+    assert negotiate(JSON_TYPE, format='Columnar') == COLUMNAR_JSON_TYPE
+
+def test_columnar_json_keeps_missing_fields_as_null():
+    records = [{"id": 1, "name": "A"}, {"id": 2, "score": 80}]
+    body = json.loads(encode_records(records, COLUMNAR_JSON_TYPE))
+    assert body == {
+        "fields": ["id", "name", "score"],
+        "columns": {"id": [1, 2], "name": ["A", None], "score": [None, 80]},
+        "length": 2,
+    }
+
+def test_list_endpoint_returns_negotiated_format(client, candidates):
+    response = client.get('/api/candidates', headers={"Accept": COLUMNAR_JSON_TYPE})
+    assert response.status_code == 200
+    assert response.mimetype == COLUMNAR_JSON_TYPE
+    assert 'Accept' in response.vary
+    body = response.get_json()
+    assert body["length"] == len(candidates)
+    assert sorted(body["columns"]["id"]) == sorted(candidate["id"] for candidate in candidates)
+
+    plain = client.get('/api/candidates').get_json()
+    assert [row["id"] for row in plain] == body["columns"]["id"]
+
+def test_list_endpoint_returns_arrow_stream(client, candidates):
+    pa = pytest.importorskip('pyarrow')
+    response = client.get('/api/candidates?format=arrow')
+    assert response.mimetype == ARROW_TYPE
+    table = pa.ipc.open_stream(io.BytesIO(response.data)).read_all()
+    assert table.num_rows == len(candidates)
+    # Nested fields are sent as JSON text
+    by_id = {candidate["id"]: candidate for candidate in candidates}
+    first = table.slice(0, 1).to_pylist()[0]
+    assert json.loads(first["skills"]) == by_id[first["id"]]["skills"]
+
+def test_choose_encoding_prefers_brotli_when_installed(monkeypatch):
+    monkeypatch.setattr(serialization, 'HAS_BROTLI', False)
+    assert choose_encoding("br, gzip") == 'gzip'
+    assert choose_encoding("gzip;q=0, identity") is None
+    monkeypatch.setattr(serialization, 'HAS_BROTLI', True)
+    assert choose_encoding("br, gzip") == 'br'
+    assert choose_encoding("br;q=0, gzip") == 'gzip'
+
+def test_compress_skips_small_bodies():
+    assert compress(b"[]", 'gzip') == (b"[]", None)
+    body = b"x" * serialization.MIN_COMPRESS_SIZE
+    compressed, encoding = compress(body, 'gzip')
+    assert encoding == 'gzip' and gzip.decompress(compressed) == body
+
+def test_list_endpoint_gzips_large_responses(client, candidates, monkeypatch):
+    monkeypatch.setattr(serialization, 'HAS_BROTLI', False)
+    response = client.get('/api/candidates', headers={"Accept-Encoding": "br, gzip"})
+    assert response.headers["Content-Encoding"] == 'gzip'
+    assert 'Accept-Encoding' in response.vary
+    rows = json.loads(gzip.decompress(response.data))
+    assert len(rows) == len(candidates)
@@ -0,0 +1,87 @@
+import pytest
+
+from backend.services.sharding import ShardedDatabase
+from tests.conftest import POSITION, scored_candidates
+
+def start_upload(db, rows):
+    return db.start_upload({
+        "filename": "candidates.csv",
+        "position": POSITION["title"],
+        "content_hash": "0" * 64,
+        "total_records": rows,
+    })
+
+def stored_emails(shard):
+    return {candidate["email"] for candidate in shard.get_all_candidates(summary=True)}
+
+@pytest.mark.parametrize("shards", [1, 2, 3, 7])
+def test_global_ids_round_trip(sharded, shards):
+    sharded = ShardedDatabase([sharded.home] * shards, key='email')
+    for index in range(shards):
+        for local_id in (1, 2, 17, 10_000):
+            global_id = sharded._global_id(index, local_id)
+            assert sharded._locate(global_id) == (index, local_id)
+            assert global_id % shards == index
+
+def test_global_ids_are_distinct_across_shards(sharded):
+    ids = {sharded._global_id(index, local_id) for index in range(3) for local_id in range(1, 50)}
+    assert len(ids) == 3 * 49
+
+def test_merge_by_score_keeps_score_order_and_globalizes_ids(sharded):
+    results = [
+        [{"id": 1, "score": 90}, {"id": 2, "score": 40}],
+        [{"id": 1, "score": 95}, {"id": 2, "score": 40}, {"id": 3, "score": None}],
+        [{"id": 1, "score": 60}],
+    ]
+    merged = sharded._merge_by_score(results)
+    assert [candidate["score"] for candidate in merged] == [95, 90, 60, 40, 40, None]
+    # Equal scores keep shard order
+    assert [candidate["id"] for candidate in merged] == [4, 3, 5, 6, 7, 10]
+
+def test_candidate_reads_use_global_ids(sharded):
+    upload = start_upload(sharded, 30)
+    assert sharded.commit_upload_chunk(upload["id"], scored_candidates(30), 30) == (30, 0)
+
+    candidates = sharded.get_all_candidates()
+    assert len(candidates) == 30
+    assert [candidate["score"] for candidate in candidates] == sorted(
+        (candidate["score"] for candidate in candidates), reverse=True)
+    for candidate in candidates:
+        assert sharded.get_candidate_by_id(candidate["id"])["email"] == candidate["email"]
+
+def test_commit_upload_chunk_spreads_candidates_and_advances_checkpoint(sharded):
+    candidates = scored_candidates(30)
+    upload = start_upload(sharded, len(candidates))
+
+    assert sharded.commit_upload_chunk(upload["id"], candidates, len(candidates)) == (30, 0)
+
+    for index, shard in enumerate(sharded.shards):
+        expected = {c["email"] for c in candidates if sharded.shard_index(c) == index}
+        assert stored_emails(shard) == expected
+    stored = sharded.home.get_all_uploads()[0]
+    assert (stored["committed_rows"], stored["successful_records"], stored["chunks_committed"]) == (30, 30, 1)
+
+def test_failed_shard_leaves_checkpoint_and_home_rows_unwritten(sharded, monkeypatch):
+    candidates = scored_candidates(30)
+    upload = start_upload(sharded, len(candidates))
+    monkeypatch.setattr(sharded.shards[1], "commit_candidate_chunk", lambda candidates: None)
+
+    assert sharded.commit_upload_chunk(upload["id"], candidates, len(candidates)) is None
+
+    # The home shard commits last, so neither its rows nor the checkpoint were written
+    assert stored_emails(sharded.home) == set()
+    stored = sharded.home.get_all_uploads()[0]
+    assert (stored["committed_rows"], stored["successful_records"], stored["chunks_committed"]) == (0, 0, 0)
+
+def test_rewritten_chunk_after_home_failure_is_not_duplicated(sharded, monkeypatch):
+    candidates = scored_candidates(30)
+    upload = start_upload(sharded, len(candidates))
+    home_commit = sharded.home.commit_upload_chunk
+    monkeypatch.setattr(sharded.home, "commit_upload_chunk", lambda *args, **kwargs: None)
+    assert sharded.commit_upload_chunk(upload["id"], candidates, len(candidates)) is None
+
+    # The other shards kept their part; writing the chunk again upserts it
+    monkeypatch.setattr(sharded.home, "commit_upload_chunk", home_commit)
+    assert sharded.commit_upload_chunk(upload["id"], candidates, len(candidates)) is not None
+    assert len(sharded.get_all_candidates()) == 30
+    assert sharded.home.get_all_uploads()[0]["committed_rows"] == 30
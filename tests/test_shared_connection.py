@@ -0,0 +1,26 @@
+import threading
+
+from backend.services.database import Database
+
+def test_failed_statement_in_a_transaction_does_not_block_other_threads():
+    db = Database(sqlite_path=':memory:', replica_urls=[], write_behind=False)
+    assert db.create_tables()
+
+    def fail_inside_transaction():
+        db._execute("UPDATE candidates SET notes = %s WHERE id = %s", ("opened", 1))
+        try:
+            db._execute("INSERT INTO no_such_table VALUES (1)")
+        except Exception:
+            pass  # and no rollback
+    thread = threading.Thread(target=fail_inside_transaction)
+    thread.start()
+    thread.join()
+
+    done = threading.Event()
+    def create_position():
+        db.create_position({"title": "Tester", "department": "QA", "required_skills": ["Python"],
+                            "status": "active"})
+        done.set()
+    threading.Thread(target=create_position, daemon=True).start()
+    assert done.wait(5)
+    assert db.get_position_by_title("Tester")
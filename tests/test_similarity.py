@@ -0,0 +1,52 @@
+import pandas as pd
+
+from backend.services.cv_processing import process_cv_data
+from backend.services.similarity import estimate_similarity, lsh_buckets, minhash_signature
+from tests.conftest import POSITION
+
+SKILL_SETS = {
+    "web": "Python, Flask, SQL, API, Docker",
+    "web-ish": "Python, Flask, SQL, API, Redis",
+    "mobile": "Swift, Kotlin, Xcode, Android, Gradle",
+}
+
+def add_candidates(db, skill_sets):
+    frame = pd.DataFrame({
+        "name": list(skill_sets),
+        "email": [f"{name}@example.com" for name in skill_sets],
+        "skills": list(skill_sets.values()),
+    })
+    upload = db.start_upload({"filename": "a.csv", "position": POSITION["title"],
+                              "content_hash": "0" * 64, "total_records": len(frame)})
+    db.commit_upload_chunk(upload["id"], process_cv_data(frame, POSITION), len(frame))
+    return {candidate["name"]: candidate["id"] for candidate in db.get_all_candidates()}
+
+def test_signatures_estimate_jaccard_similarity():
+    python = minhash_signature(["python", "flask", "sql", "api"])
+    assert minhash_signature(["api", "sql", "flask", "python"]) == python
+    assert estimate_similarity(python, python) == 1.0
+    assert estimate_similarity(python, minhash_signature(["swift", "kotlin", "xcode", "gradle"])) < 0.2
+    assert 0.3 < estimate_similarity(python, minhash_signature(["python", "flask", "sql", "go"])) < 0.9
+    assert minhash_signature([]) is None
+
+def test_identical_skill_sets_share_every_bucket():
+    signature = minhash_signature(["python", "sql"])
+    assert lsh_buckets(signature) == lsh_buckets(minhash_signature(["sql", "python"]))
+    assert len({band for band, _ in lsh_buckets(signature)}) == 16
+
+def test_similar_candidates_are_found_through_shared_buckets(db):
+    ids = add_candidates(db, {**SKILL_SETS, "web twin": SKILL_SETS["web"]})
+
+    similar = db.get_similar_candidates(ids["web"], limit=5)
+    names = [candidate["name"] for candidate in similar]
+    assert names[0] == "web twin" and similar[0]["similarity"] == 1.0
+    assert "web" not in names
+    assert "mobile" not in names
+    assert [c["similarity"] for c in similar] == sorted((c["similarity"] for c in similar), reverse=True)
+
+def test_similar_candidates_api(client, db):
+    ids = add_candidates(db, {**SKILL_SETS, "web twin": SKILL_SETS["web"]})
+    response = client.get(f"/api/candidates/{ids['web']}/similar?limit=1")
+    assert response.status_code == 200
+    assert [candidate["name"] for candidate in response.get_json()] == ["web twin"]
+    assert client.get("/api/candidates/999/similar").status_code == 404
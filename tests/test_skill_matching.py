@@ -0,0 +1,52 @@
+import random
+
+from backend.services.cv_processing import calculate_skill_match
+from backend.services.skills import SkillDictionary, iter_bits, popcount, to_bitset
+
+VOCABULARY = ["Python", "SQL", "PostgreSQL", "MySQL", "Java", "JavaScript", "React", "React Native",
+              "CSS", "HTML", "Go", "Django", "Flask", "API", "REST API", "Machine Learning", "R"]
+
+def string_scan_match(candidate_skills, required_skills):
+    """The skill match before skill bitsets: a substring scan per required skill."""
+    if not required_skills:
+        return 85
+    if not candidate_skills:
+        return 50
+    matches = 0
+    total_score = 0
+    for skill in required_skills:
+        for candidate_skill, score in candidate_skills.items():
+            if skill.lower() in candidate_skill.lower():
+                matches += 1
+                total_score += score
+                break
+    match_percentage = matches / len(required_skills) * 100
+    avg_score = total_score / matches if matches > 0 else 60
+    return max(0, min(100, int(0.6 * match_percentage + 0.4 * avg_score)))
+
+def test_bitset_match_agrees_with_string_scan():
+    rng = random.Random(36)
+    for _ in range(3000):
+        candidate_skills = {rng.choice(VOCABULARY).upper() if rng.random() < 0.2 else rng.choice(VOCABULARY):
+                            rng.choice([60, 70, 85, 95]) for _ in range(rng.randint(0, 6))}
+        required_skills = [rng.choice(VOCABULARY) for _ in range(rng.randint(0, 5))]
+        assert calculate_skill_match(candidate_skills, required_skills) == \
+            string_scan_match(candidate_skills, required_skills), (candidate_skills, required_skills)
+
+def test_required_skill_matches_names_containing_it():
+    dictionary = SkillDictionary()
+    for skill_id, name in enumerate(["postgresql", "sql", "react native"], start=1):
+        dictionary.add(skill_id, name)
+    assert set(iter_bits(dictionary.containing_mask("SQL"))) == {1, 2}
+    # Names added after a mask was built extend it
+    dictionary.add(4, "mysql")
+    assert set(iter_bits(dictionary.containing_mask("sql"))) == {1, 2, 4}
+
+    profile = dictionary.profile(["sql", "react"])
+    assert dictionary.match([4, 3], [70, 90], profile) == (2, 160)
+    assert dictionary.match([3], [90], profile) == (1, 90)
+
+def test_bitset_helpers():
+    bits = to_bitset([0, 3, 64])
+    assert popcount(bits) == 3
+    assert list(iter_bits(bits)) == [0, 3, 64]
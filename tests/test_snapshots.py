@@ -0,0 +1,36 @@
+import pytest
+
+from backend.services import snapshots
+from backend.services.snapshots import SnapshotError, create_snapshot, restore_snapshot
+from tests.conftest import open_sqlite, scored_candidates
+
+@pytest.fixture
+def populated(db):
+    upload = db.start_upload({"filename": "a.csv", "position": "Backend Developer",
+                              "content_hash": "0" * 64, "total_records": 20})
+    db.commit_upload_chunk(upload["id"], scored_candidates(20), 20)
+    return db
+
+def comparable(candidates):
+    return sorted((c["id"], c["email"], c["score"], c["status"], tuple(c["skills"])) for c in candidates)
+
+@pytest.mark.parametrize("format", ["parquet", "sqlite"])
+def test_snapshot_round_trip(populated, tmp_path, format):
+    if format == "parquet":
+        pytest.importorskip("pyarrow")
+    path = str(tmp_path / f"snapshot.{format}")
+    manifest = create_snapshot(populated, path, format)
+    if format == "parquet":
+        assert manifest["tables"]["candidates"]["rows"] == 20
+
+    target = open_sqlite(tmp_path / "restored.db")
+    restore_snapshot(target, path)
+
+    assert comparable(target.get_all_candidates()) == comparable(populated.get_all_candidates())
+    assert [p["title"] for p in target.get_all_positions()] == ["Backend Developer"]
+    assert target.get_position_stats() == populated.get_position_stats()
+
+def test_parquet_without_pyarrow_raises_snapshot_error(populated, tmp_path, monkeypatch):
+    monkeypatch.setattr(snapshots, "HAS_PYARROW", False)
+    with pytest.raises(SnapshotError, match="pyarrow"):
+        create_snapshot(populated, str(tmp_path / "snapshot"), "parquet")
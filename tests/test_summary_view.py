@@ -0,0 +1,40 @@
+import pytest
+
+from backend.services.database import Database
+from tests.conftest import scored_candidates
+
+SUMMARY_COLUMNS = set(Database.CANDIDATE_SUMMARY_COLUMNS)
+
+@pytest.fixture
+def candidates(db):
+    upload = db.start_upload({"filename": "a.csv", "position": "Backend Developer",
+                              "content_hash": "0" * 64, "total_records": 6})
+    db.commit_upload_chunk(upload["id"], scored_candidates(6), 6)
+    return db.get_all_candidates()
+
+@pytest.mark.parametrize("query", ["", "&skills=Python", "&min_years=0"])
+def test_summary_view_returns_only_summary_columns(client, candidates, query):
+    response = client.get(f'/api/candidates?view=summary{query}')
+    assert response.status_code == 200
+    rows = response.get_json()
+    assert len(rows) == len(candidates)
+    assert all(set(row) == SUMMARY_COLUMNS for row in rows)
+
+def test_full_view_has_no_internal_columns(client, candidates):
+    rows = client.get('/api/candidates').get_json()
+    assert {"skills", "experience", "notes"} <= set(rows[0])
+    assert not set(rows[0]) & set(Database.INTERNAL_CANDIDATE_COLUMNS)
+
+def test_batch_returns_full_rows(client, candidates):
+    ids = [candidate["id"] for candidate in candidates[:3]]
+    response = client.get(f'/api/candidates/batch?ids={",".join(map(str, ids))},999')
+    assert response.status_code == 200
+    rows = response.get_json()
+    by_id = {candidate["id"]: candidate for candidate in candidates}
+    assert sorted(row["id"] for row in rows) == sorted(ids)
+    assert all(row == by_id[row["id"]] for row in rows)
+    assert all(not set(row) & set(Database.INTERNAL_CANDIDATE_COLUMNS) for row in rows)
+
+@pytest.mark.parametrize("ids", ["", "1,a"])
+def test_batch_rejects_bad_ids(client, candidates, ids):
+    assert client.get(f'/api/candidates/batch?ids={ids}').status_code == 400
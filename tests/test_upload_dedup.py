@@ -0,0 +1,33 @@
+import io
+
+from backend.services.database import candidate_dedup_key
+from tests.conftest import POSITION, csv_rows
+
+def upload(client, data, filename="candidates.csv"):
+    return client.post("/api/upload", data={"position": POSITION["title"],
+                                            "file": (io.BytesIO(data), filename)})
+
+def test_same_file_uploaded_twice_is_skipped(client, db):
+    first = upload(client, csv_rows(5))
+    assert first.status_code == 200 and first.get_json()["successfulRecords"] == 5
+
+    second = upload(client, csv_rows(5), "renamed.csv")
+    assert second.status_code == 200
+    assert second.get_json()["duplicate"] is True
+    assert second.get_json()["successfulRecords"] == 0
+    assert len(db.get_all_uploads()) == 1
+    assert len(db.get_all_candidates()) == 5
+
+def test_candidate_in_two_files_is_stored_once(client, db):
+    upload(client, csv_rows(5))
+    response = upload(client, csv_rows(5, start=3), "later.csv")
+    assert response.get_json()["successfulRecords"] == 5
+
+    emails = [candidate["email"] for candidate in db.get_all_candidates()]
+    assert sorted(emails) == sorted(f"candidate{i}@example.com" for i in range(8))
+    stats = {row["position"]: row for row in db.get_position_stats()}
+    assert stats[POSITION["title"]]["total_candidates"] == 8
+
+def test_email_case_and_whitespace_do_not_make_a_new_candidate():
+    assert candidate_dedup_key(" Candidate1@Example.com ", "Backend  Developer") == \
+        candidate_dedup_key("candidate1@example.com", "backend developer")
@@ -0,0 +1,61 @@
+import hashlib
+
+import pytest
+
+from backend.services import ingest
+from backend.services.ingest import UploadInProgressError, UploadInterruptedError, import_upload
+from tests.conftest import POSITION, csv_rows
+
+@pytest.fixture(autouse=True)
+def small_chunks(monkeypatch):
+    monkeypatch.setattr(ingest, "UPLOAD_CHUNK_ROWS", 10)
+
+def upload_file(db, data):
+    return import_upload(db, "candidates.csv", data, db.get_position_by_title(POSITION["title"]),
+                         hashlib.sha256(data).hexdigest())
+
+def record_chunks(db, monkeypatch, commit, fail_at=None):
+    """Record commit_upload_chunk calls, failing call number fail_at as if the connection dropped."""
+    calls = []
+    def recorded(*args, **kwargs):
+        calls.append(args)
+        return None if len(calls) == fail_at else commit(*args, **kwargs)
+    monkeypatch.setattr(db, "commit_upload_chunk", recorded)
+    return calls
+
+def test_interrupted_upload_resumes_after_last_committed_chunk(db, monkeypatch):
+    data = csv_rows(35)
+    commit = db.commit_upload_chunk
+    record_chunks(db, monkeypatch, commit, fail_at=3)
+    with pytest.raises(UploadInterruptedError, match="stopped at row 20"):
+        upload_file(db, data)
+    upload = db.get_all_uploads()[0]
+    assert (upload["status"], upload["committed_rows"], upload["chunks_committed"]) == ("processing", 20, 2)
+    assert upload["claimed_at"] is None
+
+    calls = record_chunks(db, monkeypatch, commit)
+    assert upload_file(db, data) == (35, 35, 0)
+    # Only the two chunks after the checkpoint were committed again
+    assert [args[2] for args in calls] == [30, 35]
+
+    upload = db.get_all_uploads()[0]
+    assert len(db.get_all_uploads()) == 1
+    assert (upload["status"], upload["committed_rows"], upload["successful_records"]) == ("completed", 35, 35)
+    assert len(db.get_all_candidates()) == 35
+
+def test_second_upload_of_a_file_in_flight_is_refused(db):
+    upload = {"filename": "candidates.csv", "position": POSITION["title"],
+              "content_hash": "0" * 64, "total_records": 35}
+    first = db.start_upload(upload)
+    assert first["committed_rows"] == 0
+    assert db.start_upload(upload) is False
+
+    with pytest.raises(UploadInProgressError):
+        ingest._start_upload(db, "candidates.csv", POSITION["title"], "0" * 64, 35)
+
+def test_stale_claim_is_taken_over(db, monkeypatch):
+    upload = {"filename": "candidates.csv", "position": POSITION["title"],
+              "content_hash": "0" * 64, "total_records": 35}
+    first = db.start_upload(upload)
+    monkeypatch.setattr(db, "UPLOAD_CLAIM_SECONDS", -1)
+    assert db.start_upload(upload)["id"] == first["id"]
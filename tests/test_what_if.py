@@ -0,0 +1,61 @@
+import pytest
+
+from backend.services.cv_processing import SCORE_WEIGHTS
+from tests.conftest import POSITION, scored_candidates
+
+SKILLS_ONLY = {"skill_score": 1, "experience_score": 0}
+
+@pytest.fixture
+def candidates(db):
+    upload = db.start_upload({"filename": "a.csv", "position": POSITION["title"],
+                              "content_hash": "0" * 64, "total_records": 6})
+    db.commit_upload_chunk(upload["id"], scored_candidates(6), 6)
+    return db.get_all_candidates()
+
+def scores(db):
+    return {candidate["id"]: candidate["score"] for candidate in db.get_all_candidates()}
+
+def position_stats(db):
+    return {row["position"]: row for row in db.get_position_stats()}[POSITION["title"]]
+
+def test_what_if_without_commit_changes_nothing(client, db, candidates):
+    before = scores(db)
+    response = client.post('/api/positions/what-if', json={"position": POSITION["title"], "weights": SKILLS_ONLY})
+    assert response.status_code == 200
+    result = response.get_json()
+    assert result["committed"] is False
+    assert result["previousWeights"] == SCORE_WEIGHTS
+    assert scores(db) == before
+    assert db.get_position_by_title(POSITION["title"])["score_weights"] is None
+
+def test_what_if_commit_rescores_candidates_and_stats(client, db, candidates):
+    skill_scores = {row["id"]: row["skill_score"] for row in db.get_score_components(POSITION["title"])}
+    response = client.post('/api/positions/what-if', json={
+        "position": POSITION["title"], "weights": SKILLS_ONLY, "commit": True, "limit": 3,
+    })
+    assert response.status_code == 200
+    result = response.get_json()
+    assert result["committed"] is True
+    assert result["candidates"] == len(candidates)
+    assert [row["score"] for row in result["top"]] == sorted(skill_scores.values(), reverse=True)[:3]
+
+    # Scores and the stored weights now follow the new weights
+    assert scores(db) == skill_scores
+    assert db.get_position_by_title(POSITION["title"])["score_weights"] == {"skill_score": 1.0, "experience_score": 0.0}
+
+    # The incrementally updated aggregates match a full recount
+    stats = position_stats(db)
+    assert stats["score_total"] == sum(skill_scores.values())
+    assert db.rebuild_position_stats()
+    assert position_stats(db) == stats
+
+@pytest.mark.parametrize("body", [
+    {"position": POSITION["title"], "weights": {"luck": 1}},
+    {"position": POSITION["title"], "weights": {"skill_score": True}},
+    {"position": POSITION["title"], "weights": SKILLS_ONLY, "limit": 0},
+    {"weights": SKILLS_ONLY},
+])
+def test_what_if_rejects_bad_requests(client, db, candidates, body):
+    before = scores(db)
+    assert client.post('/api/positions/what-if', json=body).status_code == 400
+    assert scores(db) == before
@@ -0,0 +1,43 @@
+from datetime import datetime
+
+from backend.services.database import Database
+from backend.services.write_behind import WriteBehindBuffer
+
+def notification(message):
+    return {"message": message, "type": "info", "read": False, "created_at": datetime.now().isoformat()}
+
+def messages(db):
+    return sorted(row["message"] for row in db.get_all_notifications())
+
+def test_writer_that_cannot_connect_falls_back_to_synchronous_inserts(db):
+    def connect():
+        raise ConnectionError("primary is down")
+    db.write_behind = WriteBehindBuffer(connect, flush_interval=0.01)
+
+    for i in range(3):
+        db.create_notification(notification(f"n{i}"))
+    db.write_behind.flush(2)
+    db.create_notification(notification("n3"))
+
+    assert messages(db) == ["n0", "n1", "n2", "n3"]
+    assert db.write_behind.status()["error"] == "primary is down"
+
+def test_rows_the_writer_cannot_write_are_requeued_and_written_synchronously(db):
+    class BrokenWriter:
+        def insert_rows(self, rows):
+            return None
+    db.write_behind = WriteBehindBuffer(BrokenWriter, flush_interval=0.01)
+
+    db.create_notification(notification("queued"))
+    db.write_behind.flush(2)
+    status = db.write_behind.status()
+    assert status["error"] and status["queued"] == 1
+
+    db.create_notification(notification("later"))
+    assert messages(db) == ["later", "queued"]
+    assert db.write_behind.status()["queued"] == 0
+
+def test_writer_without_the_database_does_not_fall_back_to_memory(tmp_path):
+    writer = Database(sqlite_path=str(tmp_path / "missing" / "hire.db"), replica_urls=[],
+                      write_behind=False, memory_fallback=False)
+    assert writer.conn is None